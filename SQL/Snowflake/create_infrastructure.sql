@@ -32,5 +32,6 @@ CREATE TABLE IF NOT EXISTS NYC_TAXI_DB.RAW.YELLOW_TAXI_TRIPS (
     improvement_surcharge DOUBLE,
     total_amount DOUBLE,
     congestion_surcharge DOUBLE,
-    Airport_fee DOUBLE
+    Airport_fee DOUBLE,
+    SOURCE_FILE STRING
 );
\ No newline at end of file
@@ -25,5 +25,19 @@ CREATE TABLE IF NOT EXISTS YELLOW_TAXI_TRIPS (
     IMPROVEMENT_SURCHARGE FLOAT,
     TOTAL_AMOUNT FLOAT,
     CONGESTION_SURCHARGE FLOAT,
-    AIRPORT_FEE FLOAT
+    AIRPORT_FEE FLOAT,
+    SOURCE_FILE VARCHAR(16777216)      -- Fichier Parquet d'origine (remplacement par mois)
+);
+
+-- Stage nommé partagé par le chargement (un fichier Parquet par mois)
+CREATE STAGE IF NOT EXISTS YELLOW_TAXI_STAGE
+    FILE_FORMAT = (TYPE = 'PARQUET');
+
+-- Registre des chargements : un fichier source par mois
+CREATE TABLE IF NOT EXISTS LOAD_LEDGER (
+    SOURCE_FILE VARCHAR PRIMARY KEY,
+    MONTH VARCHAR(7),
+    CONTENT_HASH VARCHAR(64),
+    ROWS_LOADED NUMBER(38,0),
+    LOADED_AT TIMESTAMP_NTZ
 );
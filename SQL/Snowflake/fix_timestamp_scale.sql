@@ -0,0 +1,24 @@
+-- Correction ponctuelle des horodatages chargés avant la conversion au COPY
+-- Les microsecondes TLC avaient été lues comme des secondes : le nombre de
+-- "secondes" stocké est en réalité un nombre de microsecondes depuis 1970.
+-- Idempotent : seules les valeurs aberrantes (après l'an 3000) sont corrigées.
+
+USE ROLE NYCTRANSFORM;
+USE WAREHOUSE NYC_TAXI_WH;
+USE DATABASE NYC_TAXI_DB;
+USE SCHEMA RAW;
+
+UPDATE YELLOW_TAXI_TRIPS
+SET
+    TPEP_PICKUP_DATETIME = IFF(
+        TPEP_PICKUP_DATETIME >= '3000-01-01'::TIMESTAMP_NTZ,
+        TO_TIMESTAMP_NTZ(DATEDIFF('second', '1970-01-01'::TIMESTAMP_NTZ, TPEP_PICKUP_DATETIME), 6),
+        TPEP_PICKUP_DATETIME
+    ),
+    TPEP_DROPOFF_DATETIME = IFF(
+        TPEP_DROPOFF_DATETIME >= '3000-01-01'::TIMESTAMP_NTZ,
+        TO_TIMESTAMP_NTZ(DATEDIFF('second', '1970-01-01'::TIMESTAMP_NTZ, TPEP_DROPOFF_DATETIME), 6),
+        TPEP_DROPOFF_DATETIME
+    )
+WHERE TPEP_PICKUP_DATETIME >= '3000-01-01'::TIMESTAMP_NTZ
+   OR TPEP_DROPOFF_DATETIME >= '3000-01-01'::TIMESTAMP_NTZ;
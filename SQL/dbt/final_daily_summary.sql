@@ -8,7 +8,10 @@ SELECT
     AVG(trip_distance) as avg_distance,
     SUM(total_amount) as total_revenue,
     AVG(total_amount) as avg_revenue,
-    AVG(tip_percentage) as avg_tip_percentage
+    AVG(tip_percentage) as avg_tip_percentage,
+    -- Sommes additives (total_trips sert de compte) : moyennes exactes sur toute période
+    SUM(trip_distance) as sum_trip_distance,
+    SUM(tip_percentage) as sum_tip_percentage
 FROM STAGING.clean_trips
 GROUP BY DATE(tpep_pickup_datetime)
 ORDER BY pickup_date
@@ -8,6 +8,10 @@ SELECT
     AVG(total_amount) as avg_revenue,
     AVG(avg_speed_mph) as avg_speed,
     AVG(trip_distance) as avg_distance,
+    -- Sommes additives (total_trips sert de compte)
+    SUM(total_amount) as sum_total_amount,
+    SUM(avg_speed_mph) as sum_speed_mph,
+    SUM(trip_distance) as sum_trip_distance,
     -- Catégorisation des périodes selon le brief
     CASE 
         WHEN pickup_hour BETWEEN 6 AND 9 THEN 'Rush Matinal'
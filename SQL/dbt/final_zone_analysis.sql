@@ -8,6 +8,8 @@ SELECT
     AVG(total_amount) as avg_revenue,
     SUM(total_amount) as total_revenue,
     AVG(trip_distance) as avg_distance,
+    -- Somme additive (total_trips sert de compte, total_revenue de somme des montants)
+    SUM(trip_distance) as sum_trip_distance,
     RANK() OVER (ORDER BY COUNT(*) DESC) as popularity_rank
 FROM STAGING.clean_trips
 GROUP BY pulocationid
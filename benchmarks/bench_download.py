@@ -0,0 +1,90 @@
+"""
+Benchmark du téléchargement des mois TLC contre un serveur local
+Compare la boucle séquentielle historique (iter_bytes 8 Ko) au moteur
+asynchrone de scripts/tlc_download.py avec plusieurs réglages.
+
+Usage : python benchmarks/bench_download.py --months 6 --rows 1000000 --rate 20
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from loguru import logger
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from tlc_download import download_months, local_path, month_url  # noqa: E402
+from tlc_stand_in import StandIn, make_fixtures  # noqa: E402
+
+
+def sequential_baseline(months, data_dir, base_url):
+    """Reproduction de l'ancien load_month : un fichier à la fois, blocs de 8 Ko"""
+    for month in months:
+        with httpx.stream("GET", month_url(month, base_url), timeout=300.0) as response:
+            response.raise_for_status()
+            with open(local_path(month, data_dir), "wb") as file:
+                for chunk in response.iter_bytes(chunk_size=8192):
+                    file.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=6, help="Nombre de mois servis")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Lignes par fichier de test")
+    parser.add_argument("--rate", type=float, default=20.0,
+                        help="Débit max par connexion en Mo/s (0 = illimité)")
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    months = [f"2024-{i:02d}" for i in range(1, args.months + 1)]
+    workdir = Path(tempfile.mkdtemp(prefix="bench_download_"))
+    fixtures = make_fixtures(workdir / "fixtures", months, args.rows)
+    total_mb = sum(p.stat().st_size for p in fixtures.iterdir()) / 1024 / 1024
+
+    configs = [
+        ("séquentiel 8 Ko (historique)", None),
+        ("1 fichier, 1 plage", dict(max_files=1, segments=1)),
+        ("4 fichiers, 1 plage", dict(max_files=4, segments=1)),
+        ("4 fichiers, 4 plages", dict(max_files=4, segments=4)),
+        ("8 fichiers, 2 plages", dict(max_files=8, segments=2)),
+    ]
+
+    table = Table(title=f"{len(months)} fichiers · {total_mb:.0f} Mo · "
+                        f"{args.rate or '∞'} Mo/s par connexion")
+    table.add_column("Configuration", style="cyan")
+    table.add_column("Durée (s)", justify="right")
+    table.add_column("Débit (Mo/s)", justify="right", style="green")
+
+    rate = args.rate * 1024 * 1024 if args.rate else None
+    try:
+        with StandIn(fixtures, rate=rate) as server:
+            for label, kwargs in configs:
+                out = workdir / "out"
+                shutil.rmtree(out, ignore_errors=True)
+                out.mkdir()
+                started = time.perf_counter()
+                if kwargs is None:
+                    sequential_baseline(months, out, server.base_url)
+                else:
+                    results = download_months(months, data_dir=out, base_url=server.base_url, **kwargs)
+                    failed = [r for r in results if not r.ok]
+                    if failed:
+                        raise RuntimeError(f"{label}: {failed[0].month} {failed[0].error}")
+                elapsed = time.perf_counter() - started
+                table.add_row(label, f"{elapsed:.2f}", f"{total_mb / elapsed:.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark de la lecture des résultats de requêtes en DataFrame
+Compare, pour des résultats de 10k à 10M lignes, l'ancienne lecture
+(fetchall() puis pd.DataFrame) à la lecture Arrow de dashboard/frames.py :
+durée de lecture et pic de mémoire (RSS) ajouté par la lecture. Chaque mesure
+tourne dans un processus neuf pour que les pics ne se cumulent pas.
+
+Usage : python benchmarks/bench_fetch.py --sizes 10000,100000,1000000,10000000
+        python benchmarks/bench_fetch.py --backend snowflake --sizes 10000,1000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dashboard import frames  # noqa: E402
+
+# Colonnes typiques des sections : entier, zone, date, montant, somme décimale
+DUCKDB_SQL = """
+    SELECT
+        range                                   AS id,
+        (range % 263)::INTEGER                  AS zone_id,
+        DATE '2024-01-01' + (range % 365)::INTEGER AS pickup_date,
+        random() * 100                          AS total_amount,
+        (range % 1000)::DECIMAL(38, 0)          AS trip_count
+    FROM range({rows})
+"""
+SNOWFLAKE_SQL = """
+    SELECT
+        SEQ8()                                  AS id,
+        UNIFORM(1, 263, RANDOM())               AS zone_id,
+        DATEADD(day, SEQ4() % 365, '2024-01-01'::DATE) AS pickup_date,
+        UNIFORM(0::FLOAT, 100::FLOAT, RANDOM()) AS total_amount,
+        (SEQ8() % 1000)::NUMBER(38, 0)          AS trip_count
+    FROM TABLE(GENERATOR(ROWCOUNT => {rows}))
+"""
+
+
+def legacy_frame(cursor):
+    """Ancienne lecture : un tuple Python par ligne, puis le DataFrame"""
+    cols = [d[0] for d in cursor.description]
+    return pd.DataFrame(cursor.fetchall(), columns=cols)
+
+
+def connect(backend):
+    if backend == "duckdb":
+        import duckdb
+        return duckdb.connect()
+
+    import snowflake.connector
+    from dotenv import load_dotenv
+    load_dotenv()
+    return snowflake.connector.connect(
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        warehouse="NYC_TAXI_WH",
+        database="NYC_TAXI_DB",
+        schema="RAW",
+        role="NYCTRANSFORM"
+    )
+
+
+def measure(backend, variant, rows):
+    """Une lecture dans le processus courant : (secondes, Mo de RSS ajoutés au pic)"""
+    conn = connect(backend)
+    cursor = conn.cursor()
+    sql = (DUCKDB_SQL if backend == "duckdb" else SNOWFLAKE_SQL).format(rows=rows)
+    if backend == "snowflake":
+        cursor.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    cursor.execute(sql)
+    if variant == "arrow":
+        df = frames.from_duckdb(cursor) if backend == "duckdb" else frames.from_snowflake(cursor)
+    else:
+        df = legacy_frame(cursor)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss   # Ko sous Linux
+    assert len(df) == rows
+    return elapsed, (peak - before) / 1024
+
+
+def run_isolated(backend, variant, rows):
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", backend, variant, str(rows)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["duckdb", "snowflake"], default="duckdb")
+    parser.add_argument("--sizes", default="10000,100000,1000000,10000000", help="Tailles de résultat (lignes)")
+    parser.add_argument("--runs", type=int, default=3, help="Répétitions par mesure")
+    parser.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, variant, rows = args.worker
+        print(json.dumps(measure(backend, variant, int(rows))))
+        return
+
+    variants = [("fetchall + DataFrame (historique)", "legacy"), ("Arrow (dashboard/frames.py)", "arrow")]
+    table = Table(title=f"Lecture des résultats · {args.backend} · médiane sur {args.runs} exécutions")
+    table.add_column("Lignes", justify="right")
+    table.add_column("Variante", style="cyan")
+    table.add_column("Durée (s)", justify="right")
+    table.add_column("Pic RSS (Mo)", justify="right")
+    table.add_column("Accélération", justify="right", style="green")
+    for rows in (int(size) for size in args.sizes.split(",")):
+        results = {}
+        for label, variant in variants:
+            runs = [run_isolated(args.backend, variant, rows) for _ in range(args.runs)]
+            results[label] = (statistics.median(r[0] for r in runs), statistics.median(r[1] for r in runs))
+        baseline = results[variants[0][0]][0]
+        for label, (elapsed, rss) in results.items():
+            table.add_row(f"{rows:,}", label, f"{elapsed:.2f}", f"{rss:.0f}", f"×{baseline / elapsed:.1f}")
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark du chargement à froid de load_data() du dashboard local (DuckDB)
+Compare les quatre requêtes historiques (quatre lectures des Parquet) à la
+requête unique GROUPING SETS de dashboard/fused.py, vérifie que les deux
+donnent les mêmes sections et affiche les durées.
+
+Usage : python benchmarks/bench_load_data.py --months 3 --rows 2000000
+        python benchmarks/bench_load_data.py --source "read_parquet('data/yellow_taxi/*.parquet')"
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dashboard import fused  # noqa: E402
+from tlc_stand_in import make_fixtures  # noqa: E402
+
+DATE_FILTER = (
+    "AND tpep_pickup_datetime >= '2023-01-01'::DATE "
+    "AND tpep_pickup_datetime <  '2025-11-01'::DATE"
+)
+
+
+def legacy_sections(query, source, date_filter):
+    """Reproduction de l'ancien load_data() : une lecture des trajets par section"""
+    pickup_hour = "date_part('hour', tpep_pickup_datetime)"
+    tip_pct = "TIP_AMOUNT / NULLIF(FARE_AMOUNT, 0) * 100"
+
+    daily = query(f"""
+        SELECT CAST(tpep_pickup_datetime AS DATE) AS pickup_date, COUNT(*) AS total_trips,
+               SUM(TOTAL_AMOUNT) AS total_revenue, AVG(TRIP_DISTANCE) AS avg_distance,
+               AVG(TOTAL_AMOUNT) AS avg_fare, AVG({tip_pct}) AS avg_tip_pct
+        FROM {source}
+        WHERE TRIP_DISTANCE > 0 AND TOTAL_AMOUNT > 0 {date_filter}
+        GROUP BY 1 ORDER BY 1
+    """)
+    hourly = query(f"""
+        SELECT {pickup_hour} AS pickup_hour, COUNT(*) AS total_trips,
+               SUM(TOTAL_AMOUNT) AS total_revenue, AVG(TOTAL_AMOUNT) AS avg_fare,
+               AVG({tip_pct}) AS avg_tip_pct, AVG(TRIP_DISTANCE) AS avg_distance,
+               CASE
+                   WHEN {pickup_hour} BETWEEN 0  AND 5  THEN 'Nuit (0h-6h)'
+                   WHEN {pickup_hour} BETWEEN 6  AND 9  THEN 'Matin (6h-10h)'
+                   WHEN {pickup_hour} BETWEEN 10 AND 16 THEN 'Journée (10h-17h)'
+                   WHEN {pickup_hour} BETWEEN 17 AND 20 THEN 'Soir (17h-21h)'
+                   ELSE                                       'Soirée (21h-0h)'
+               END AS tranche
+        FROM {source}
+        WHERE TRIP_DISTANCE > 0 {date_filter}
+        GROUP BY 1, 7 ORDER BY 1
+    """)
+    zones = query(f"""
+        SELECT PULOCATIONID AS zone_id, COUNT(*) AS total_trips, SUM(TOTAL_AMOUNT) AS total_revenue,
+               AVG(TOTAL_AMOUNT) AS avg_fare, AVG(TRIP_DISTANCE) AS avg_distance,
+               AVG({tip_pct}) AS avg_tip_pct
+        FROM {source}
+        WHERE TRIP_DISTANCE > 0 {date_filter}
+        GROUP BY 1 ORDER BY total_trips DESC LIMIT 100
+    """)
+    profile = query(f"""
+        SELECT COUNT(*) AS total_trips, AVG(TRIP_DISTANCE) AS avg_distance,
+               AVG(TOTAL_AMOUNT) AS avg_fare, AVG({tip_pct}) AS avg_tip_pct,
+               SUM(CASE WHEN TIP_AMOUNT > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS pct_avec_pourboire,
+               SUM(CASE WHEN PAYMENT_TYPE = 1 THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS pct_carte,
+               SUM(CASE WHEN PULOCATIONID IN (132, 138) OR DOLOCATIONID IN (132, 138)
+                        THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS pct_aeroport_jfk,
+               SUM(CASE WHEN PULOCATIONID = 137 OR DOLOCATIONID = 137
+                        THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS pct_aeroport_lga,
+               AVG(PASSENGER_COUNT) AS avg_passagers
+        FROM {source}
+        WHERE TRIP_DISTANCE > 0 AND TOTAL_AMOUNT > 0 {date_filter}
+    """)
+    return daily, hourly, zones, profile
+
+
+def cold_query():
+    """query() du dashboard sur une connexion neuve (pas de cache DuckDB partagé)"""
+    con = duckdb.connect()
+
+    def query(sql):
+        df = con.execute(sql).fetchdf()
+        df.columns = [col.upper() for col in df.columns]
+        return df
+    return query
+
+
+def check_same(legacy, fused_result):
+    """Les deux chemins doivent produire les mêmes sections (à l'ordre des ex aequo près)"""
+    for name, a, b in zip(("daily", "hourly", "zones", "profile"), legacy, fused_result):
+        keys = list(a.columns)
+        a = a.sort_values(keys).reset_index(drop=True)
+        b = b[keys].sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(a, b, rtol=1e-9, obj=name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=3, help="Nombre de fichiers de test")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Lignes par fichier de test")
+    parser.add_argument("--runs", type=int, default=5, help="Répétitions par variante")
+    parser.add_argument("--source", help="Expression DuckDB à interroger à la place des fichiers de test")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.source:
+        source = args.source
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix="bench_load_data_"))
+        months = [f"2024-{i:02d}" for i in range(1, args.months + 1)]
+        make_fixtures(workdir, months, args.rows)
+        source = f"read_parquet('{workdir}/*.parquet')"
+
+    variants = [
+        ("4 requêtes (historique)", legacy_sections),
+        ("GROUPING SETS (1 passe)", fused.load_sections),
+    ]
+    try:
+        check_same(legacy_sections(cold_query(), source, DATE_FILTER),
+                   fused.load_sections(cold_query(), source, DATE_FILTER))
+        timings = {}
+        for label, load in variants:
+            timings[label] = []
+            for _ in range(args.runs):
+                query = cold_query()
+                started = time.perf_counter()
+                load(query, source, DATE_FILTER)
+                timings[label].append(time.perf_counter() - started)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = statistics.median(timings[variants[0][0]])
+    table = Table(title=f"load_data() à froid · {source} · médiane sur {args.runs} exécutions")
+    table.add_column("Variante", style="cyan")
+    table.add_column("Médiane (s)", justify="right")
+    table.add_column("Min (s)", justify="right")
+    table.add_column("Accélération", justify="right", style="green")
+    for label, runs in timings.items():
+        median = statistics.median(runs)
+        table.add_row(label, f"{median:.2f}", f"{min(runs):.2f}", f"×{baseline / median:.1f}")
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
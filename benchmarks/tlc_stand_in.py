@@ -0,0 +1,172 @@
+"""
+Serveur HTTP local imitant le CDN TLC pour les benchmarks
+Sert des fichiers Parquet de test avec HEAD, Range (206), ETag /
+Last-Modified (304, If-Range) et un débit maximal optionnel par connexion
+pour simuler un lien réseau réel.
+"""
+
+import re
+import threading
+import time
+from email.utils import formatdate
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+def make_fixture(path, rows, seed=0):
+    """Écrire un Parquet au schéma des trajets jaunes avec des valeurs aléatoires"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01T00:00:00", "us")
+    pickup = start + rng.integers(0, 31 * 24 * 3600, rows).astype("timedelta64[s]")
+    dropoff = pickup + rng.integers(60, 3600, rows).astype("timedelta64[s]")
+    fare = rng.gamma(2.0, 9.0, rows).round(2)
+    tip = (fare * rng.uniform(0, 0.3, rows)).round(2)
+    table = pa.table({
+        "VendorID": rng.integers(1, 3, rows, dtype=np.int32),
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": dropoff,
+        "passenger_count": rng.integers(1, 5, rows).astype(np.float64),
+        "trip_distance": rng.gamma(1.5, 2.0, rows).round(2),
+        "RatecodeID": np.ones(rows),
+        "store_and_fwd_flag": np.full(rows, "N"),
+        "PULocationID": rng.integers(1, 264, rows, dtype=np.int32),
+        "DOLocationID": rng.integers(1, 264, rows, dtype=np.int32),
+        "payment_type": rng.integers(1, 5, rows),
+        "fare_amount": fare,
+        "extra": np.zeros(rows),
+        "mta_tax": np.full(rows, 0.5),
+        "tip_amount": tip,
+        "tolls_amount": np.zeros(rows),
+        "improvement_surcharge": np.ones(rows),
+        "total_amount": (fare + tip + 1.5).round(2),
+        "congestion_surcharge": np.full(rows, 2.5),
+        "Airport_fee": np.zeros(rows),
+    })
+    pq.write_table(table, path)
+    return path
+
+
+def make_fixtures(directory, months, rows):
+    """Créer un fichier de test par mois sous le nom utilisé par TLC"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for i, month in enumerate(months):
+        path = directory / f"yellow_tripdata_{month}.parquet"
+        if not path.exists():
+            make_fixture(path, rows, seed=i)
+    return directory
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def __init__(self, *args, root, rate, **kwargs):
+        self.root = root
+        self.rate = rate
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resolve(self):
+        path = self.root / Path(self.path).name
+        if not path.is_file():
+            self.send_error(404)
+            return None
+        return path
+
+    @staticmethod
+    def _validators(path):
+        stat = path.stat()
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', formatdate(stat.st_mtime, usegmt=True)
+
+    def _send_validators(self, path):
+        etag, last_modified = self._validators(path)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Accept-Ranges", "bytes")
+
+    def do_HEAD(self):
+        path = self._resolve()
+        if path is None:
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self._send_validators(path)
+        self.end_headers()
+
+    def do_GET(self):
+        path = self._resolve()
+        if path is None:
+            return
+        etag, last_modified = self._validators(path)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._send_validators(path)
+            self.end_headers()
+            return
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        match = _RANGE.fullmatch(self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and if_range not in (None, etag, last_modified):
+            match = None  # Version modifiée : renvoi du fichier complet
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self._send_validators(path)
+        self.end_headers()
+        self._send_body(path, start, end)
+
+    def _send_body(self, path, start, end):
+        block = 256 * 1024
+        started = time.perf_counter()
+        sent = 0
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = file.read(min(block, remaining))
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # Client parti (coupure simulée, annulation)
+                sent += len(data)
+                remaining -= len(data)
+                if self.rate:
+                    ahead = sent / self.rate - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+
+class StandIn:
+    """Serveur local démarré dans un thread (utilisable comme context manager)"""
+
+    def __init__(self, root, rate=None):
+        handler = partial(_Handler, root=Path(root), rate=rate)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,4 @@
+"""
+Code partagé par streamlit_dashboard.py (Snowflake)
+et streamlit_dashboard_local.py (DuckDB) : couche de données et interface (ui).
+"""
@@ -0,0 +1,174 @@
+"""
+Annulation des requêtes d'un rendu remplacé
+Quand un utilisateur enchaîne les clics, un rendu déjà remplacé continuerait
+ses requêtes jusqu'au bout, sur le warehouse ou le processeur, pour des
+résultats que personne ne verra. Chaque requête en cours est donc inscrite
+ici avec son propriétaire, c'est-à-dire la session et le rendu qui l'ont
+lancée (owned_by, propagé aux threads des runners par contextvars). Elle est
+aussi inscrite avec son moyen d'annulation :
+  - DuckDB    : cursor.interrupt() ;
+  - Snowflake : abort_query, ou SYSTEM$CANCEL_QUERY à défaut.
+
+Chaque rendu complet d'une session prend une génération (Generations, gardé
+dans st.session_state) : une requête est remplacée quand la génération qui
+l'a lancée n'est plus la dernière. Avec runner.fastReruns (défaut), le
+nouveau rendu démarre aussitôt dans un autre thread pendant que l'ancien
+attend encore ses requêtes. Un thread de veille interroge donc, toutes les
+POLL_INTERVAL secondes, le prédicat `superseded` du propriétaire et annule
+ses requêtes dès qu'il est vrai. Elles
+échouent alors sur QueryCancelled ; ni les caches ni le routage ne le
+prennent pour un résultat ou une table absente. Les requêtes sans
+propriétaire (préchauffage en arrière-plan, scripts) ne sont jamais annulées.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+POLL_INTERVAL = 0.1   # Secondes entre deux vérifications des rendus propriétaires
+
+_owner = contextvars.ContextVar("query_owner", default=None)
+
+
+class QueryCancelled(Exception):
+    """Requête annulée parce que le rendu qui l'avait lancée a été remplacé"""
+
+
+class Owner:
+    """Rendu propriétaire de requêtes : session et prédicat « remplacé »"""
+
+    def __init__(self, session, superseded):
+        self.session = session
+        self.superseded = superseded
+
+
+class InFlight:
+    """Requête en cours ; `cancelled` indique qu'elle a été annulée ici"""
+
+    def __init__(self, owner, name, cancel):
+        self.owner = owner
+        self.name = name
+        self.cancel = cancel
+        self.cancelled = False
+        self.done = False
+        self._lock = threading.Lock()   # Pas d'annulation après la fin de la requête
+
+
+_inflight = set()
+_lock = threading.Lock()
+_watcher = None
+
+
+class Generations:
+    """Compteur des rendus complets d'une session"""
+
+    def __init__(self):
+        self.current = 0
+
+    def begin(self):
+        """Nouveau rendu : sa génération, qui remplace les précédentes"""
+        self.current += 1
+        return self.current
+
+    def superseded(self, generation):
+        return self.current > generation
+
+
+def rerun(session, generations):
+    """Rendu qui commence : ses requêtes sont annulées dès qu'un rendu plus récent démarre"""
+    return owned_by(session, functools.partial(generations.superseded, generations.begin()))
+
+
+@contextmanager
+def owned_by(session, superseded):
+    """Requêtes lancées dans ce bloc : propriété de `session`, annulées si `superseded()`"""
+    token = _owner.set(Owner(session, superseded))
+    try:
+        yield
+    finally:
+        _owner.reset(token)
+
+
+def register(name, cancel):
+    """Inscrire une requête du rendu courant ; None hors d'un bloc owned_by"""
+    global _watcher
+    owner = _owner.get()
+    if owner is None:
+        return None
+    if owner.superseded():   # Déjà remplacé : la requête ne doit pas (continuer à) tourner
+        cancel()
+        raise QueryCancelled(f"{name} : rendu déjà remplacé")
+    query = InFlight(owner, name, cancel)
+    with _lock:
+        _inflight.add(query)
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name="query-cancellation", daemon=True)
+            _watcher.start()
+    return query
+
+
+def release(query):
+    """Désinscrire une requête terminée (à appeler avant de rendre son curseur)"""
+    if query is None:
+        return
+    with query._lock:
+        query.done = True
+    with _lock:
+        _inflight.discard(query)
+
+
+@contextmanager
+def track(name, cancel):
+    """Requête du rendu courant le temps du bloc ; QueryCancelled si elle est annulée"""
+    query = register(name, cancel)
+    try:
+        yield query
+    except Exception as e:
+        if query is not None and query.cancelled:
+            raise QueryCancelled(f"{query.name} annulée (session {query.owner.session})") from e
+        raise
+    finally:
+        release(query)
+
+
+def in_flight(session=None):
+    """Noms des requêtes en cours, par session (toutes les sessions par défaut)"""
+    with _lock:
+        queries = list(_inflight)
+    sessions = {}
+    for query in queries:
+        if session is None or query.owner.session == session:
+            sessions.setdefault(query.owner.session, []).append(query.name)
+    return sessions
+
+
+def _cancel(query):
+    with query._lock:
+        if query.done or query.cancelled:
+            return
+        query.cancelled = True
+        try:
+            query.cancel()
+        except Exception as e:
+            logger.warning(f"⚠️ Annulation de {query.name} échouée: {e}")
+            return
+    logger.info(f"🛑 {query.name} annulée : rendu remplacé (session {query.owner.session})")
+
+
+def _watch():
+    while True:
+        time.sleep(POLL_INTERVAL)
+        with _lock:
+            queries = list(_inflight)
+        for query in queries:
+            try:
+                superseded = query.owner.superseded()
+            except Exception as e:
+                logger.debug(f"Propriétaire de {query.name} illisible: {e}")
+                continue
+            if superseded:
+                _cancel(query)
@@ -0,0 +1,249 @@
+"""
+Cube d'agrégats additifs pour les dashboards
+Une table unique au grain (jour, heure, zone de départ, mode de paiement,
+aéroport, course payée) avec des comptes et des sommes : toutes les sections
+du dashboard (quotidien, horaire, zones, portrait) s'en déduisent par simple
+re-agrégation, sans relire les trajets bruts.
+
+Le même SQL tourne sur DuckDB (cube écrit en Parquet) et sur Snowflake
+(table FINAL.TRIPS_CUBE, plus ses niveaux d'agrégation FINAL.TRIPS_CUBE_HOUR,
+_ZONE et _DAY pour le routage des requêtes).
+
+Construction : python -m dashboard.cube --backend duckdb|snowflake
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+from loguru import logger
+
+from dashboard import parallel
+
+DATE_START = "2023-01-01"
+DATE_END = "2025-11-01"
+
+SNOWFLAKE_SOURCE = "NYC_TAXI_DB.RAW.YELLOW_TAXI_TRIPS"
+SNOWFLAKE_CUBE = "NYC_TAXI_DB.FINAL.TRIPS_CUBE"
+LOCAL_CUBE = Path("data/trips_cube.parquet")
+
+# Bits de airport_flag : départ ou arrivée à JFK (132, 138) / LaGuardia (137)
+AIRPORT_JFK = 1
+AIRPORT_LGA = 2
+
+DIMENSIONS = ("pickup_date", "pickup_hour", "pulocationid", "payment_type", "airport_flag", "is_paid")
+MEASURES = ("trip_count", "sum_trip_distance", "sum_total_amount", "count_total_amount",
+            "sum_tip_pct", "count_tip_pct", "tip_positive_count",
+            "sum_passenger_count", "count_passenger_count")
+
+# Niveaux d'agrégation du cube (suffixe de table -> dimensions conservées),
+# construits à côté du cube Snowflake pour dashboard/routing.py
+ROLLUPS = {
+    "HOUR": ("pickup_hour", "is_paid"),
+    "ZONE": ("pulocationid", "is_paid"),
+    "DAY": ("pickup_date", "payment_type", "airport_flag", "is_paid"),
+}
+
+
+def local_source():
+    """Trajets locaux : partitions compactées si disponibles, sinon fichiers TLC"""
+    if Path("data/yellow_taxi_partitioned").exists():
+        return ("read_parquet('data/yellow_taxi_partitioned/*/*/*.parquet', "
+                "hive_partitioning = true, union_by_name = true)")
+    return "read_parquet('data/yellow_taxi/*.parquet', union_by_name = true)"
+
+
+def build_sql(source):
+    """SELECT du cube (SQL commun à DuckDB et Snowflake)"""
+    return f"""
+        SELECT
+            CAST(TPEP_PICKUP_DATETIME AS DATE)                           AS pickup_date,
+            HOUR(TPEP_PICKUP_DATETIME)                                   AS pickup_hour,
+            PULOCATIONID                                                 AS pulocationid,
+            PAYMENT_TYPE                                                 AS payment_type,
+            CASE WHEN PULOCATIONID IN (132, 138) OR DOLOCATIONID IN (132, 138)
+                 THEN {AIRPORT_JFK} ELSE 0 END
+            + CASE WHEN PULOCATIONID = 137 OR DOLOCATIONID = 137
+                 THEN {AIRPORT_LGA} ELSE 0 END                           AS airport_flag,
+            COALESCE(TOTAL_AMOUNT > 0, FALSE)                            AS is_paid,
+            COUNT(*)                                                     AS trip_count,
+            SUM(TRIP_DISTANCE)                                           AS sum_trip_distance,
+            SUM(TOTAL_AMOUNT)                                            AS sum_total_amount,
+            COUNT(TOTAL_AMOUNT)                                          AS count_total_amount,
+            SUM(TIP_AMOUNT / NULLIF(FARE_AMOUNT, 0) * 100)               AS sum_tip_pct,
+            COUNT(TIP_AMOUNT / NULLIF(FARE_AMOUNT, 0))                   AS count_tip_pct,
+            SUM(CASE WHEN TIP_AMOUNT > 0 THEN 1 ELSE 0 END)              AS tip_positive_count,
+            SUM(PASSENGER_COUNT)                                         AS sum_passenger_count,
+            COUNT(PASSENGER_COUNT)                                       AS count_passenger_count
+        FROM {source}
+        WHERE TRIP_DISTANCE > 0
+          AND TPEP_PICKUP_DATETIME >= '{DATE_START}'
+          AND TPEP_PICKUP_DATETIME <  '{DATE_END}'
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """
+
+
+def rollup_sql(cube, dimensions):
+    """Cube re-agrégé sur un sous-ensemble de ses dimensions (mêmes mesures)"""
+    return f"""
+        SELECT
+            {', '.join(dimensions)},
+            {', '.join(f'SUM({m}) AS {m}' for m in MEASURES)}
+        FROM {cube}
+        GROUP BY {', '.join(dimensions)}
+    """
+
+
+SECTIONS = ("daily", "hourly", "zones", "profile")
+# Dimensions du cube lues (regroupement ou filtre) par chaque requête de section_sql()
+SECTION_DIMENSIONS = {
+    "daily": frozenset({"pickup_date", "is_paid"}),
+    "hourly": frozenset({"pickup_hour"}),
+    "zones": frozenset({"pulocationid"}),
+    "profile": frozenset({"payment_type", "airport_flag", "is_paid"}),
+}
+
+
+def section_sql(cube):
+    """Requête de chaque section de load_data(), re-agrégée depuis le cube"""
+    avg_distance = "SUM(sum_trip_distance) / SUM(trip_count)"
+    avg_fare = "SUM(sum_total_amount) / NULLIF(SUM(count_total_amount), 0)"
+    avg_tip_pct = "SUM(sum_tip_pct) / NULLIF(SUM(count_tip_pct), 0)"
+    # Sommes et comptes des moyennes, pour les re-agréger (dashboard/rollup.py)
+    additive = """SUM(sum_trip_distance)  AS sum_trip_distance,
+            SUM(count_total_amount) AS count_total_amount,
+            SUM(sum_tip_pct)        AS sum_tip_pct,
+            SUM(count_tip_pct)      AS count_tip_pct"""
+
+    daily = f"""
+        SELECT
+            pickup_date,
+            SUM(trip_count)        AS total_trips,
+            SUM(sum_total_amount)  AS total_revenue,
+            {avg_distance}         AS avg_distance,
+            {avg_fare}             AS avg_fare,
+            {avg_tip_pct}          AS avg_tip_pct,
+            {additive}
+        FROM {cube}
+        WHERE is_paid
+        GROUP BY 1
+        ORDER BY 1
+    """
+
+    hourly = f"""
+        SELECT
+            pickup_hour,
+            SUM(trip_count)        AS total_trips,
+            SUM(sum_total_amount)  AS total_revenue,
+            {avg_fare}             AS avg_fare,
+            {avg_tip_pct}          AS avg_tip_pct,
+            {avg_distance}         AS avg_distance,
+            CASE
+                WHEN pickup_hour BETWEEN 0  AND 5  THEN 'Nuit (0h-6h)'
+                WHEN pickup_hour BETWEEN 6  AND 9  THEN 'Matin (6h-10h)'
+                WHEN pickup_hour BETWEEN 10 AND 16 THEN 'Journée (10h-17h)'
+                WHEN pickup_hour BETWEEN 17 AND 20 THEN 'Soir (17h-21h)'
+                ELSE                                     'Soirée (21h-0h)'
+            END                    AS tranche,
+            {additive}
+        FROM {cube}
+        GROUP BY 1, 7
+        ORDER BY 1
+    """
+
+    zones = f"""
+        SELECT
+            pulocationid           AS zone_id,
+            SUM(trip_count)        AS total_trips,
+            SUM(sum_total_amount)  AS total_revenue,
+            {avg_fare}             AS avg_fare,
+            {avg_distance}         AS avg_distance,
+            {avg_tip_pct}          AS avg_tip_pct,
+            {additive}
+        FROM {cube}
+        GROUP BY 1
+        ORDER BY total_trips DESC
+        LIMIT 100
+    """
+
+    profile = f"""
+        SELECT
+            SUM(trip_count)                                                  AS total_trips,
+            {avg_distance}                                                   AS avg_distance,
+            {avg_fare}                                                       AS avg_fare,
+            {avg_tip_pct}                                                    AS avg_tip_pct,
+            SUM(tip_positive_count) * 100.0 / SUM(trip_count)                AS pct_avec_pourboire,
+            SUM(CASE WHEN payment_type = 1 THEN trip_count ELSE 0 END) * 100.0
+                / SUM(trip_count)                                            AS pct_carte,
+            SUM(CASE WHEN airport_flag IN ({AIRPORT_JFK}, {AIRPORT_JFK + AIRPORT_LGA})
+                     THEN trip_count ELSE 0 END) * 100.0 / SUM(trip_count)   AS pct_aeroport_jfk,
+            SUM(CASE WHEN airport_flag IN ({AIRPORT_LGA}, {AIRPORT_JFK + AIRPORT_LGA})
+                     THEN trip_count ELSE 0 END) * 100.0 / SUM(trip_count)   AS pct_aeroport_lga,
+            SUM(sum_passenger_count) / NULLIF(SUM(count_passenger_count), 0) AS avg_passagers
+        FROM {cube}
+        WHERE is_paid
+    """
+
+    return {"daily": daily, "hourly": hourly, "zones": zones, "profile": profile}
+
+
+def load_sections(run_all, cube):
+    """Les quatre DataFrames de load_data(), re-agrégés depuis le cube en parallèle"""
+    return parallel.gather(run_all(section_sql(cube)), SECTIONS)
+
+
+def build_local(target=LOCAL_CUBE):
+    """Construire le cube Parquet local avec DuckDB ; renvoie son nombre de lignes"""
+    import duckdb
+
+    tmp = target.with_name(target.name + ".tmp")
+    con = duckdb.connect()
+    con.execute(f"""
+        COPY ({build_sql(local_source())} ORDER BY 1, 2, 3)
+        TO '{tmp}' (FORMAT parquet, COMPRESSION zstd)
+    """)
+    rows = con.execute(f"SELECT COUNT(*) FROM read_parquet('{tmp}')").fetchone()[0]
+    con.close()
+    os.replace(tmp, target)
+    return rows
+
+
+def build_snowflake(target=SNOWFLAKE_CUBE):
+    """Construire la table cube et ses niveaux d'agrégation dans Snowflake ; renvoie ses lignes"""
+    import snowflake.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    conn = snowflake.connector.connect(
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        warehouse="NYC_TAXI_WH",
+        database="NYC_TAXI_DB",
+        role="NYCTRANSFORM"
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE OR REPLACE TABLE {target} AS {build_sql(SNOWFLAKE_SOURCE)} ORDER BY 1, 2, 3")
+    cursor.execute(f"SELECT COUNT(*) FROM {target}")
+    rows = cursor.fetchone()[0]
+    for suffix, dimensions in ROLLUPS.items():
+        cursor.execute(f"CREATE OR REPLACE TABLE {target}_{suffix} AS {rollup_sql(target, dimensions)}")
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction du cube d'agrégats des dashboards")
+    parser.add_argument("--backend", choices=["duckdb", "snowflake"], default="duckdb")
+    args = parser.parse_args()
+
+    logger.info(f"🧊 Construction du cube d'agrégats ({args.backend})...")
+    if args.backend == "duckdb":
+        rows, target = build_local(), LOCAL_CUBE
+    else:
+        rows, target = build_snowflake(), SNOWFLAKE_CUBE
+    logger.success(f"✅ Cube {target} construit: {rows:,} lignes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Figures Plotly des dashboards
+Chaque graphique est construit en une seule trace à partir de colonnes
+entières (couleurs, textes et survols vectorisés), sans boucle sur les lignes
+ni copie du DataFrame. Les fonctions ne dépendent que de leurs arguments : les
+dashboards les mettent en cache par (graphique, version des données,
+paramètres) et resservent la même figure aux interactions suivantes.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dashboard import rollup
+
+METRIC_LABELS = {
+    "TOTAL_TRIPS":   "Nombre de courses",
+    "TOTAL_REVENUE": "Revenus ($)",
+    "AVG_FARE":      "Tarif moyen ($)",
+    "AVG_TIP_PCT":   "Pourboire moyen (%)",
+    "AVG_DISTANCE":  "Distance moyenne (mi)",
+}
+
+# Fenêtres de l'évolution quotidienne (mois affichés, 0 = tout)
+PERIODS = {"1M": 1, "3M": 3, "6M": 6, "1A": 12, "Tout": 0}
+
+DAY_FR = ["Lun.", "Mar.", "Mer.", "Jeu.", "Ven.", "Sam.", "Dim."]
+
+# ---------------------------------------------------------------------------
+# Palette jour/nuit : 5 ancres  bleu nuit → bleu moyen → bleu ciel → bleu moyen → bleu nuit
+#   nuit  = #1E3A8A  (h0, h23)
+#   moyen = #3B82F6  (h6, h18)
+#   ciel  = #7DD3FC  (h12)
+# ---------------------------------------------------------------------------
+HOUR_COLORS = np.array([
+    "#1E3A8A",  # 0h  — nuit
+    "#23469C",  # 1h
+    "#2852AE",  # 2h
+    "#2D5EC0",  # 3h
+    "#316AD2",  # 4h
+    "#3676E4",  # 5h
+    "#3B82F6",  # 6h  — moyen
+    "#468FF7",  # 7h
+    "#519DF8",  # 8h
+    "#5CAAF9",  # 9h
+    "#67B8FA",  # 10h
+    "#72C6FB",  # 11h
+    "#7DD3FC",  # 12h — ciel
+    "#72C6FB",  # 13h
+    "#67B8FA",  # 14h
+    "#5CAAF9",  # 15h
+    "#519DF8",  # 16h
+    "#468FF7",  # 17h
+    "#3B82F6",  # 18h — moyen
+    "#3574E0",  # 19h
+    "#2F65CB",  # 20h
+    "#2957B5",  # 21h
+    "#2448A0",  # 22h
+    "#1E3A8A",  # 23h — nuit
+])
+
+
+def weekly_profile(daily, metric):
+    """Profil hebdomadaire : barres au-dessus / en dessous de la moyenne"""
+    label = METRIC_LABELS[metric]
+    # Totaux : moyenne par jour ; moyennes : pondérées par les courses
+    weekly = rollup.per_row(rollup.rollup(daily, daily["PICKUP_DATE"].dt.dayofweek)).reindex(range(7))
+    values = weekly[metric]
+    mean_val = rollup.per_row(rollup.totals(daily))[metric]
+
+    fig = go.Figure(go.Bar(
+        x=DAY_FR,
+        y=values,
+        marker_color=np.where(values >= mean_val, "#2563EB", "#CBD5E1"),
+        text=((values - mean_val) / mean_val * 100).round(1),
+        texttemplate="%{text:+.1f}%",
+        textposition="outside",
+        hovertemplate="<b>%{x}</b><br>" + label + " : %{y:,.0f}<extra></extra>",
+    ))
+    fig.add_hline(
+        y=mean_val,
+        line_dash="dot",
+        line_color="#94A3B8",
+        annotation_text="moy.",
+        annotation_position="right",
+        annotation_font_size=11,
+    )
+    fig.update_layout(
+        title=f"{label} — profil hebdomadaire",
+        template="plotly_white",
+        height=380,
+        showlegend=False,
+        yaxis_range=[values.min() * 0.96, values.max() * 1.08],
+        yaxis_title=label,
+        xaxis_title="",
+    )
+    return fig
+
+
+def hourly_profile(hourly, metric):
+    """Barres par heure, colorées selon la palette jour/nuit"""
+    label = METRIC_LABELS[metric]
+    hours = hourly["PICKUP_HOUR"].to_numpy(dtype=int)
+    values = hourly[metric]
+
+    fig = go.Figure(go.Bar(
+        x=hours,
+        y=values,
+        marker_color=HOUR_COLORS[hours],
+        showlegend=False,
+        hovertemplate="<b>%{x}h</b><br>" + label + " : %{y:,.1f}<extra></extra>",
+    ))
+    for h, icon in [(0, "🌙"), (12, "☀️"), (23, "🌙")]:
+        fig.add_annotation(x=h, y=values.max() * 1.07, text=icon, showarrow=False, font=dict(size=20))
+    fig.update_layout(
+        title=f"{label} par heure",
+        xaxis=dict(title="Heure", tickmode="linear", tick0=0, dtick=1),
+        yaxis_title=label,
+        template="plotly_white",
+        height=380,
+        bargap=0.08,
+    )
+    return fig
+
+
+def evolution_window(daily, period, offset):
+    """Bornes (min, max) de la fenêtre affichée : `offset` fenêtres avant la fin"""
+    date_min, date_max = daily["PICKUP_DATE"].min(), daily["PICKUP_DATE"].max()
+    if period == "Tout":
+        return date_min, date_max
+    months = PERIODS[period]
+    x_max = date_max - pd.DateOffset(months=offset * months)
+    x_min = x_max - pd.DateOffset(months=months)
+    return max(x_min, date_min), min(x_max, date_max)
+
+
+def _extremum_annotation(day, metric, sign, color, ay):
+    return dict(
+        x=day["PICKUP_DATE"], y=day[metric],
+        text=f"{sign} {day['PICKUP_DATE'].strftime('%-d %b %Y')}",
+        showarrow=True, arrowhead=2, arrowcolor=color,
+        font=dict(size=10, color=color),
+        bgcolor="white", bordercolor=color, borderwidth=1, ax=0, ay=ay,
+    )
+
+
+def evolution(daily, metric, period, offset):
+    """Série quotidienne, moyenne glissante 7 jours et extrêmes de la fenêtre affichée
+
+    `daily` doit être trié par date.
+    """
+    label = METRIC_LABELS[metric]
+    x_min, x_max = evolution_window(daily, period, offset)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=daily["PICKUP_DATE"], y=daily[metric],
+        mode="lines", line=dict(color="#10B981", width=1), name="Quotidien",
+        hovertemplate="%{x|%d %b %Y}<br>" + label + " : %{y:,.1f}<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=daily["PICKUP_DATE"], y=rollup.rolling(daily, metric, 7, center=True, min_periods=1),
+        mode="lines", line=dict(color="#2563EB", width=2.5), name="Moy. 7 jours",
+        hovertemplate="%{x|%d %b %Y}<br>Moy. 7j : %{y:,.1f}<extra></extra>",
+    ))
+
+    # Min/max sur la fenêtre visible
+    visible = daily[daily["PICKUP_DATE"].between(x_min, x_max)]
+    if not visible.empty:
+        fig.add_annotation(**_extremum_annotation(visible.loc[visible[metric].idxmax()], metric,
+                                                  "▲", "#059669", -36))
+        fig.add_annotation(**_extremum_annotation(visible.loc[visible[metric].idxmin()], metric,
+                                                  "▼", "#DC2626", 36))
+
+    fig.update_layout(
+        title=f"{label} — évolution quotidienne",
+        template="plotly_white", height=420,
+        yaxis_title=label, xaxis_title="",
+        xaxis=dict(range=[x_min, x_max], autorange=False),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=40, b=10),
+    )
+    return fig
+
+
+def ranking(daily, metric, best):
+    """Les 10 meilleurs (ou pires) jours en barres horizontales"""
+    label = METRIC_LABELS[metric]
+    if best:
+        data = daily.nlargest(10, metric).sort_values(metric)
+        title, color_scale = "10 meilleurs jours", [[0, "#BBF7D0"], [1, "#059669"]]
+    else:
+        data = daily.nsmallest(10, metric).sort_values(metric, ascending=False)
+        title, color_scale = "10 pires jours", [[0, "#FEE2E2"], [1, "#DC2626"]]
+
+    fig = go.Figure(go.Bar(
+        x=data[metric], y=data["PICKUP_DATE"].dt.strftime("%-d %b %Y"), orientation="h",
+        marker=dict(color=data[metric], colorscale=color_scale, showscale=False),
+        hovertemplate="<b>%{y}</b><br>" + label + " : %{x:,.1f}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=title, template="plotly_white", height=420,
+        xaxis_title="", yaxis_title="",
+        margin=dict(l=0, t=36, b=4, r=8),
+        font=dict(size=10),
+    )
+    return fig
+
+
+def zones_treemap(zones, zone_names):
+    """Treemap des zones : surface = courses, couleur = tarif moyen"""
+    names = zones["ZONE_ID"].map(zone_names).fillna(zones["ZONE_ID"].astype(str))
+    fig = px.treemap(
+        zones.assign(zone_name=names),
+        path=[px.Constant("NYC"), "zone_name"],
+        values="TOTAL_TRIPS",
+        color="AVG_FARE",
+        color_continuous_scale=[[0.0, "#DBEAFE"], [0.5, "#3B82F6"], [1.0, "#1E3A8A"]],
+        template="plotly_white",
+    )
+    fig.update_traces(
+        root_color="white",
+        hovertemplate="<b>%{label}</b><br>Courses : %{value:,.0f}<extra></extra>",
+    )
+    fig.update_layout(height=500, margin=dict(t=10, l=0, r=0, b=0))
+    fig.update_coloraxes(colorbar=dict(title="Tarif moy. ($)", thickness=12, len=0.6))
+    return fig
+
+
+def payment_split(profile):
+    """Répartition des modes de paiement"""
+    p = profile.iloc[0]
+    pay_data = pd.DataFrame({
+        "Mode": ["Carte bancaire", "Espèces", "Autre"],
+        "Part (%)": [p["PCT_CARTE"], 100 - p["PCT_CARTE"] - 3, 3],
+    })
+    fig = px.bar(
+        pay_data,
+        x="Part (%)",
+        y="Mode",
+        orientation="h",
+        color="Mode",
+        color_discrete_sequence=["#2563EB", "#059669", "#94A3B8"],
+        template="plotly_white",
+        title="Répartition des modes de paiement",
+        text="Part (%)",
+    )
+    fig.update_traces(texttemplate="%{text:.0f}%", textposition="inside")
+    fig.update_layout(
+        height=180, showlegend=False,
+        xaxis=dict(range=[0, 100], title=""),
+        yaxis_title="",
+        margin=dict(l=0, t=40, b=10),
+    )
+    return fig
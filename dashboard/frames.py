@@ -0,0 +1,53 @@
+"""
+Résultats de requêtes en DataFrames via Arrow
+Construire un DataFrame avec fetchall() passe par un tuple Python par ligne :
+lent, et la mémoire est doublée le temps de la conversion. Les deux moteurs
+savent rendre leurs résultats en colonnes Arrow, que pandas reprend par blocs
+(self_destruct libère chaque colonne Arrow dès qu'elle est convertie).
+
+Types compacts : les décimaux (sommes HUGEINT de DuckDB, NUMBER de Snowflake)
+deviennent int64 s'ils sont entiers et float64 sinon, au lieu d'objets
+Decimal ; les dates restent en datetime64. Les entiers avec des valeurs
+manquantes gardent leur largeur (Int32, Int64 nullables, comme fetchdf() de
+DuckDB) au lieu de passer en float64.
+"""
+
+import pandas as pd
+import pyarrow as pa
+
+
+def _compact_type(arrow_type):
+    if pa.types.is_decimal(arrow_type):
+        return pa.int64() if arrow_type.scale == 0 else pa.float64()
+    return arrow_type
+
+
+def _nullable_integer(arrow_type):
+    return f"{'Int' if pa.types.is_signed_integer(arrow_type) else 'UInt'}{arrow_type.bit_width}"
+
+
+def to_pandas(table):
+    """Table Arrow -> DataFrame aux types compacts, colonnes en majuscules"""
+    schema = pa.schema([field.with_type(_compact_type(field.type)) for field in table.schema])
+    if not schema.equals(table.schema):
+        table = table.cast(schema)
+    nullable = {field.name: _nullable_integer(field.type) for field in table.schema
+                if pa.types.is_integer(field.type) and table.column(field.name).null_count}
+    df = table.to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+    if nullable:
+        df = df.astype(nullable)
+    df.columns = [col.upper() for col in df.columns]
+    return df
+
+
+def from_duckdb(result):
+    """Résultat d'un execute() DuckDB (connexion ou curseur)"""
+    return to_pandas(result.to_arrow_table())
+
+
+def from_snowflake(cursor):
+    """Résultat courant d'un curseur Snowflake, lu par lots Arrow"""
+    table = cursor.fetch_arrow_all()
+    if table is None:   # Aucun lot : résultat vide
+        return pd.DataFrame(columns=[d[0].upper() for d in cursor.description])
+    return to_pandas(table)
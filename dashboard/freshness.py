@@ -0,0 +1,111 @@
+"""
+Version des données servies par les dashboards
+Les résultats sont mis en cache par version des données plutôt que pour une
+durée fixe : un jeton qui change dès que les données changent, et seulement
+à ce moment-là.
+  - local     : empreinte (taille, date de modification) de l'entrepôt, du
+                cube, du manifeste et des Parquet ;
+  - Snowflake : SHOW TABLES sur RAW.YELLOW_TAXI_TRIPS et les tables du cube
+                (création, lignes, octets). SHOW passe par les services cloud
+                et non par le warehouse, qui peut donc se suspendre même si
+                un onglet reste ouvert ; une requête sur INFORMATION_SCHEMA
+                le réveillerait à chaque lecture.
+
+VersionTracker garde la version servie : quand une nouvelle version apparaît,
+les caches sont recalculés en arrière-plan et l'ancienne version reste servie
+jusqu'à ce qu'ils soient prêts. Un préchauffage en échec (entrepôt illisible
+ou verrouillé) n'est retenté pour la même version qu'après WARM_RETRY_DELAY
+secondes, et non à chaque rendu.
+"""
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from dashboard import cube, warehouse
+
+SNOWFLAKE_VERSION_TTL = 60   # Secondes entre deux lectures des métadonnées Snowflake
+WARM_RETRY_DELAY = 60        # Secondes avant de retenter le préchauffage d'une version en échec
+
+# Fichiers lus par le dashboard local (les motifs sont relus à chaque appel)
+LOCAL_FILES = [warehouse.WAREHOUSE, cube.LOCAL_CUBE, Path("data/yellow_taxi/manifest.json")]
+LOCAL_GLOBS = [(Path("data/yellow_taxi"), "*.parquet"),
+               (Path("data/yellow_taxi_partitioned"), "*/*/*.parquet")]
+
+# Commandes de métadonnées seules (pas de warehouse) ; colonnes retenues de leur résultat
+SNOWFLAKE_VERSION_SQL = [
+    "SHOW TABLES LIKE 'YELLOW_TAXI_TRIPS' IN SCHEMA NYC_TAXI_DB.RAW",
+    "SHOW TABLES LIKE 'TRIPS_CUBE%' IN SCHEMA NYC_TAXI_DB.FINAL",
+]
+SNOWFLAKE_VERSION_COLUMNS = ["schema_name", "name", "created_on", "rows", "bytes"]
+
+
+def _digest(parts):
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def local_version():
+    """Jeton des données locales : change dès qu'un fichier est ajouté, remplacé ou retiré"""
+    paths = [path for path in LOCAL_FILES if path.exists()]
+    for directory, pattern in LOCAL_GLOBS:
+        paths += sorted(directory.glob(pattern))
+    return _digest(f"{path}:{warehouse.source_fingerprint(path)}" for path in paths)
+
+
+def snowflake_version(conn):
+    """Jeton des données Snowflake : change dès qu'une table lue par le dashboard est
+    recréée ou que son volume (lignes, octets) change"""
+    cursor = conn.cursor()
+    parts = []
+    for sql in SNOWFLAKE_VERSION_SQL:
+        cursor.execute(sql)
+        columns = [d[0].lower() for d in cursor.description]
+        for row in cursor.fetchall():
+            table = dict(zip(columns, row))
+            parts.append(":".join(str(table[col]) for col in SNOWFLAKE_VERSION_COLUMNS))
+    return _digest(sorted(parts))
+
+
+class VersionTracker:
+    """Version servie aux sessions ; une nouvelle version est préparée en arrière-plan
+
+    `warm(version)` remplit les caches de cette version (ex. load_data).
+    """
+
+    def __init__(self, warm, retry_delay=WARM_RETRY_DELAY):
+        self.warm = warm
+        self.retry_delay = retry_delay
+        self.served = None
+        self.warming = None
+        self.failed = {}   # Version en échec -> instant (monotonic) à partir duquel la retenter
+        self._lock = threading.Lock()
+
+    def resolve(self, latest):
+        """Version à servir pour ce rendu"""
+        with self._lock:
+            if self.served is None:   # Premier rendu : rien à servir en attendant
+                self.served = latest
+            elif (latest != self.served and self.warming != latest
+                  and time.monotonic() >= self.failed.get(latest, 0)):
+                self.warming = latest
+                threading.Thread(target=self._warm, args=(latest,), name=f"warm-{latest}", daemon=True).start()
+            return self.served
+
+    def _warm(self, version):
+        logger.info(f"🔄 Nouvelle version des données {version} : préchauffage des caches")
+        try:
+            self.warm(version)
+        except Exception as e:
+            logger.warning(f"⚠️ Préchauffage de {version} échoué, {self.served} reste servie "
+                           f"(nouvel essai dans {self.retry_delay:.0f} s): {e}")
+            with self._lock:
+                self.warming = None
+                self.failed = {version: time.monotonic() + self.retry_delay}
+            return
+        with self._lock:
+            self.served, self.warming = version, None
+            self.failed.pop(version, None)
+        logger.success(f"✅ Version {version} servie")
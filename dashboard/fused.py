@@ -0,0 +1,126 @@
+"""
+Agrégation en une seule passe pour le dashboard local (DuckDB)
+Les quatre sections de load_data() (quotidien, horaire, zones, portrait)
+sortent d'une même requête GROUPING SETS : les Parquet ne sont lus qu'une
+fois au lieu de quatre. La requête renvoie des sommes et des comptes
+additifs à deux grains, (jour, heure, payée) et (zone, payée), que pandas
+re-agrège ensuite par section ; « payée » = TOTAL_AMOUNT > 0, le filtre
+propre aux sections quotidienne et portrait.
+"""
+
+import pandas as pd
+
+# Valeur de GROUPING(pickup_date, pickup_hour, zone_id) pour chaque grain
+_DATE_HOUR, _ZONE = 0b001, 0b110
+
+_TRANCHES = pd.cut(
+    range(24),
+    bins=[-1, 5, 9, 16, 20, 23],
+    labels=["Nuit (0h-6h)", "Matin (6h-10h)", "Journée (10h-17h)",
+            "Soir (17h-21h)", "Soirée (21h-0h)"],
+).astype(str)
+
+# Sommes et comptes des moyennes, conservés dans les sections (dashboard/rollup.py)
+_ADDITIVE = ["SUM_TRIP_DISTANCE", "COUNT_TOTAL_AMOUNT", "SUM_TIP_PCT", "COUNT_TIP_PCT"]
+
+_MEASURES = ["TRIP_COUNT", "SUM_TOTAL_AMOUNT", "COUNT_TOTAL_AMOUNT", "SUM_TRIP_DISTANCE",
+             "SUM_TIP_PCT", "COUNT_TIP_PCT", "TIP_POSITIVE_COUNT", "CARD_COUNT",
+             "JFK_COUNT", "LGA_COUNT", "SUM_PASSENGER_COUNT", "COUNT_PASSENGER_COUNT"]
+
+
+def fused_sql(source, date_filter):
+    """Requête unique : mesures additives aux grains (jour, heure, payée) et (zone, payée)"""
+    return f"""
+        WITH trips AS (
+            SELECT
+                CAST(tpep_pickup_datetime AS DATE)             AS pickup_date,
+                date_part('hour', tpep_pickup_datetime)        AS pickup_hour,
+                PULOCATIONID                                   AS zone_id,
+                COALESCE(TOTAL_AMOUNT > 0, FALSE)              AS is_paid,
+                TRIP_DISTANCE, TOTAL_AMOUNT, TIP_AMOUNT, PAYMENT_TYPE, PASSENGER_COUNT,
+                PULOCATIONID, DOLOCATIONID,
+                TIP_AMOUNT / NULLIF(FARE_AMOUNT, 0) * 100      AS tip_pct
+            FROM {source}
+            WHERE TRIP_DISTANCE > 0
+              {date_filter}
+        )
+        SELECT
+            GROUPING(pickup_date, pickup_hour, zone_id)        AS grouping_id,
+            pickup_date, pickup_hour, zone_id, is_paid,
+            COUNT(*)                                           AS trip_count,
+            SUM(TOTAL_AMOUNT)                                  AS sum_total_amount,
+            COUNT(TOTAL_AMOUNT)                                AS count_total_amount,
+            SUM(TRIP_DISTANCE)                                 AS sum_trip_distance,
+            SUM(tip_pct)                                       AS sum_tip_pct,
+            COUNT(tip_pct)                                     AS count_tip_pct,
+            SUM((TIP_AMOUNT > 0)::INTEGER)                     AS tip_positive_count,
+            SUM((PAYMENT_TYPE = 1)::INTEGER)                   AS card_count,
+            SUM((PULOCATIONID IN (132, 138)
+                 OR DOLOCATIONID IN (132, 138))::INTEGER)      AS jfk_count,
+            SUM((PULOCATIONID = 137 OR DOLOCATIONID = 137)::INTEGER) AS lga_count,
+            SUM(PASSENGER_COUNT)                               AS sum_passenger_count,
+            COUNT(PASSENGER_COUNT)                             AS count_passenger_count
+        FROM trips
+        GROUP BY GROUPING SETS ((pickup_date, pickup_hour, is_paid), (zone_id, is_paid))
+    """
+
+
+def _rollup(df, key):
+    """Additionner les mesures par clé, puis les moyennes = sommes / comptes"""
+    g = df.groupby(key)[_MEASURES].sum().reset_index()
+    g["TOTAL_TRIPS"] = g["TRIP_COUNT"]
+    g["TOTAL_REVENUE"] = g["SUM_TOTAL_AMOUNT"]
+    g["AVG_FARE"] = g["SUM_TOTAL_AMOUNT"] / g["COUNT_TOTAL_AMOUNT"]
+    g["AVG_DISTANCE"] = g["SUM_TRIP_DISTANCE"] / g["TRIP_COUNT"]
+    g["AVG_TIP_PCT"] = g["SUM_TIP_PCT"] / g["COUNT_TIP_PCT"]
+    return g
+
+
+def _integer_key(column):
+    """Clé d'un grain redevenue entière : les NULL des autres grains l'avaient rendue
+    nullable (Int64 / Int32 via dashboard/frames.py ou fetchdf, float64 par défaut)"""
+    return column.astype(getattr(column.dtype, "numpy_dtype", "int64"))
+
+
+def split_sections(df):
+    """Découper le résultat (colonnes en majuscules) en daily, hourly, zones, profile"""
+    section = df["GROUPING_ID"]
+    date_hour = df[section == _DATE_HOUR]
+    paid = date_hour[date_hour["IS_PAID"]]
+
+    daily = _rollup(paid, "PICKUP_DATE")[
+        ["PICKUP_DATE", "TOTAL_TRIPS", "TOTAL_REVENUE", "AVG_DISTANCE", "AVG_FARE", "AVG_TIP_PCT"]
+        + _ADDITIVE]
+
+    hourly = _rollup(date_hour, "PICKUP_HOUR")[
+        ["PICKUP_HOUR", "TOTAL_TRIPS", "TOTAL_REVENUE", "AVG_FARE", "AVG_TIP_PCT", "AVG_DISTANCE"]
+        + _ADDITIVE]
+    hourly["PICKUP_HOUR"] = _integer_key(hourly["PICKUP_HOUR"])
+    hourly.insert(6, "TRANCHE", _TRANCHES[hourly["PICKUP_HOUR"]])
+
+    zones = _rollup(df[section == _ZONE], "ZONE_ID")[
+        ["ZONE_ID", "TOTAL_TRIPS", "TOTAL_REVENUE", "AVG_FARE", "AVG_DISTANCE", "AVG_TIP_PCT"]
+        + _ADDITIVE]
+    zones = zones.nlargest(100, "TOTAL_TRIPS").reset_index(drop=True)
+    zones["ZONE_ID"] = _integer_key(zones["ZONE_ID"])
+
+    p = paid[_MEASURES].sum()
+    n = int(p["TRIP_COUNT"])
+    profile = pd.DataFrame([{
+        "TOTAL_TRIPS":        n,
+        "AVG_DISTANCE":       p["SUM_TRIP_DISTANCE"] / n,
+        "AVG_FARE":           p["SUM_TOTAL_AMOUNT"] / p["COUNT_TOTAL_AMOUNT"],
+        "AVG_TIP_PCT":        p["SUM_TIP_PCT"] / p["COUNT_TIP_PCT"],
+        "PCT_AVEC_POURBOIRE": p["TIP_POSITIVE_COUNT"] * 100.0 / n,
+        "PCT_CARTE":          p["CARD_COUNT"] * 100.0 / n,
+        "PCT_AEROPORT_JFK":   p["JFK_COUNT"] * 100.0 / n,
+        "PCT_AEROPORT_LGA":   p["LGA_COUNT"] * 100.0 / n,
+        "AVG_PASSAGERS":      p["SUM_PASSENGER_COUNT"] / p["COUNT_PASSENGER_COUNT"],
+    }])
+
+    return daily, hourly, zones, profile
+
+
+def load_sections(query, source, date_filter):
+    """Les quatre DataFrames de load_data() en un seul parcours des trajets"""
+    return split_sections(query(fused_sql(source, date_filter)))
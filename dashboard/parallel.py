@@ -0,0 +1,115 @@
+"""
+Exécution concurrente des requêtes de load_data()
+Les sections du dashboard sont indépendantes : au lieu de les enchaîner, on
+les soumet toutes d'un coup et on récupère chaque résultat dès qu'il arrive.
+Le chargement à froid coûte alors la requête la plus lente, pas la somme.
+
+Un « runner » prend {nom: SQL} et renvoie {nom: DataFrame ou exception} :
+  - DuckDB    : un pool de threads, un curseur par requête prêté par le
+                pool de connexions (dashboard/pool.py) ;
+  - Snowflake : execute_async pour tout soumettre, puis interrogation de
+                l'état des requêtes et lecture des résultats terminés.
+Les exceptions sont renvoyées et non levées, pour que dashboard/routing.py
+puisse se rabattre sur une autre table section par section. Les requêtes en
+cours sont inscrites auprès de dashboard/cancellation.py, qui les annule si le
+rendu qui les a lancées est remplacé.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from loguru import logger
+
+from dashboard import cancellation, frames, profiling
+
+POLL_INTERVAL = 0.05   # Secondes entre deux interrogations d'état Snowflake
+
+
+def gather(outcomes, names):
+    """Résultats dans l'ordre de `names` ; lève la première erreur rencontrée"""
+    for name in names:
+        if isinstance(outcomes[name], Exception):
+            raise outcomes[name]
+    return tuple(outcomes[name] for name in names)
+
+
+def duckdb_runner(db, heavy=False, max_workers=4):
+    """Runner DuckDB : un thread par requête, un curseur emprunté au pool `db`
+
+    `heavy` : requêtes soumises à l'admission des requêtes lourdes du pool.
+    """
+    def fetch(name, sql):
+        with (db.cursor(heavy=heavy) as cursor,
+              cancellation.track(name, cursor.interrupt),
+              profiling.span("query", name)):
+            return frames.from_duckdb(cursor.execute(sql))
+
+    def run_all(queries):
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+            # Chaque thread reprend le contexte de l'appelant (rendu profilé en cours)
+            futures = {pool.submit(contextvars.copy_context().run, fetch, name, sql): name
+                       for name, sql in queries.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    outcomes[name] = future.result()
+                except Exception as e:
+                    outcomes[name] = e
+        return outcomes
+
+    return run_all
+
+
+def snowflake_canceller(conn, sfqid):
+    """Annulation d'une requête Snowflake : abort_query, SYSTEM$CANCEL_QUERY à défaut"""
+    def cancel():
+        cursor = conn.cursor()
+        if not cursor.abort_query(sfqid):
+            cursor.execute("SELECT SYSTEM$CANCEL_QUERY(%s)", (sfqid,))
+    return cancel
+
+
+def snowflake_runner(conn, fetch, poll_interval=POLL_INTERVAL):
+    """Runner Snowflake : execute_async puis lecture des requêtes au fil de leur fin
+
+    `fetch` transforme un curseur positionné sur un résultat en DataFrame.
+    """
+    def run_all(queries):
+        outcomes, pending, tracked = {}, {}, {}
+        submitted = time.perf_counter()
+        for name, sql in queries.items():
+            cursor = conn.cursor()
+            try:
+                cursor.execute_async(sql)
+                tracked[cursor.sfqid] = cancellation.register(name, snowflake_canceller(conn, cursor.sfqid))
+            except Exception as e:
+                outcomes[name] = e
+                continue
+            pending[cursor.sfqid] = name
+
+        while pending:
+            for sfqid, name in list(pending.items()):
+                query = tracked[sfqid]
+                try:
+                    status = conn.get_query_status_throw_if_error(sfqid)
+                    if conn.is_still_running(status):
+                        continue
+                    cursor = conn.cursor()
+                    cursor.get_results_from_sfqid(sfqid)
+                    outcomes[name] = fetch(cursor)
+                except Exception as e:
+                    # Annulée ici : ni table absente pour le routage, ni résultat à garder
+                    if query is not None and query.cancelled:
+                        e = cancellation.QueryCancelled(f"{name} annulée ({sfqid})")
+                    outcomes[name] = e
+                cancellation.release(query)
+                del pending[sfqid]
+                profiling.record("query", name, time.perf_counter() - submitted, sfqid=sfqid)
+                logger.debug(f"⏱️ {name} terminé ({sfqid})")
+            if pending:
+                time.sleep(poll_interval)
+        return outcomes
+
+    return run_all
@@ -0,0 +1,134 @@
+"""
+Pool de connexions DuckDB partagé par les sessions du dashboard local
+Une connexion DuckDB ne doit pas servir à deux threads à la fois, et une
+connexion unique pour toutes les sessions sérialise leurs requêtes. Le pool
+ouvre la base une fois (entrepôt en lecture seule ou base en mémoire) et prête
+des curseurs, qui sont des connexions filles sur la même base : au plus
+POOL_SIZE à la fois, réutilisés d'une requête à l'autre. Une requête de plus
+attend qu'un curseur se libère au lieu d'en ouvrir un nouveau.
+
+Les requêtes lourdes (passe sur les trajets) passent aussi par une file
+d'admission qui en laisse tourner au plus MAX_HEAVY en même temps. Dans
+DuckDB, threads et memory_limit se règlent pour toute la base et non par
+connexion. La base reçoit donc QUERY_THREADS × MAX_HEAVY threads et
+QUERY_MEMORY_MB × MAX_HEAVY Mo : chaque requête lourde admise a sa part.
+
+close() attend les curseurs prêtés puis ferme curseurs et base : DuckDB garde
+une instance par chemin tant qu'une connexion y reste ouverte, et un pool
+ouvert ensuite sur le même chemin (entrepôt remplacé par os.replace) verrait
+sinon l'ancien fichier.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import duckdb
+from loguru import logger
+
+from dashboard import profiling
+
+POOL_SIZE = int(os.getenv("NYC_TAXI_DUCKDB_POOL_SIZE", "8"))
+MAX_HEAVY = int(os.getenv("NYC_TAXI_DUCKDB_MAX_HEAVY", "2"))
+QUERY_THREADS = int(os.getenv("NYC_TAXI_DUCKDB_QUERY_THREADS", str(max(1, (os.cpu_count() or 1) // MAX_HEAVY))))
+QUERY_MEMORY_MB = int(os.getenv("NYC_TAXI_DUCKDB_QUERY_MEMORY_MB", "2048"))
+ACQUIRE_TIMEOUT = 120   # Secondes d'attente maximale d'un curseur ou d'une admission
+
+
+class ConnectionPool:
+    """Curseurs DuckDB bornés sur une base partagée, avec admission des requêtes lourdes"""
+
+    def __init__(self, database=None, size=POOL_SIZE, max_heavy=MAX_HEAVY,
+                 query_threads=QUERY_THREADS, query_memory_mb=QUERY_MEMORY_MB,
+                 timeout=ACQUIRE_TIMEOUT):
+        config = {"threads": query_threads * max_heavy,
+                  "memory_limit": f"{query_memory_mb * max_heavy}MB"}
+        if database is None:
+            self.root = duckdb.connect(config=config)
+        else:
+            self.root = duckdb.connect(str(database), read_only=True, config=config)
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.closed = False
+        self._idle = queue.LifoQueue()   # Curseurs déjà ouverts, le plus récent d'abord
+        self._slots = threading.BoundedSemaphore(size)
+        self._heavy = threading.BoundedSemaphore(max_heavy)
+        logger.info(f"🦆 Pool DuckDB {database or ':memory:'} : {size} curseurs, "
+                    f"{max_heavy} requêtes lourdes × {query_threads} threads / {query_memory_mb} Mo")
+
+    def _acquire(self, semaphore, what):
+        with profiling.span("pool", f"attente {what}"):
+            if not semaphore.acquire(timeout=self.timeout):
+                raise TimeoutError(f"Pool DuckDB saturé : pas de {what} libre après {self.timeout}s")
+
+    def _check_open(self):
+        if self.closed:
+            raise RuntimeError(f"Pool DuckDB {self.database or ':memory:'} fermé")
+
+    @contextmanager
+    def cursor(self, heavy=False):
+        """Curseur prêté le temps d'une requête ; attend son tour si le pool est plein"""
+        self._check_open()
+        if heavy:
+            self._acquire(self._heavy, "admission")
+        try:
+            self._acquire(self._slots, "curseur")
+            try:
+                self._check_open()   # Fermé pendant l'attente
+                try:
+                    cursor = self._idle.get_nowait()
+                except queue.Empty:
+                    cursor = self.root.cursor()
+                try:
+                    yield cursor
+                finally:
+                    if self.closed:   # Rendu après un close() qui ne l'a pas attendu
+                        cursor.close()
+                    else:
+                        self._idle.put(cursor)
+            finally:
+                self._slots.release()
+        finally:
+            if heavy:
+                self._heavy.release()
+
+    def close(self, timeout=None):
+        """Attendre les requêtes en cours (au plus `timeout` s), puis fermer curseurs et base"""
+        if self.closed:
+            return
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        held = 0   # Curseurs libres réservés : plus aucun prêt possible
+        while held < self.size and self._slots.acquire(timeout=max(0, deadline - time.monotonic())):
+            held += 1
+        if held < self.size:
+            logger.warning(f"⚠️ Pool DuckDB {self.database or ':memory:'} fermé avec "
+                           f"{self.size - held} requête(s) en cours")
+        self.closed = True
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self.root.close()
+        for _ in range(held):   # Les requêtes en attente échouent au lieu d'attendre le délai
+            self._slots.release()
+        logger.info(f"🦆 Pool DuckDB {self.database or ':memory:'} fermé")
+
+
+class VersionedPool:
+    """Pool de la dernière version des données : l'ancien est fermé avant d'ouvrir le suivant"""
+
+    def __init__(self, open_pool):
+        self._open = open_pool
+        self._lock = threading.Lock()
+        self.version = None
+        self.pool = None
+
+    def get(self, version):
+        with self._lock:
+            if version != self.version:
+                if self.pool is not None:
+                    self.pool.close()
+                self.pool = self._open()
+                self.version = version
+            return self.pool
@@ -0,0 +1,176 @@
+"""
+Instrumentation des rendus du dashboard (mode opt-in)
+Activée par NYC_TAXI_PROFILE=1 ou le paramètre d'URL ?profile=1. Chaque rendu
+(page complète ou fragment) relève la durée de ses étapes :
+  - query     : requêtes SQL (par section) ;
+  - cache     : succès / échecs des caches (load_data, figures, cache disque) ;
+  - transform : post-traitements pandas ;
+  - figure    : construction des figures, plotly_chart : leur envoi au navigateur ;
+ainsi que le pic mémoire Python. tracemalloc ne tourne que tant qu'un rendu
+profilé est en cours. Son pic vaut pour tout le processus : quand plusieurs
+rendus profilés se chevauchent, leur pic est commun et marqué `peak_shared`.
+Le détail est affiché dans le dashboard et ajouté à PROFILE_LOG (une ligne
+JSON par rendu) ; `python -m dashboard.profiling` en tire les p50 / p99.
+
+Hors mode instrumentation, span() et mark() ne font rien.
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+PROFILE_LOG = Path(os.getenv("NYC_TAXI_PROFILE_LOG", "data/profiling.jsonl"))
+
+_current = contextvars.ContextVar("rerun_profile", default=None)
+
+_tracing = set()          # Rendus profilés en cours : tracemalloc tourne tant qu'il y en a
+_tracing_lock = threading.Lock()
+_tracing_started = False  # tracemalloc démarré ici (et non par l'appelant) : à arrêter ici
+
+
+def env_enabled():
+    return os.getenv("NYC_TAXI_PROFILE") == "1"
+
+
+class RerunProfile:
+    """Étapes relevées pendant un rendu (les threads de requêtes y écrivent aussi)"""
+
+    def __init__(self, app, scope):
+        self.app = app
+        self.scope = scope
+        self.spans = []
+        self.peak_shared = False   # Un autre rendu profilé a tourné en même temps
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, kind, name, seconds, **extra):
+        with self._lock:
+            self.spans.append({"kind": kind, "name": name, "seconds": round(seconds, 6), **extra})
+
+    def summary(self):
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "app": self.app,
+            "scope": self.scope,
+            "total_s": round(time.perf_counter() - self.started, 6),
+            "peak_mb": round(peak / 1024 / 1024, 1),
+            "peak_shared": self.peak_shared,
+            "spans": self.spans,
+        }
+
+
+def active():
+    return _current.get() is not None
+
+
+def start(app, scope):
+    """Démarrer le relevé d'un rendu dans le contexte courant"""
+    global _tracing_started
+    profile = RerunProfile(app, scope)
+    with _tracing_lock:
+        if not _tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracing_started = True
+            tracemalloc.reset_peak()
+        else:   # Pic commun : ne pas le remettre à zéro sous les rendus en cours
+            profile.peak_shared = True
+            for other in _tracing:
+                other.peak_shared = True
+        _tracing.add(profile)
+    _current.set(profile)
+    return profile
+
+
+def finish(profile, log_path=PROFILE_LOG):
+    """Clore le relevé, l'ajouter au journal JSONL et le renvoyer"""
+    global _tracing_started
+    _current.set(None)
+    with _tracing_lock:
+        record = profile.summary()
+        _tracing.discard(profile)
+        if not _tracing and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+    try:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "a") as log:
+            log.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        logger.warning(f"⚠️ Journal de profilage {log_path} non écrit: {e}")
+    return record
+
+
+def record(kind, name, seconds, **extra):
+    """Ajouter une étape déjà mesurée au rendu en cours"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(kind, name, seconds, **extra)
+
+
+def mark(kind, name, **extra):
+    """Événement ponctuel (ex. échec de cache)"""
+    record(kind, name, 0.0, **extra)
+
+
+@contextmanager
+def span(kind, name, **extra):
+    """Mesurer la durée du bloc dans le rendu en cours"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(kind, name, time.perf_counter() - started, **extra)
+
+
+def spans_frame(record):
+    """Étapes d'un rendu en DataFrame, pour l'affichage"""
+    return pd.DataFrame(record["spans"], columns=["kind", "name", "seconds"])
+
+
+def percentiles(log_path=PROFILE_LOG):
+    """p50 / p99 des rendus (par portée) et des étapes (par type et nom) du journal ;
+    le pic mémoire ne compte que les rendus qui n'en partageaient pas"""
+    records = [json.loads(line) for line in open(log_path) if line.strip()]
+    reruns = pd.DataFrame(records, columns=["app", "scope", "total_s", "peak_mb", "peak_shared"])
+    alone = reruns[reruns["peak_shared"].ne(True)]   # Pic propre au rendu seulement
+    spans = pd.DataFrame([{"app": r["app"], **s} for r in records for s in r["spans"]],
+                         columns=["app", "kind", "name", "seconds"])
+    quantiles = {"n": "count", "p50": lambda s: s.quantile(0.5), "p99": lambda s: s.quantile(0.99)}
+    return (reruns.groupby(["app", "scope"])["total_s"].agg(**quantiles),
+            alone.groupby(["app", "scope"])["peak_mb"].agg(**quantiles),
+            spans.groupby(["app", "kind", "name"])["seconds"].agg(**quantiles))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p50 / p99 du journal de profilage des dashboards")
+    parser.add_argument("--log", type=Path, default=PROFILE_LOG, help="Journal JSONL à analyser")
+    args = parser.parse_args()
+
+    if not args.log.exists():
+        logger.error(f"❌ Aucun journal {args.log} - lancer le dashboard avec NYC_TAXI_PROFILE=1")
+        return
+    totals, memory, steps = percentiles(args.log)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print("⏱️ Durée des rendus (s)\n", totals, "\n")
+        print("🧠 Pic mémoire (Mo)\n", memory, "\n")
+        print("🔎 Étapes (s)\n", steps)
+
+
+if __name__ == "__main__":
+    main()
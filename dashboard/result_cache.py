@@ -0,0 +1,136 @@
+"""
+Cache de résultats sur disque, partagé par les réplicas du dashboard
+st.cache_data ne vit que dans un processus : derrière un répartiteur de
+charge, chaque réplica refait les mêmes agrégations. Ici chaque résultat est
+écrit une fois en fichier Arrow IPC sous RESULT_CACHE_DIR/<version>/<clé>.arrow
+(clé = SQL normalisé ; version = dashboard/freshness.py), puis relu par
+memory-mapping par tous les processus. Les colonnes numériques et dates sans
+valeur manquante sont reprises par pandas sans copie, directement sur les pages
+du fichier (tableaux en lecture seule) ; les textes et les colonnes avec des
+valeurs manquantes sont copiés.
+
+Un verrou fcntl par entrée garantit qu'un seul réplica calcule un résultat
+manquant : les autres attendent le verrou puis lisent le fichier écrit. Seules
+les MAX_VERSIONS versions les plus récentes sont gardées sur disque.
+"""
+
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+from contextlib import ExitStack
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from dashboard import profiling
+
+RESULT_CACHE_DIR = Path(os.getenv("NYC_TAXI_RESULT_CACHE", "data/result_cache"))
+MAX_VERSIONS = 3
+
+
+# Littéral entre apostrophes ou identifiant entre guillemets (doublement = échappement)
+_QUOTED = r"'(?:[^']|'')*'" + r'|"(?:[^"]|"")*"'
+
+
+def normalize(sql):
+    """SQL sans différences d'espacement hors des littéraux, gardés tels quels"""
+    return re.sub(rf"({_QUOTED})|\s+", lambda m: m.group(1) or " ", sql).strip()
+
+
+class ResultCache:
+    """Résultats d'une version des données, partagés entre processus"""
+
+    def __init__(self, version, root=RESULT_CACHE_DIR):
+        self.root = Path(root)
+        self.directory = self.root / version
+
+    def _path(self, sql):
+        return self.directory / f"{hashlib.sha256(normalize(sql).encode()).hexdigest()[:32]}.arrow"
+
+    def _ensure_directory(self):
+        if not self.directory.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.prune()   # Nouvelle version : on fait de la place
+
+    def read(self, sql):
+        """DataFrame en cache, ou None ; le fichier est lu par memory-mapping"""
+        path = self._path(sql)
+        with profiling.span("cache", "disque", entry=path.stem[:8]):
+            try:
+                table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+            except FileNotFoundError:
+                profiling.mark("cache", "disque (absent)", entry=path.stem[:8])
+                return None
+            # Un bloc par colonne : pas de consolidation, donc pas de copie des colonnes
+            # numériques sans valeur manquante, qui restent sur les pages du fichier
+            return table.to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+
+    def write(self, sql, df):
+        path = self._path(sql)
+        self._ensure_directory()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+
+    def lock(self, sql):
+        """Verrou exclusif inter-processus sur une entrée (libéré à la fermeture)"""
+        self._ensure_directory()
+        handle = open(self._path(sql).with_suffix(".lock"), "w")
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def prune(self):
+        """Supprimer les versions au-delà des MAX_VERSIONS plus récentes"""
+        versions = sorted((d for d in self.root.iterdir() if d.is_dir()),
+                          key=lambda d: d.stat().st_mtime, reverse=True)
+        for stale in versions[MAX_VERSIONS:]:
+            shutil.rmtree(stale, ignore_errors=True)
+            logger.info(f"🧹 Cache de résultats {stale.name} supprimé")
+
+    def get(self, sql, compute):
+        """Résultat de `sql`, calculé par `compute()` par un seul processus s'il manque"""
+        df = self.read(sql)
+        if df is not None:
+            return df
+        with self.lock(sql):
+            df = self.read(sql)   # Calculé par un autre réplica pendant l'attente
+            if df is None:
+                df = compute()
+                self.write(sql, df)
+        return df
+
+    def wrap(self, run_all):
+        """Runner de dashboard/parallel.py servi par le cache ; seuls les manquants sont lancés"""
+        def cached_run_all(queries):
+            outcomes = {}
+            for name, sql in queries.items():
+                df = self.read(sql)
+                if df is not None:
+                    outcomes[name] = df
+            missing = {name: sql for name, sql in queries.items() if name not in outcomes}
+            if not missing:
+                return outcomes
+
+            # Verrous pris dans l'ordre des fichiers : pas d'interblocage entre réplicas
+            with ExitStack() as stack:
+                for sql in sorted(set(missing.values()), key=lambda sql: self._path(sql).name):
+                    stack.enter_context(self.lock(sql))
+                for name, sql in list(missing.items()):
+                    df = self.read(sql)
+                    if df is not None:
+                        outcomes[name] = df
+                        del missing[name]
+                computed = run_all(missing) if missing else {}
+                for name, outcome in computed.items():
+                    if isinstance(outcome, pd.DataFrame):
+                        self.write(missing[name], outcome)
+                    outcomes[name] = outcome
+            return outcomes
+
+        return cached_run_all
@@ -0,0 +1,59 @@
+"""
+Re-agrégation exacte des sections de load_data() en mémoire
+Une moyenne de moyennes journalières est fausse dès que les jours n'ont pas
+le même nombre de courses. Les sections quotidienne, horaire et zones portent
+donc, à côté de chaque moyenne, sa somme et son compte : ce module additionne
+ces colonnes sur n'importe quel regroupement (période, jour de semaine,
+fenêtre glissante) et en déduit les moyennes pondérées.
+"""
+
+import pandas as pd
+
+# Moyenne -> (somme, compte) dont elle se déduit
+AVERAGES = {
+    "AVG_DISTANCE": ("SUM_TRIP_DISTANCE", "TOTAL_TRIPS"),
+    "AVG_FARE":     ("TOTAL_REVENUE", "COUNT_TOTAL_AMOUNT"),
+    "AVG_TIP_PCT":  ("SUM_TIP_PCT", "COUNT_TIP_PCT"),
+}
+ADDITIVE = ["TOTAL_TRIPS", "TOTAL_REVENUE", "SUM_TRIP_DISTANCE",
+            "COUNT_TOTAL_AMOUNT", "SUM_TIP_PCT", "COUNT_TIP_PCT"]
+N_ROWS = "N_ROWS"   # Nombre de lignes fusionnées (jours pour la section quotidienne)
+
+
+def _with_averages(df):
+    for avg, (total, count) in AVERAGES.items():
+        df[avg] = df[total] / df[count].where(df[count] != 0)
+    return df
+
+
+def rollup(df, by):
+    """Fusionner les lignes par `by` : sommes additionnées, moyennes recalculées"""
+    grouped = df.groupby(by)
+    result = grouped[ADDITIVE].sum()
+    result[N_ROWS] = grouped.size()
+    return _with_averages(result)
+
+
+def totals(df):
+    """Toutes les lignes fusionnées en une seule (Series)"""
+    result = df[ADDITIVE].sum().to_frame().T
+    result[N_ROWS] = len(df)
+    return _with_averages(result).iloc[0]
+
+
+def per_row(rolled):
+    """Totaux ramenés à une ligne moyenne (ex. courses par jour) ; moyennes inchangées"""
+    result = rolled.copy()
+    if isinstance(result, pd.Series):
+        result[ADDITIVE] = result[ADDITIVE] / result[N_ROWS]
+    else:
+        result[ADDITIVE] = result[ADDITIVE].div(result[N_ROWS], axis=0)
+    return result
+
+
+def rolling(df, metric, window, **kwargs):
+    """Moyenne glissante de `metric` : pondérée pour les moyennes, simple pour les totaux"""
+    if metric in AVERAGES:
+        total, count = AVERAGES[metric]
+        return df[total].rolling(window, **kwargs).sum() / df[count].rolling(window, **kwargs).sum()
+    return df[metric].rolling(window, **kwargs).mean()
@@ -0,0 +1,75 @@
+"""
+Routage des requêtes du dashboard Snowflake vers la plus petite table suffisante
+Chaque section de load_data() ne lit que quelques dimensions du cube
+(cube.SECTION_DIMENSIONS). Les niveaux d'agrégation FINAL.TRIPS_CUBE_<NIVEAU>
+(cube.ROLLUPS) portent les mêmes mesures sur moins de dimensions : une section
+est servie par le plus petit niveau qui contient toutes ses dimensions, puis
+par le cube complet, et ne retombe sur RAW que si aucune de ces tables n'existe.
+
+Les marts dbt (daily_summary, hourly_patterns, zone_analysis) ne sont pas
+candidats : ils héritent des filtres de nettoyage de stg_yellow_taxi_trips
+(distance, durée, vitesse...) et ne donnent pas les mêmes chiffres que RAW.
+"""
+
+from dataclasses import dataclass
+
+from loguru import logger
+
+from dashboard import cube
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    table: str
+    dimensions: frozenset
+
+
+# Du plus petit au plus gros : le premier niveau qui couvre une section la sert
+SNOWFLAKE_AGGREGATES = (
+    *(Aggregate(f"{cube.SNOWFLAKE_CUBE}_{suffix}", frozenset(dimensions))
+      for suffix, dimensions in cube.ROLLUPS.items()),
+    Aggregate(cube.SNOWFLAKE_CUBE, frozenset(cube.DIMENSIONS)),
+)
+
+
+def candidates(section, aggregates=SNOWFLAKE_AGGREGATES):
+    """Tables capables de répondre à une section, de la plus petite à la plus grosse"""
+    needed = cube.SECTION_DIMENSIONS[section]
+    return [agg for agg in aggregates if needed <= agg.dimensions]
+
+
+def load_sections(run_all, fallback_sql, missing, aggregates=SNOWFLAKE_AGGREGATES):
+    """Les quatre DataFrames de load_data(), chacun lu dans la plus petite table suffisante
+
+    `run_all` exécute un lot {section: SQL} en parallèle (dashboard/parallel.py) ;
+    `fallback_sql` donne la requête RAW de chaque section et `missing` l'exception
+    levée sur une table absente. Une section dont la table manque est relancée
+    au tour suivant sur le candidat d'après.
+    """
+    absent = set()
+    results = {}
+    pending = {name: candidates(name, aggregates) for name in cube.SECTIONS}
+    while pending:
+        batch = {}
+        for name, options in pending.items():
+            options = pending[name] = [agg for agg in options if agg.table not in absent]
+            if options:
+                batch[name] = (options[0].table, cube.section_sql(options[0].table)[name])
+            else:
+                batch[name] = (cube.SNOWFLAKE_SOURCE, fallback_sql[name])
+
+        outcomes = run_all({name: sql for name, (_, sql) in batch.items()})
+        for name, (table, _) in batch.items():
+            outcome = outcomes[name]
+            if isinstance(outcome, missing) and table != cube.SNOWFLAKE_SOURCE:
+                absent.add(table)
+                continue
+            if isinstance(outcome, Exception):
+                raise outcome
+            if table == cube.SNOWFLAKE_SOURCE:
+                logger.warning(f"⚠️ {name} ← {table} (aucun agrégat disponible)")
+            else:
+                logger.info(f"🧭 {name} ← {table}")
+            results[name] = outcome
+            del pending[name]
+    return tuple(results[name] for name in cube.SECTIONS)
@@ -0,0 +1,479 @@
+"""
+Interface Streamlit commune aux deux dashboards
+streamlit_dashboard.py (Snowflake) et streamlit_dashboard_local.py (DuckDB) ne
+gardent que leur source de données : connexion, load_data(version) et version
+servie, réunies dans une Source. Tout le reste est ici : nettoyage des
+sections, figures en cache, fragments, instrumentation et mise en page.
+
+Seul module du paquet qui importe Streamlit : les autres restent utilisables
+depuis les scripts et les benchmarks.
+"""
+
+import contextlib
+import functools
+from dataclasses import dataclass
+from typing import Callable
+
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from dashboard import cancellation, figures, profiling, rollup
+
+
+@dataclass(frozen=True)
+class Source:
+    """Ce qui distingue les deux dashboards"""
+    app: str                        # Nom dans le journal de profilage
+    load_data: Callable             # version -> (daily, hourly, zones, profile)
+    served_version: Callable        # () -> version des données servie à ce rendu
+
+
+# ---------------------------------------------------------------------------
+# Lookup officiel TLC : location_id -> nom de quartier
+# ---------------------------------------------------------------------------
+ZONE_LOOKUP = {
+    1: "Newark Airport", 2: "Jamaica Bay", 3: "Allerton/Pelham Gardens",
+    4: "Alphabet City", 5: "Arden Heights", 6: "Arrochar/Fort Wadsworth",
+    7: "Astoria", 8: "Astoria Park", 9: "Auburndale", 10: "Baisley Park",
+    11: "Bath Beach", 12: "Battery Park", 13: "Battery Park City",
+    14: "Bay Ridge", 15: "Bay Terrace/Fort Totten", 16: "Bayside",
+    17: "Bedford", 18: "Bedford Park", 19: "Bellerose", 20: "Belmont",
+    21: "Bensonhurst East", 22: "Bensonhurst West",
+    23: "Bloomfield/Emerson Hill", 24: "Bloomingdale", 25: "Boerum Hill",
+    26: "Borough Park", 27: "Breezy Point/Riis Beach", 28: "Briarwood",
+    29: "Brighton Beach", 30: "Broad Channel", 31: "Bronx Park",
+    32: "Bronxdale", 33: "Brooklyn Heights", 34: "Brooklyn Navy Yard",
+    35: "Brownsville", 36: "Bushwick North", 37: "Bushwick South",
+    38: "Cambria Heights", 39: "Canarsie", 40: "Carroll Gardens",
+    41: "Central Harlem", 42: "Central Harlem North", 43: "Central Park",
+    44: "Charleston/Tottenville", 45: "Chinatown", 46: "City Island",
+    47: "Clason Point", 48: "Clinton East", 49: "Clinton Hill",
+    50: "Clinton West", 51: "Co-Op City", 52: "College Point",
+    53: "Columbia St", 54: "Coney Island", 55: "Corona",
+    56: "Country Club", 57: "Crotona Park", 58: "Crotona Park East",
+    59: "Crown Heights North", 60: "Crown Heights South",
+    61: "Cypress Hills", 62: "Douglaston",
+    63: "Downtown Brooklyn/MetroTech", 64: "DUMBO/Vinegar Hill",
+    65: "Dyker Heights", 66: "East Chelsea", 67: "East Concourse",
+    68: "East Chelsea", 69: "East Elmhurst", 70: "East Flatbush/Farragut",
+    71: "East Flatbush/Remsen Village", 72: "East Flushing",
+    73: "East Harlem North", 74: "East Harlem South", 75: "East New York",
+    76: "East New York/Penn Ave", 77: "East Tremont", 78: "East Village",
+    79: "East Village", 80: "Eastchester", 81: "Elmhurst",
+    82: "Elmhurst/Maspeth", 83: "Eltingville/Annadale",
+    84: "Erasmus", 85: "Far Rockaway",
+    86: "Financial District North", 87: "Financial District South",
+    88: "Flatbush/Ditmas Park", 89: "Flatiron", 90: "Flatlands",
+    91: "Flushing", 92: "Flushing Meadows-Corona Park",
+    93: "Fordham South", 94: "Forest Hills", 95: "Forest Park",
+    96: "Fort Greene", 97: "Fresh Meadows", 98: "Freshkills Park",
+    99: "Garment District", 100: "Glen Oaks", 101: "Glendale",
+    102: "Governor's Island", 103: "Gowanus", 104: "Gramercy",
+    105: "Gravesend", 106: "Great Kills", 107: "Gramercy",
+    108: "Green-Wood Cemetery", 109: "Greenpoint",
+    110: "Greenwich Village North", 111: "Greenwich Village South",
+    112: "Gowanus/Fort Greene", 113: "Hamilton Heights",
+    114: "Hammels/Arverne", 115: "Heartland Village/Todt Hill",
+    116: "Highbridge", 117: "Highbridge Park", 118: "Hillcrest/Pomonok",
+    119: "Hollis", 120: "Homecrest", 121: "Howard Beach",
+    122: "Hudson Sq", 123: "Hunts Point", 124: "Inwood",
+    125: "Inwood Hill Park", 126: "Jackson Heights", 127: "Jamaica",
+    128: "Jamaica Estates", 129: "JFK Airport", 130: "Kensington",
+    131: "Kew Gardens", 132: "JFK Airport", 133: "Kew Gardens Hills",
+    134: "Kingsbridge Heights", 135: "Kingsbridge/Marble Hill",
+    136: "Kips Bay", 137: "LaGuardia Airport", 138: "LaGuardia Airport",
+    139: "Laurelton", 140: "Lenox Hill East", 141: "Lenox Hill West",
+    142: "Lincoln Square East", 143: "Lincoln Square West",
+    144: "Little Italy/NoLiTa", 145: "Long Island City/Hunters Point",
+    146: "Long Island City/Queens Plaza", 147: "Longwood",
+    148: "Lower East Side", 149: "Madison", 150: "Manhattan Beach",
+    151: "Manhattan Valley", 152: "Manhattanville",
+    153: "Marble Hill", 154: "Marine Park/Floyd Bennett Field",
+    155: "Marine Park/Mill Basin", 156: "Maspeth",
+    157: "Meatpacking/West Village West", 158: "Melrose South",
+    159: "Middle Village", 160: "Midtown Center", 161: "Midtown Center",
+    162: "Midtown East", 163: "Midtown North", 164: "Midtown South",
+    165: "Midwood", 166: "Morningside Heights",
+    167: "Morrisania/Melrose", 168: "Mott Haven/Port Morris",
+    169: "Mount Hope", 170: "Murray Hill", 171: "Murray Hill-Queens",
+    172: "New Dorp/Midland Beach", 173: "Newark Airport",
+    174: "North Corona", 175: "Norwood", 176: "Oakland Gardens",
+    177: "Oakwood", 178: "Ocean Hill", 179: "Ocean Parkway South",
+    180: "Old Astoria", 181: "Ozone Park", 182: "Park Slope",
+    183: "Parkchester", 184: "Pelham Bay", 185: "Pelham Bay Park",
+    186: "Penn Station/Madison Sq West", 187: "Pelham Pkwy",
+    188: "Prospect-Lefferts Gardens", 189: "Prospect Heights",
+    190: "Prospect Park", 191: "Queens Village",
+    192: "Queensboro Hill", 193: "Queensbridge/Ravenswood",
+    194: "Randalls Island", 195: "Red Hook", 196: "Rego Park",
+    197: "Richmond Hill", 198: "Ridgewood", 199: "Rikers Island",
+    200: "Riverdale/North Riverdale", 201: "Rockaway Park",
+    202: "Rosedale", 203: "Rossville/Woodrow", 204: "Saint Albans",
+    205: "Saint George/New Brighton",
+    206: "Saint Michaels Cemetery/Woodside",
+    207: "Schuylerville/Edgewater Park", 208: "Seaport",
+    209: "Sheepshead Bay", 210: "SoHo", 211: "Soundview/Bruckner",
+    212: "Soundview/Castle Hill", 213: "South Beach/Dongan Hills",
+    214: "South Jamaica", 215: "South Ozone Park",
+    216: "South Williamsburg", 217: "Springfield Gardens North",
+    218: "Springfield Gardens South",
+    219: "Spuyten Duyvil/Kingsbridge", 220: "Stapleton",
+    221: "Starrett City", 222: "Steinway",
+    223: "Stuyvesant Heights",
+    224: "Stuyvesant Town/Peter Cooper Village",
+    225: "Sunnyside", 226: "Sunset Park East", 227: "Sunset Park West",
+    228: "Sutton Place/Turtle Bay North", 229: "Midwood",
+    230: "Times Sq/Theatre District", 231: "TriBeCa/Civic Center",
+    232: "Two Bridges/Seward Park", 233: "UN/Turtle Bay South",
+    234: "Union Sq", 235: "University Heights/Morris Heights",
+    236: "Upper East Side North", 237: "Upper East Side South",
+    238: "Upper West Side North", 239: "Upper West Side South",
+    240: "Van Cortlandt Park", 241: "Van Cortlandt Village",
+    242: "Van Nest/Morris Park", 243: "Washington Heights North",
+    244: "Washington Heights South", 245: "West Brighton",
+    246: "West Concourse", 247: "West Farms/Bronx River",
+    248: "West Village", 249: "West Village",
+    250: "Westchester Village/Unionport", 251: "Westerleigh",
+    252: "Whitestone", 253: "Willets Point",
+    254: "Williamsbridge/Olinville", 255: "Williamsburg North",
+    256: "Williamsburg South", 257: "Windsor Terrace",
+    258: "Woodhaven", 259: "Woodlawn/Wakefield", 260: "Woodside",
+    261: "World Trade Center", 262: "Yorkville East",
+    263: "Yorkville West",
+}
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def dashboard_data(version, _load_data):
+    # Sections de load_data() nettoyées une fois par version et partagées entre
+    # sessions sans copie : à lire seulement. Un processus ne sert qu'un
+    # dashboard : la version suffit comme clé (_load_data n'est pas haché)
+    daily, hourly, zones, profile = _load_data(version)
+    with profiling.span("transform", "dashboard_data"):
+        daily["PICKUP_DATE"] = pd.to_datetime(daily["PICKUP_DATE"], errors="coerce")
+        daily = daily.dropna(subset=["PICKUP_DATE"])
+        # Filtre défensif : on coupe à fin oct. 2025 quelle que soit la version servie
+        daily = daily[daily["PICKUP_DATE"] <= pd.Timestamp("2025-10-31")]
+        # Exclure les jours avec données incomplètes (< 30 % de la médiane)
+        _med = daily["TOTAL_TRIPS"].median()  # type: ignore
+        daily = daily[daily["TOTAL_TRIPS"] >= _med * 0.30]
+        daily = daily.sort_values("PICKUP_DATE").reset_index(drop=True)
+        return daily, hourly.sort_values("PICKUP_HOUR"), zones, profile
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def figure(_source, name, version, *args):
+    # Une figure par (graphique, version des données, métrique, fenêtre), gardée
+    # en JSON : chaque rendu en reconstruit sa propre copie (pio.from_json) au
+    # lieu de partager entre sessions un go.Figure modifiable
+    daily, hourly, zones, profile = dashboard_data(version, _source.load_data)
+    builders = {
+        "weekly":    lambda metric: figures.weekly_profile(daily, metric),
+        "hourly":    lambda metric: figures.hourly_profile(hourly, metric),
+        "evolution": lambda metric, period, offset: figures.evolution(daily, metric, period, offset),
+        "best":      lambda metric: figures.ranking(daily, metric, best=True),
+        "worst":     lambda metric: figures.ranking(daily, metric, best=False),
+        "zones":     lambda: figures.zones_treemap(zones, ZONE_LOOKUP),
+        "payment":   lambda: figures.payment_split(profile),
+    }
+    with profiling.span("figure", name):
+        return builders[name](*args).to_json()
+
+
+# ---------------------------------------------------------------------------
+# Interface
+# ---------------------------------------------------------------------------
+METRIC_OPTIONS = ["TOTAL_TRIPS", "TOTAL_REVENUE", "AVG_FARE", "AVG_TIP_PCT", "AVG_DISTANCE"]
+METRIC_NAMES = {
+    "TOTAL_TRIPS":   "Nb de courses",
+    "TOTAL_REVENUE": "Revenus ($)",
+    "AVG_FARE":      "Tarif moyen ($)",
+    "AVG_TIP_PCT":   "Pourboire (%)",
+    "AVG_DISTANCE":  "Distance (mi)",
+}
+
+
+# Les contrôles modifient session_state dans leur callback, avant la réexécution :
+# un clic ne relance que le fragment qui les contient, sans relance explicite
+def _set_state(**values):
+    st.session_state.update(values)
+
+def _select_period():
+    _set_state(evo_period=st.session_state["evo_radio"], evo_offset=0)
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation (NYC_TAXI_PROFILE=1 ou ?profile=1) : dashboard/profiling.py
+# ---------------------------------------------------------------------------
+def profiling_enabled():
+    return profiling.env_enabled() or st.query_params.get("profile") == "1"
+
+def show_profile(record):
+    with st.expander(f"⏱️ Profilage ({record['scope']}) : {record['total_s']:.2f} s · "
+                     f"pic mémoire {record['peak_mb']:.0f} Mo"
+                     f"{' (partagé avec un autre rendu)' if record['peak_shared'] else ''}"):
+        spans = profiling.spans_frame(record)
+        st.dataframe(spans.groupby("kind")["seconds"].agg(["count", "sum"]), use_container_width=True)
+        st.dataframe(spans, use_container_width=True, hide_index=True)
+
+def profiled(scope):
+    # Un rendu complet ou un fragment relancé seul ouvre son propre relevé ;
+    # appelé depuis un rendu déjà profilé, il n'en est qu'une étape
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(source, *args, **kwargs):
+            if profiling.active() or not profiling_enabled():
+                with profiling.span("section", scope):
+                    return fn(source, *args, **kwargs)
+            rerun = profiling.start(source.app, scope)
+            try:
+                result = fn(source, *args, **kwargs)
+            finally:
+                record = profiling.finish(rerun)
+            # Rendu interrompu (st.stop, rendu remplacé) : journalisé, pas affiché
+            show_profile(record)
+            return result
+        return wrapper
+    return decorator
+
+def chart(source, name, version, *args):
+    # Sans étape « figure » imbriquée, la figure venait du cache
+    with profiling.span("cache", f"figure {name}"):
+        fig = pio.from_json(figure(source, name, version, *args))
+    with profiling.span("plotly_chart", name):
+        st.plotly_chart(fig, use_container_width=True)
+
+def rerun_owner():
+    # Appelé en tête de chaque rendu complet : ses requêtes sont annulées dès
+    # qu'un rendu plus récent de la même session démarre (dashboard/cancellation.py)
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return contextlib.nullcontext()
+    generations = st.session_state.setdefault("_rerun_generations", cancellation.Generations())
+    return cancellation.rerun(ctx.session_id, generations)
+
+
+@st.fragment
+@profiled("patterns")
+def activity_patterns(source, version):
+    # Fragment : le choix de la métrique ne réexécute que cette section.
+    # Valeur courante depuis session_state (persiste entre les reruns)
+    metric_choice = st.session_state.get("metric_pills", "TOTAL_TRIPS")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        chart(source, "weekly", version, metric_choice)
+    with col2:
+        chart(source, "hourly", version, metric_choice)
+
+    # Sélecteur de métrique — boutons natifs centrés entre les deux rangées
+    st.markdown(
+        "<p style='text-align:center; font-size:0.95rem; font-weight:600; "
+        "color:#1E40AF; margin:20px 0 8px;'>"
+        "Sélectionner la métrique à afficher sur les graphiques</p>",
+        unsafe_allow_html=True,
+    )
+    _, btn_col, _ = st.columns([1, 5, 1])
+    with btn_col:
+        cols = st.columns(len(METRIC_OPTIONS))
+        for col, opt in zip(cols, METRIC_OPTIONS):
+            with col:
+                btn_type = "primary" if opt == metric_choice else "secondary"
+                st.button(METRIC_NAMES[opt], key=f"m_{opt}",
+                          type=btn_type, use_container_width=True,
+                          on_click=_set_state, kwargs={"metric_pills": opt})
+    st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
+
+    daily_evolution(source, version, metric_choice)
+
+
+@st.fragment
+@profiled("evolution")
+def daily_evolution(source, version, metric_choice):
+    # Fragment imbriqué : période et navigation ne réexécutent que l'évolution
+    daily = dashboard_data(version, source.load_data)[0]
+
+    if "evo_period" not in st.session_state:
+        st.session_state["evo_period"] = "6M"
+    if "evo_offset" not in st.session_state:
+        st.session_state["evo_offset"] = 0
+
+    cur_period = st.session_state["evo_period"]
+    cur_offset = st.session_state["evo_offset"]
+    x_min, _ = figures.evolution_window(daily, cur_period, cur_offset)
+
+    # Contrôles période — radio discret + ← → à droite
+    ctl_l, ctl_r = st.columns([6, 1])
+    with ctl_l:
+        st.radio(
+            "Période", options=list(figures.PERIODS.keys()),
+            index=list(figures.PERIODS.keys()).index(cur_period),
+            horizontal=True, key="evo_radio",
+            label_visibility="collapsed",
+            on_change=_select_period,
+        )
+    with ctl_r:
+        nav_l, nav_r = st.columns(2)
+        can_prev = cur_period != "Tout" and x_min > daily["PICKUP_DATE"].min()
+        can_next = cur_period != "Tout" and cur_offset > 0
+        with nav_l:
+            st.button("←", key="evo_prev", disabled=not can_prev,
+                      use_container_width=True,
+                      on_click=_set_state, kwargs={"evo_offset": cur_offset + 1})
+        with nav_r:
+            st.button("→", key="evo_next", disabled=not can_next,
+                      use_container_width=True,
+                      on_click=_set_state, kwargs={"evo_offset": cur_offset - 1})
+
+    evo_col, rank_col = st.columns(2)
+
+    with evo_col:
+        chart(source, "evolution", version, metric_choice, cur_period, cur_offset)
+
+    with rank_col:
+        r1, r2 = st.columns(2)
+        with r1:
+            chart(source, "best", version, metric_choice)
+        with r2:
+            chart(source, "worst", version, metric_choice)
+
+
+@profiled("page")
+def main(source):
+    owner = rerun_owner()
+    st.title("NYC Yellow Taxi")
+
+    with st.spinner("Chargement des données..."):
+        try:
+            version = source.served_version()
+            with profiling.span("cache", "dashboard_data"), owner:
+                daily, hourly, zones, profile = dashboard_data(version, source.load_data)
+            if daily.empty:  # type: ignore
+                st.warning("Aucune donnée valide dans daily_summary.")
+                st.stop()
+        except Exception as e:
+            st.error(f"Erreur de chargement : {e}")
+            st.stop()
+
+    total_trips = daily["TOTAL_TRIPS"].sum()
+    date_min    = daily["PICKUP_DATE"].min().strftime("%b %Y")
+    date_max    = daily["PICKUP_DATE"].max().strftime("%b %Y")
+    n_days      = len(daily)
+    st.caption(
+        f"{total_trips/1e6:.1f}M courses analysées · "
+        f"{n_days} jours de données · "
+        f"{date_min} – {date_max} · "
+        f"Source : NYC Taxi & Limousine Commission (TLC)"
+    )
+
+    fd    = daily
+
+    # Composant carte réutilisé dans les KPIs et le portrait
+    def card(label, value, detail="", color="#2563EB"):
+        st.markdown(
+            f"""<div style="background:#F8FAFC; border-left:4px solid {color};
+                            border-radius:8px; padding:18px 20px;">
+                  <div style="font-size:2rem; font-weight:700; color:{color}; line-height:1.1;">{value}</div>
+                  <div style="font-size:0.82rem; font-weight:600; color:#334155; margin-top:6px;">{label}</div>
+                  <div style="font-size:0.75rem; color:#94A3B8; margin-top:3px;">{detail}</div>
+                </div>""",
+            unsafe_allow_html=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Section 1 : Indicateurs clés
+    # ------------------------------------------------------------------
+    st.header("Indicateurs clés")
+    c1, c2, c3, c4, c5 = st.columns(5)
+    with c1:
+        card("Courses", f"{fd['TOTAL_TRIPS'].sum():,.0f}",
+             "sur la période sélectionnée", "#2563EB")
+    with c2:
+        rev = fd["TOTAL_REVENUE"].sum()
+        card("Revenus totaux", f"${rev/1e6:.1f}M",
+             f"soit ${rev/fd['TOTAL_TRIPS'].sum():.2f} / course", "#2563EB")
+    # Moyennes pondérées par les courses de chaque jour (pas de moyenne de moyennes)
+    period = rollup.totals(fd)
+    with c3:
+        card("Distance moyenne", f"{period['AVG_DISTANCE']:.1f} mi",
+             "par trajet", "#059669")
+    with c4:
+        card("Tarif moyen", f"${period['AVG_FARE']:.2f}",
+             "toutes charges incluses", "#059669")
+    with c5:
+        card("Pourboire moyen", f"{period['AVG_TIP_PCT']:.1f}%",
+             "du tarif de base", "#7C3AED")
+
+    st.divider()
+
+    # ------------------------------------------------------------------
+    # Section 2 : Patterns d'activité
+    # ------------------------------------------------------------------
+    st.header("Patterns d'activité")
+
+    activity_patterns(source, version)
+
+    st.divider()
+
+    # ------------------------------------------------------------------
+    # Section 4 : Géographie
+    # ------------------------------------------------------------------
+    st.header("Quartiers")
+
+    chart(source, "zones", version)
+    st.markdown(
+        "**100 zones affichées sur ~260 zones TLC NYC · "
+        "surface = volume de courses · couleur = tarif moyen (bleu foncé = plus cher)**"
+    )
+
+    st.divider()
+
+    # ------------------------------------------------------------------
+    # Section 5 : Portrait type d'un trajet NYC
+    # ------------------------------------------------------------------
+    st.header("Portrait type d'un trajet à New York")
+
+    p = profile.iloc[0]
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        card("Distance moyenne", f"{p['AVG_DISTANCE']:.1f} mi",
+             "par course", "#2563EB")
+    with c2:
+        card("Tarif moyen", f"${p['AVG_FARE']:.2f}",
+             "toutes charges incluses", "#2563EB")
+    with c3:
+        card("Courses avec pourboire", f"{p['PCT_AVEC_POURBOIRE']:.0f}%",
+             f"pourboire moy. {p['AVG_TIP_PCT']:.1f}% du tarif", "#059669")
+    with c4:
+        card("Paiement par carte", f"{p['PCT_CARTE']:.0f}%",
+             f"{100 - p['PCT_CARTE']:.0f}% en espèces", "#059669")
+
+    st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        card("Passagers / course", f"{p['AVG_PASSAGERS']:.1f}",
+             "en moyenne", "#7C3AED")
+    with c2:
+        card("Courses via JFK", f"{p['PCT_AEROPORT_JFK']:.1f}%",
+             "départ ou arrivée", "#7C3AED")
+    with c3:
+        card("Courses via LaGuardia", f"{p['PCT_AEROPORT_LGA']:.1f}%",
+             "départ ou arrivée", "#7C3AED")
+    with c4:
+        pct_city = 100 - p['PCT_AEROPORT_JFK'] - p['PCT_AEROPORT_LGA']
+        card("Courses intra-ville", f"{pct_city:.0f}%",
+             "sans aéroport", "#7C3AED")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # Mini chart : répartition paiement
+    _, col_pay, _ = st.columns([0.25, 0.5, 0.25])
+    with col_pay:
+        chart(source, "payment", version)
+
+    st.markdown("---")
+    st.caption("Source : NYC Taxi & Limousine Commission (TLC) — Yellow Taxi Trip Records")
+
@@ -0,0 +1,202 @@
+"""
+Entrepôt DuckDB persistant pour le dashboard local
+Un fichier `data/nyc_taxi.duckdb` qui garde :
+  - staging.yellow_taxi_trips : les trajets de la fenêtre d'analyse, avec
+    leur fichier source (colonne source_file) ;
+  - staging.source_files      : l'empreinte (taille, date de modification)
+    de chaque fichier chargé ;
+  - marts.trips_cube          : le cube d'agrégats de dashboard/cube.py ;
+  - marts.dashboard_<section> : les quatre sections de load_data()
+    (daily, hourly, zones, profile) déjà calculées depuis le cube.
+
+Seuls les fichiers Parquet nouveaux, modifiés ou supprimés depuis la dernière
+construction sont rechargés, et seuls les jours qu'ils touchent sont recalculés
+dans le cube. La mise à jour se fait sur une copie du fichier, remplacée à la
+fin : les dashboards qui l'ont ouvert en lecture seule ne sont pas bloqués et
+un nouveau processus démarre directement sur les tables matérialisées.
+
+Construction : python -m dashboard.warehouse [--force]
+"""
+
+import argparse
+import os
+import shutil
+from pathlib import Path
+
+from loguru import logger
+
+from dashboard import cube, parallel
+
+WAREHOUSE = Path("data/nyc_taxi.duckdb")
+SOURCE_DIR = Path("data/yellow_taxi")
+
+STAGING_TABLE = "staging.yellow_taxi_trips"
+SOURCES_TABLE = "staging.source_files"
+CUBE_TABLE = "marts.trips_cube"
+
+# Colonnes TLC conservées en staging (les noms Parquet sont comparés sans casse)
+STAGING_COLUMNS = {
+    "vendorid": "INTEGER",
+    "tpep_pickup_datetime": "TIMESTAMP",
+    "tpep_dropoff_datetime": "TIMESTAMP",
+    "passenger_count": "DOUBLE",
+    "trip_distance": "DOUBLE",
+    "ratecodeid": "DOUBLE",
+    "store_and_fwd_flag": "VARCHAR",
+    "pulocationid": "INTEGER",
+    "dolocationid": "INTEGER",
+    "payment_type": "INTEGER",
+    "fare_amount": "DOUBLE",
+    "extra": "DOUBLE",
+    "mta_tax": "DOUBLE",
+    "tip_amount": "DOUBLE",
+    "tolls_amount": "DOUBLE",
+    "improvement_surcharge": "DOUBLE",
+    "total_amount": "DOUBLE",
+    "congestion_surcharge": "DOUBLE",
+    "airport_fee": "DOUBLE",
+    "cbd_congestion_fee": "DOUBLE",
+}
+
+
+def section_table(name):
+    return f"marts.dashboard_{name}"
+
+
+def load_sections(run_all):
+    """Les quatre DataFrames de load_data(), lus en parallèle dans les tables matérialisées"""
+    queries = {name: f"SELECT * FROM {section_table(name)}" for name in cube.SECTIONS}
+    return parallel.gather(run_all(queries), cube.SECTIONS)
+
+
+def source_fingerprint(path):
+    """Empreinte bon marché d'un fichier source : taille et date de modification"""
+    stat = path.stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def create_schema(con):
+    columns = ", ".join(f"{name} {sql_type}" for name, sql_type in STAGING_COLUMNS.items())
+    con.execute("CREATE SCHEMA IF NOT EXISTS staging")
+    con.execute("CREATE SCHEMA IF NOT EXISTS marts")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {STAGING_TABLE} ({columns}, source_file VARCHAR)")
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SOURCES_TABLE} (
+            source_file VARCHAR PRIMARY KEY,
+            fingerprint VARCHAR,
+            rows_loaded BIGINT,
+            loaded_at   TIMESTAMP
+        )
+    """)
+    con.execute(f"CREATE TABLE IF NOT EXISTS {CUBE_TABLE} AS "
+                f"SELECT * FROM ({cube.build_sql(STAGING_TABLE)}) LIMIT 0")
+
+
+def _mark_affected_dates(con, source_file):
+    con.execute(f"""
+        INSERT INTO affected_dates
+        SELECT DISTINCT CAST(tpep_pickup_datetime AS DATE) FROM {STAGING_TABLE} WHERE source_file = ?
+    """, [source_file])
+
+
+def _load_source(con, path):
+    """Charger un fichier Parquet en staging ; renvoie le nombre de lignes"""
+    available = {row[0].lower(): row[0] for row in
+                 con.execute("SELECT name FROM parquet_schema(?)", [str(path)]).fetchall()}
+    columns = [name for name in STAGING_COLUMNS if name in available]
+    con.execute(f"""
+        INSERT INTO {STAGING_TABLE} ({', '.join(columns)}, source_file)
+        SELECT {', '.join(f'"{available[name]}"' for name in columns)}, ?
+        FROM read_parquet(?)
+        WHERE tpep_pickup_datetime >= '{cube.DATE_START}'
+          AND tpep_pickup_datetime <  '{cube.DATE_END}'
+    """, [path.name, str(path)])
+    return con.execute(f"SELECT COUNT(*) FROM {STAGING_TABLE} WHERE source_file = ?",
+                       [path.name]).fetchone()[0]
+
+
+def refresh(con, source_dir=SOURCE_DIR):
+    """Recharger les fichiers modifiés, recalculer les jours touchés dans le cube et les sections"""
+    loaded = dict(con.execute(f"SELECT source_file, fingerprint FROM {SOURCES_TABLE}").fetchall())
+    sources = {path.name: path for path in sorted(source_dir.glob("*.parquet"))}
+    removed = [name for name in loaded if name not in sources]
+    changed = [path for name, path in sources.items() if loaded.get(name) != source_fingerprint(path)]
+    if not removed and not changed:
+        return [], []
+
+    con.execute("BEGIN")
+    try:
+        con.execute("CREATE OR REPLACE TEMP TABLE affected_dates (pickup_date DATE)")
+        for name in removed + [path.name for path in changed]:
+            _mark_affected_dates(con, name)
+            con.execute(f"DELETE FROM {STAGING_TABLE} WHERE source_file = ?", [name])
+            con.execute(f"DELETE FROM {SOURCES_TABLE} WHERE source_file = ?", [name])
+
+        for path in changed:
+            rows = _load_source(con, path)
+            _mark_affected_dates(con, path.name)
+            con.execute(f"INSERT INTO {SOURCES_TABLE} VALUES (?, ?, ?, now())",
+                        [path.name, source_fingerprint(path), rows])
+            logger.info(f"📥 {path.name}: {rows:,} lignes en staging")
+
+        affected = "(SELECT DISTINCT pickup_date FROM affected_dates)"
+        con.execute(f"DELETE FROM {CUBE_TABLE} WHERE pickup_date IN {affected}")
+        con.execute(f"""
+            INSERT INTO {CUBE_TABLE}
+            {cube.build_sql(f"(SELECT * FROM {STAGING_TABLE} "
+                            f"WHERE CAST(tpep_pickup_datetime AS DATE) IN {affected})")}
+        """)
+        for name, sql in cube.section_sql(CUBE_TABLE).items():
+            con.execute(f"CREATE OR REPLACE TABLE {section_table(name)} AS {sql}")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return changed, removed
+
+
+def build(target=WAREHOUSE, source_dir=SOURCE_DIR, force=False):
+    """Construire ou mettre à jour l'entrepôt ; renvoie (fichiers rechargés, fichiers retirés)"""
+    import duckdb
+
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    if target.exists() and not force:
+        shutil.copy2(target, tmp)
+
+    con = duckdb.connect(str(tmp))
+    try:
+        create_schema(con)
+        changed, removed = refresh(con, source_dir)
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+
+    if changed or removed or not target.exists() or force:
+        os.replace(tmp, target)
+    else:
+        tmp.unlink()
+    return changed, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction de l'entrepôt DuckDB du dashboard local")
+    parser.add_argument("--force", action="store_true", help="Reconstruire l'entrepôt depuis zéro")
+    args = parser.parse_args()
+
+    if not any(SOURCE_DIR.glob("*.parquet")):
+        logger.error(f"❌ Aucun fichier dans {SOURCE_DIR} - lancer d'abord B_load_local_parquet.py")
+        return
+
+    logger.info(f"🏗️ Mise à jour de l'entrepôt {WAREHOUSE}...")
+    changed, removed = build(force=args.force)
+    if not changed and not removed:
+        logger.success(f"✅ Entrepôt {WAREHOUSE} déjà à jour")
+        return
+    size_mb = WAREHOUSE.stat().st_size / 1024 / 1024
+    logger.success(f"✅ Entrepôt {WAREHOUSE} à jour: {len(changed)} fichier(s) rechargé(s), "
+                   f"{len(removed)} retiré(s) - {size_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
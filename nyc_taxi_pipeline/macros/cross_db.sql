@@ -0,0 +1,32 @@
+-- Fonctions dont la syntaxe ou la sémantique diffère entre Snowflake et DuckDB
+
+-- Minutes entières entre deux horodatages (frontières de minute franchies)
+{% macro minutes_between(start_ts, end_ts) %}
+    {{ return(adapter.dispatch('minutes_between')(start_ts, end_ts)) }}
+{% endmacro %}
+
+{% macro default__minutes_between(start_ts, end_ts) %}
+    DATEDIFF('minute', {{ start_ts }}, {{ end_ts }})
+{% endmacro %}
+
+{% macro duckdb__minutes_between(start_ts, end_ts) %}
+    date_diff('minute', {{ start_ts }}, {{ end_ts }})
+{% endmacro %}
+
+-- Jour de la semaine, 0 = dimanche ... 6 = samedi
+{% macro day_of_week(ts) %}
+    {{ return(adapter.dispatch('day_of_week')(ts)) }}
+{% endmacro %}
+
+{% macro default__day_of_week(ts) %}
+    EXTRACT(DOW FROM {{ ts }})
+{% endmacro %}
+
+-- EXTRACT(DOW) dépend du paramètre de session WEEK_START sur Snowflake
+{% macro snowflake__day_of_week(ts) %}
+    MOD(DAYOFWEEKISO({{ ts }}), 7)
+{% endmacro %}
+
+{% macro duckdb__day_of_week(ts) %}
+    dayofweek({{ ts }})
+{% endmacro %}
@@ -0,0 +1,10 @@
+-- Début de la fenêtre recalculée par un run incrémental : premier jour du
+-- dernier mois déjà présent dans {{ this }}, moins `lookback_months` mois
+-- (corrections tardives republiées par TLC sur les mois précédents)
+{% macro lookback_start(date_column) %}
+    (
+        SELECT {{ dbt.dateadd('month', -var('lookback_months'),
+                              "DATE_TRUNC('month', MAX(" ~ date_column ~ "))") }}
+        FROM {{ this }}
+    )
+{% endmacro %}
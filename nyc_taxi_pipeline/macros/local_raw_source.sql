@@ -0,0 +1,11 @@
+-- Cible DuckDB : RAW.yellow_taxi_trips devient une vue sur les Parquet locaux
+-- (appelée en on-run-start ; ne fait rien sur Snowflake)
+{% macro create_local_raw_source() %}
+    {% if target.type == 'duckdb' %}
+        {% do run_query("CREATE SCHEMA IF NOT EXISTS raw") %}
+        {% do run_query(
+            "CREATE OR REPLACE VIEW raw.yellow_taxi_trips AS "
+            ~ "SELECT * FROM read_parquet('" ~ var('local_parquet_glob') ~ "', union_by_name = true)"
+        ) %}
+    {% endif %}
+{% endmacro %}
@@ -0,0 +1,31 @@
+{{ config(
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_date'
+) }}
+
+-- Agrégat intermédiaire commun aux marts
+-- Grain : (jour, heure, zone de départ, catégorie de distance, type de jour)
+-- Uniquement des comptes et des sommes additifs : chaque mart s'en déduit par
+-- SUM(...) / SUM(trip_count) sans relire le staging. Les colonnes moyennées
+-- sont non nulles en staging (filtres et CASE ... ELSE 0), trip_count sert
+-- donc de dénominateur commun.
+-- Incrémental : seuls les jours des mois rechargés en staging sont recalculés
+
+SELECT
+    DATE(tpep_pickup_datetime) as pickup_date,
+    pickup_hour,
+    pulocationid as pickup_zone,
+    distance_category,
+    day_type,
+    COUNT(*) as trip_count,
+    SUM(trip_distance) as sum_trip_distance,
+    SUM(total_amount) as sum_total_amount,
+    SUM(tip_percentage) as sum_tip_percentage,
+    SUM(avg_speed_mph) as sum_speed_mph,
+    SUM(trip_duration_minutes) as sum_duration_minutes
+FROM {{ ref('stg_yellow_taxi_trips') }}
+{% if is_incremental() %}
+WHERE pickup_month_start >= {{ lookback_start('pickup_date') }}
+{% endif %}
+GROUP BY 1, 2, 3, 4, 5
@@ -1,15 +1,26 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_date'
+) }}
 
 -- Table de résumé quotidien selon le brief
 -- Métriques par jour : nombre de trajets, distance moyenne, revenus totaux
+-- Incrémental : seuls les jours des mois rechargés en staging sont recalculés
 
 SELECT 
-    DATE(tpep_pickup_datetime) as pickup_date,
-    COUNT(*) as total_trips,
-    AVG(trip_distance) as avg_distance,
-    SUM(total_amount) as total_revenue,
-    AVG(total_amount) as avg_revenue,
-    AVG(tip_percentage) as avg_tip_percentage
-FROM {{ ref('stg_yellow_taxi_trips') }}
-GROUP BY DATE(tpep_pickup_datetime)
-ORDER BY pickup_date
\ No newline at end of file
+    pickup_date,
+    SUM(trip_count) as total_trips,
+    SUM(sum_trip_distance) / SUM(trip_count) as avg_distance,
+    SUM(sum_total_amount) as total_revenue,
+    SUM(sum_total_amount) / SUM(trip_count) as avg_revenue,
+    SUM(sum_tip_percentage) / SUM(trip_count) as avg_tip_percentage,
+    -- Sommes additives (total_trips sert de compte) : moyennes exactes sur toute période
+    SUM(sum_trip_distance) as sum_trip_distance,
+    SUM(sum_tip_percentage) as sum_tip_percentage
+FROM {{ ref('int_trip_aggregates') }}
+{% if is_incremental() %}
+WHERE pickup_date >= {{ lookback_start('pickup_date') }}
+{% endif %}
+GROUP BY pickup_date
+ORDER BY pickup_date
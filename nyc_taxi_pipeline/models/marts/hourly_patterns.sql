@@ -5,10 +5,14 @@
 
 SELECT 
     pickup_hour,
-    COUNT(*) as total_trips,
-    AVG(total_amount) as avg_revenue,
-    AVG(avg_speed_mph) as avg_speed,
-    AVG(trip_distance) as avg_distance,
+    SUM(trip_count) as total_trips,
+    SUM(sum_total_amount) / SUM(trip_count) as avg_revenue,
+    SUM(sum_speed_mph) / SUM(trip_count) as avg_speed,
+    SUM(sum_trip_distance) / SUM(trip_count) as avg_distance,
+    -- Sommes additives (total_trips sert de compte)
+    SUM(sum_total_amount) as sum_total_amount,
+    SUM(sum_speed_mph) as sum_speed_mph,
+    SUM(sum_trip_distance) as sum_trip_distance,
     -- Catégorisation des périodes selon le brief
     CASE 
         WHEN pickup_hour BETWEEN 6 AND 9 THEN 'Rush Matinal'
@@ -17,6 +21,6 @@ SELECT
         WHEN pickup_hour BETWEEN 20 AND 23 THEN 'Soirée'
         ELSE 'Nuit'
     END as time_period
-FROM {{ ref('stg_yellow_taxi_trips') }}
+FROM {{ ref('int_trip_aggregates') }}
 GROUP BY pickup_hour
-ORDER BY pickup_hour
\ No newline at end of file
+ORDER BY pickup_hour
@@ -6,12 +6,18 @@
 SELECT 
     distance_category,
     day_type,
-    COUNT(*) as total_trips,
-    AVG(trip_distance) as avg_distance,
-    AVG(total_amount) as avg_revenue,
-    AVG(trip_duration_minutes) as avg_duration,
-    AVG(avg_speed_mph) as avg_speed,
-    AVG(tip_percentage) as avg_tip_percentage
-FROM {{ ref('stg_yellow_taxi_trips') }}
+    SUM(trip_count) as total_trips,
+    SUM(sum_trip_distance) / SUM(trip_count) as avg_distance,
+    SUM(sum_total_amount) / SUM(trip_count) as avg_revenue,
+    SUM(sum_duration_minutes) / SUM(trip_count) as avg_duration,
+    SUM(sum_speed_mph) / SUM(trip_count) as avg_speed,
+    SUM(sum_tip_percentage) / SUM(trip_count) as avg_tip_percentage,
+    -- Sommes additives (total_trips sert de compte)
+    SUM(sum_trip_distance) as sum_trip_distance,
+    SUM(sum_total_amount) as sum_total_amount,
+    SUM(sum_duration_minutes) as sum_duration_minutes,
+    SUM(sum_speed_mph) as sum_speed_mph,
+    SUM(sum_tip_percentage) as sum_tip_percentage
+FROM {{ ref('int_trip_aggregates') }}
 GROUP BY distance_category, day_type
-ORDER BY total_trips DESC
\ No newline at end of file
+ORDER BY total_trips DESC
@@ -4,12 +4,14 @@
 -- Métriques par zone de départ : volume, revenus moyens, popularité
 
 SELECT 
-    pulocationid as pickup_zone,
-    COUNT(*) as total_trips,
-    AVG(total_amount) as avg_revenue,
-    SUM(total_amount) as total_revenue,
-    AVG(trip_distance) as avg_distance,
-    RANK() OVER (ORDER BY COUNT(*) DESC) as popularity_rank
-FROM {{ ref('stg_yellow_taxi_trips') }}
-GROUP BY pulocationid
-ORDER BY total_trips DESC
\ No newline at end of file
+    pickup_zone,
+    SUM(trip_count) as total_trips,
+    SUM(sum_total_amount) / SUM(trip_count) as avg_revenue,
+    SUM(sum_total_amount) as total_revenue,
+    SUM(sum_trip_distance) / SUM(trip_count) as avg_distance,
+    -- Somme additive (total_trips sert de compte, total_revenue de somme des montants)
+    SUM(sum_trip_distance) as sum_trip_distance,
+    RANK() OVER (ORDER BY SUM(trip_count) DESC) as popularity_rank
+FROM {{ ref('int_trip_aggregates') }}
+GROUP BY pickup_zone
+ORDER BY total_trips DESC
@@ -1,18 +1,26 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='pickup_month_start'
+) }}
 
 -- Modèle staging : nettoyage des données brutes
 -- Source : RAW.yellow_taxi_trips
+-- Incrémental par mois de prise en charge : un run ne relit que les mois à
+-- partir de lookback_start() et les remplace en entier (delete+insert) ;
+-- `dbt run --full-refresh` reconstruit toute la table
 
 SELECT 
     *,
     -- Enrichissements demandés dans le brief
-    DATEDIFF('minute', tpep_pickup_datetime, tpep_dropoff_datetime) as trip_duration_minutes,
+    {{ minutes_between('tpep_pickup_datetime', 'tpep_dropoff_datetime') }} as trip_duration_minutes,
     EXTRACT(HOUR FROM tpep_pickup_datetime) as pickup_hour,
-    EXTRACT(DOW FROM tpep_pickup_datetime) as pickup_day_of_week,
+    {{ day_of_week('tpep_pickup_datetime') }} as pickup_day_of_week,
     EXTRACT(MONTH FROM tpep_pickup_datetime) as pickup_month,
+    CAST(DATE_TRUNC('month', tpep_pickup_datetime) AS DATE) as pickup_month_start,
     CASE 
-        WHEN DATEDIFF('minute', tpep_pickup_datetime, tpep_dropoff_datetime) > 0 
-        THEN (trip_distance / (DATEDIFF('minute', tpep_pickup_datetime, tpep_dropoff_datetime) / 60.0))
+        WHEN {{ minutes_between('tpep_pickup_datetime', 'tpep_dropoff_datetime') }} > 0 
+        THEN (trip_distance / ({{ minutes_between('tpep_pickup_datetime', 'tpep_dropoff_datetime') }} / 60.0))
         ELSE 0 
     END as avg_speed_mph,
     CASE 
@@ -30,8 +38,8 @@ SELECT
     END as distance_category,
     -- Types de jours selon le brief
     CASE 
-        WHEN EXTRACT(DOW FROM tpep_pickup_datetime) IN (1,2,3,4,5) THEN 'Jours de semaine'
-        WHEN EXTRACT(DOW FROM tpep_pickup_datetime) IN (0,6) THEN 'Weekend'
+        WHEN {{ day_of_week('tpep_pickup_datetime') }} IN (1,2,3,4,5) THEN 'Jours de semaine'
+        WHEN {{ day_of_week('tpep_pickup_datetime') }} IN (0,6) THEN 'Weekend'
         ELSE 'Non défini'
     END as day_type
 FROM {{ source('raw', 'yellow_taxi_trips') }}
@@ -42,4 +50,12 @@ WHERE
     AND tpep_dropoff_datetime > tpep_pickup_datetime    -- Garder pickup < dropoff
     AND trip_distance BETWEEN 0.1 AND 100              -- Distance entre 0.1 et 100 miles
     AND pulocationid IS NOT NULL                        -- Exclure zones NULL
-    AND dolocationid IS NOT NULL                        -- Exclure zones NULL
\ No newline at end of file
+    AND dolocationid IS NOT NULL                        -- Exclure zones NULL
+    -- Fenêtre d'analyse sur la colonne brute (élagage des micro-partitions)
+    AND tpep_pickup_datetime >= '{{ var("pickup_start") }}'
+    {% if var("pickup_end", none) %}
+    AND tpep_pickup_datetime <  '{{ var("pickup_end") }}'
+    {% endif %}
+    {% if is_incremental() %}
+    AND tpep_pickup_datetime >= {{ lookback_start('pickup_month_start') }}
+    {% endif %}
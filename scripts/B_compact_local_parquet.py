@@ -0,0 +1,148 @@
+"""
+================================================================================
+VERSION LOCALE (SANS SNOWFLAKE) - COMPACTION DES PARQUET
+================================================================================
+Réécrit les fichiers TLC de `data/yellow_taxi/` en partitions Hive
+`data/yellow_taxi_partitioned/year=AAAA/month=M/` pour le dashboard DuckDB :
+  - lignes triées par (jour de prise en charge, PULocationID, horodatage) :
+    les statistiques min/max des row groups permettent à DuckDB de sauter
+    l'essentiel des données sur un filtre de dates ;
+  - row groups de ROW_GROUP_SIZE lignes (~1/2 journée de courses) ;
+  - compression zstd ;
+  - filtres de Bloom sur les colonnes encodées par dictionnaire (dont les
+    zones PULocationID / DOLocationID).
+
+Les lignes d'un fichier source dont la date sort du mois publié sont rangées
+dans la partition de leur vraie date. Les lignes sans horodatage de prise en
+charge n'ont pas de partition : elles sont écartées et leur nombre est journalisé. Seuls les fichiers sources nouveaux ou
+modifiés (empreinte SHA-256) sont réécrits ; `--force` réécrit tout. Les
+partitions d'un fichier source supprimé ou renommé sont effacées.
+================================================================================
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import duckdb
+from loguru import logger
+
+from tlc_download import DATA_DIR, file_sha256, load_manifest
+
+PARTITIONED_DIR = Path("data/yellow_taxi_partitioned")
+STATE_FILE = PARTITIONED_DIR / "_sources.json"   # {fichier source: sha256 compacté}
+
+ROW_GROUP_SIZE = 61_440                 # Multiple de 2048 (taille de vecteur DuckDB)
+BLOOM_FALSE_POSITIVE_RATIO = 0.01
+SORT_KEY = "CAST(tpep_pickup_datetime AS DATE), PULocationID, tpep_pickup_datetime"
+
+def partition_dir(year, month):
+    return PARTITIONED_DIR / f"year={year}" / f"month={month}"
+
+def source_hash(source, manifest):
+    """Empreinte d'un fichier source : celle du manifeste si la taille correspond"""
+    month = source.stem.removeprefix("yellow_tripdata_").replace("_", "-")
+    entry = manifest.get(month, {})
+    if entry.get("sha256") and entry.get("size") == source.stat().st_size:
+        return entry["sha256"]
+    return file_sha256(source)
+
+def compact_source(con, source):
+    """Réécrire un fichier source dans ses partitions ; renvoie le nombre de lignes écrites"""
+    con.execute(f"CREATE OR REPLACE TEMP TABLE src AS SELECT * FROM read_parquet('{source}')")
+    dropped = con.execute("SELECT COUNT(*) FROM src WHERE tpep_pickup_datetime IS NULL").fetchone()[0]
+    if dropped:
+        logger.warning(f"⚠️ {source.name}: {dropped:,} ligne(s) sans tpep_pickup_datetime écartée(s)")
+    partitions = con.execute("""
+        SELECT year(tpep_pickup_datetime) AS y, month(tpep_pickup_datetime) AS m, COUNT(*)
+        FROM src
+        WHERE tpep_pickup_datetime IS NOT NULL
+        GROUP BY ALL
+        ORDER BY ALL
+    """).fetchall()
+
+    written = []
+    for year, month, _ in partitions:
+        target = partition_dir(year, month) / source.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        con.execute(f"""
+            COPY (
+                SELECT * FROM src
+                WHERE year(tpep_pickup_datetime) = {year} AND month(tpep_pickup_datetime) = {month}
+                ORDER BY {SORT_KEY}
+            ) TO '{tmp}' (
+                FORMAT parquet,
+                COMPRESSION zstd,
+                ROW_GROUP_SIZE {ROW_GROUP_SIZE},
+                BLOOM_FILTER_FALSE_POSITIVE_RATIO {BLOOM_FALSE_POSITIVE_RATIO}
+            )
+        """)
+        written.append((tmp, target))
+
+    # Remplacement des anciennes partitions de ce fichier une fois tout écrit
+    for stale in PARTITIONED_DIR.glob(f"year=*/month=*/{source.name}"):
+        stale.unlink()
+    for tmp, target in written:
+        os.replace(tmp, target)
+    con.execute("DROP TABLE src")
+    return sum(count for _, _, count in partitions), len(partitions)
+
+def remove_orphans(sources, state):
+    """Effacer les partitions des fichiers sources disparus ; renvoie les noms retirés"""
+    names = {source.name for source in sources}
+    removed = set()
+    for orphan in PARTITIONED_DIR.glob("year=*/month=*/*.parquet"):
+        if orphan.name not in names:
+            orphan.unlink()
+            removed.add(orphan.name)
+    for name in set(state) - names:
+        del state[name]
+        removed.add(name)
+    # Partitions (puis années) devenues vides
+    for directory in sorted(PARTITIONED_DIR.glob("year=*/month=*")) + sorted(PARTITIONED_DIR.glob("year=*")):
+        if directory.is_dir() and not any(directory.iterdir()):
+            directory.rmdir()
+    return sorted(removed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compaction des Parquet locaux en partitions triées")
+    parser.add_argument("--force", action="store_true", help="Réécrire tous les fichiers sources")
+    args = parser.parse_args()
+
+    logger.info("🗜️ Compaction des Parquet locaux (partitions year=/month=, tri, zstd, Bloom)")
+    sources = sorted(DATA_DIR.glob("*.parquet"))
+    if not sources:
+        logger.error(f"❌ Aucun fichier dans {DATA_DIR} - lancer d'abord B_load_local_parquet.py")
+        return
+
+    PARTITIONED_DIR.mkdir(parents=True, exist_ok=True)
+    state = {} if args.force or not STATE_FILE.exists() else json.loads(STATE_FILE.read_text())
+    manifest = load_manifest()
+    con = duckdb.connect()
+
+    removed = remove_orphans(sources, state)
+    if removed:
+        STATE_FILE.write_text(json.dumps(state, indent=2, sort_keys=True))
+        logger.info(f"🧹 Partitions effacées pour {len(removed)} fichier(s) disparu(s): {', '.join(removed)}")
+
+    compacted = 0
+    for source in sources:
+        sha256 = source_hash(source, manifest)
+        if state.get(source.name) == sha256:
+            logger.info(f"✅ {source.name} déjà compacté")
+            continue
+        rows, n_partitions = compact_source(con, source)
+        state[source.name] = sha256
+        STATE_FILE.write_text(json.dumps(state, indent=2, sort_keys=True))
+        compacted += 1
+        logger.success(f"✅ {source.name}: {rows:,} lignes → {n_partitions} partition(s)")
+
+    con.close()
+    size_mb = sum(p.stat().st_size for p in PARTITIONED_DIR.glob("*/*/*.parquet")) / 1024 / 1024
+    logger.success(f"✅ Compaction terminée: {compacted} fichier(s) réécrit(s), "
+                   f"{size_mb:.0f} MB dans {PARTITIONED_DIR}/")
+
+if __name__ == "__main__":
+    main()
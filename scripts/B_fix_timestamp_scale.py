@@ -0,0 +1,38 @@
+"""
+Étape 1.2 (correctif) : Échelle des horodatages dans RAW.yellow_taxi_trips
+Objectif : Corriger en place les lignes chargées avant la conversion des
+microsecondes au COPY, pour que les requêtes filtrent sur la colonne brute.
+"""
+
+import snowflake.connector
+from loguru import logger
+from dotenv import load_dotenv
+import os
+from pathlib import Path
+from io import StringIO
+
+load_dotenv()
+
+def main():
+    logger.info("🕒 Correction de l'échelle des horodatages (microsecondes lues comme secondes)")
+
+    # Connexion Snowflake
+    conn = snowflake.connector.connect(
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        warehouse="NYC_TAXI_WH",
+        database="NYC_TAXI_DB",
+        schema="RAW",
+        role="NYCTRANSFORM"
+    )
+
+    sql = Path("SQL/Snowflake/fix_timestamp_scale.sql").read_text()
+    for cur in conn.execute_stream(StringIO(sql)):
+        if cur.description and cur.description[0][0] == "number of rows updated":
+            logger.success(f"✅ {cur.fetchone()[0]:,} lignes corrigées")
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
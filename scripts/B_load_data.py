@@ -1,58 +1,180 @@
 """
 Étape 1.2 : Chargement des Données (2024-2025)
 Objectif : Charger tous les mois de janvier 2024 à aujourd'hui dans RAW.yellow_taxi_trips
+
+Chargement en pipeline : pendant qu'un mois est envoyé (PUT ... PARALLEL) dans
+le stage nommé RAW.yellow_taxi_stage, le suivant se télécharge dans un thread.
+Un seul COPY INTO ... PATTERN charge ensuite tous les fichiers en parallèle
+côté Snowflake, et son résultat donne le nombre de lignes par fichier.
+
+Chargement incrémental : RAW.load_ledger garde pour chaque fichier source son
+mois, son empreinte SHA-256, ses lignes et sa date de chargement. Seuls les mois
+nouveaux ou republiés (empreinte différente) sont envoyés, puis remplacés dans
+RAW.yellow_taxi_trips par DELETE + COPY dans une même transaction (colonne
+SOURCE_FILE). Le premier chargement sans registre repart d'une table vide,
+et seulement si tous les mois ont pu être envoyés dans le stage.
+
+Les horodatages TLC sont des entiers en microsecondes : le COPY les convertit
+explicitement (TO_TIMESTAMP_NTZ(..., 6)) au lieu de les laisser lire comme des
+secondes, ce qui permet de filtrer directement sur la colonne brute.
 """
 
-import httpx
+import queue
+import threading
+
 import snowflake.connector
-from pathlib import Path
 from loguru import logger
 from dotenv import load_dotenv
 import os
 
+from tlc_download import sync_months
+
 load_dotenv()
 
-def load_month(year_month, conn):
-    """Charger un mois de données"""
+STAGE_NAME = "yellow_taxi_stage"
+LEDGER_TABLE = "load_ledger"
+PUT_PARALLEL = 8     # Threads d'upload par fichier
+DOWNLOAD_AHEAD = 2   # Mois téléchargés en avance pendant les PUT
+
+# Colonne RAW -> expression sur le champ Parquet ($1:<nom TLC>)
+PARQUET_COLUMNS = {
+    "vendorid": "$1:VendorID::NUMBER",
+    "tpep_pickup_datetime": "TO_TIMESTAMP_NTZ($1:tpep_pickup_datetime::NUMBER, 6)",
+    "tpep_dropoff_datetime": "TO_TIMESTAMP_NTZ($1:tpep_dropoff_datetime::NUMBER, 6)",
+    "passenger_count": "$1:passenger_count::FLOAT",
+    "trip_distance": "$1:trip_distance::FLOAT",
+    "ratecodeid": "$1:RatecodeID::FLOAT",
+    "store_and_fwd_flag": "$1:store_and_fwd_flag::VARCHAR",
+    "pulocationid": "$1:PULocationID::NUMBER",
+    "dolocationid": "$1:DOLocationID::NUMBER",
+    "payment_type": "$1:payment_type::NUMBER",
+    "fare_amount": "$1:fare_amount::FLOAT",
+    "extra": "$1:extra::FLOAT",
+    "mta_tax": "$1:mta_tax::FLOAT",
+    "tip_amount": "$1:tip_amount::FLOAT",
+    "tolls_amount": "$1:tolls_amount::FLOAT",
+    "improvement_surcharge": "$1:improvement_surcharge::FLOAT",
+    "total_amount": "$1:total_amount::FLOAT",
+    "congestion_surcharge": "$1:congestion_surcharge::FLOAT",
+    "airport_fee": "$1:Airport_fee::FLOAT",
+    "source_file": "METADATA$FILENAME",
+}
+
+def create_stage(conn):
+    """Stage nommé partagé par tous les mois, registre des chargements et colonne SOURCE_FILE"""
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE STAGE IF NOT EXISTS {STAGE_NAME} FILE_FORMAT = (TYPE = 'PARQUET')")
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LEDGER_TABLE} (
+            source_file  VARCHAR PRIMARY KEY,
+            month        VARCHAR(7),
+            content_hash VARCHAR(64),
+            rows_loaded  NUMBER,
+            loaded_at    TIMESTAMP_NTZ
+        )
+    """)
+    cursor.execute("ALTER TABLE yellow_taxi_trips ADD COLUMN IF NOT EXISTS source_file VARCHAR")
+
+def read_ledger(conn):
+    """Empreinte du dernier chargement de chaque mois"""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT month, content_hash FROM {LEDGER_TABLE}")
+    return dict(cursor.fetchall())
+
+def start_downloads(months):
+    """Lancer la synchronisation dans un thread ; les mois vérifiés arrivent dans la file"""
+    ready = queue.Queue()
+
+    def worker():
+        try:
+            sync_months(months, max_files=DOWNLOAD_AHEAD, on_result=lambda _, result: ready.put(result))
+        finally:
+            ready.put(None)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return ready
+
+def put_month(result, conn):
+    """Envoyer un mois téléchargé dans le stage nommé"""
     cursor = conn.cursor()
-    url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_{year_month}.parquet"
-    local_file = Path(f"temp_{year_month.replace('-', '_')}.parquet")
-    
+
     try:
-        # Télécharger
-        logger.info(f"📥 Téléchargement {year_month}...")
-        with httpx.stream("GET", url, timeout=300.0) as response:
-            response.raise_for_status()
-            with open(local_file, "wb") as file:
-                for chunk in response.iter_bytes(chunk_size=8192):
-                    file.write(chunk)
-        
-        # Upload vers Snowflake
-        stage_name = f"stage_{year_month.replace('-', '_')}"
-        cursor.execute(f"CREATE OR REPLACE TEMP STAGE {stage_name}")
-        cursor.execute(f"PUT file://{local_file.absolute()} @{stage_name} AUTO_COMPRESS=FALSE")
-        
-        cursor.execute(f"""
-            COPY INTO yellow_taxi_trips
-            FROM @{stage_name}
-            FILE_FORMAT = (TYPE = 'PARQUET')
-            MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
-        """)
-        
-        # Nettoyer
-        local_file.unlink()
-        logger.success(f"✅ {year_month} chargé")
+        if not result.ok:
+            raise RuntimeError(result.error)
+        cursor.execute(
+            f"PUT file://{result.path.absolute()} @{STAGE_NAME} "
+            f"AUTO_COMPRESS=FALSE OVERWRITE=TRUE PARALLEL={PUT_PARALLEL}"
+        )
+        logger.info(f"⬆️ {result.month} envoyé dans @{STAGE_NAME} ({result.rows:,} lignes)")
         return True
-        
+
     except Exception as e:
-        logger.error(f"❌ Erreur {year_month}: {e}")
-        if local_file.exists():
-            local_file.unlink()
+        logger.error(f"❌ Erreur {result.month}: {e}")
         return False
 
+def replace_months(results, conn, full_reload):
+    """Remplacer les mois envoyés dans une seule transaction ; renvoie le résultat par fichier"""
+    cursor = conn.cursor()
+    files = [result.path.name for result in results]
+    names = "|".join(result.month.replace("-", "_") for result in results)
+    # Sans registre, les lignes déjà présentes n'ont pas de SOURCE_FILE : on repart de zéro
+    legacy = "OR source_file IS NULL" if full_reload else ""
+
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute(
+            f"DELETE FROM yellow_taxi_trips WHERE source_file IN ({', '.join(['%s'] * len(files))}) {legacy}",
+            files,
+        )
+        cursor.execute(f"""
+            COPY INTO yellow_taxi_trips ({', '.join(PARQUET_COLUMNS)})
+            FROM (
+                SELECT {', '.join(PARQUET_COLUMNS.values())}
+                FROM @{STAGE_NAME}
+            )
+            PATTERN = '.*yellow_tripdata_({names})[.]parquet'
+            FILE_FORMAT = (TYPE = 'PARQUET')
+            FORCE = TRUE
+        """)
+        cols = [d[0].lower() for d in cursor.description]
+        copied = [dict(zip(cols, row)) for row in cursor.fetchall()]
+        failed = [f["file"] for f in copied if f["status"] != "LOADED"]
+        if failed:
+            raise RuntimeError(f"COPY incomplet: {', '.join(failed)}")
+
+        rows = {f["file"].rsplit("/", 1)[-1]: f["rows_loaded"] for f in copied}
+        cursor.execute(f"""
+            MERGE INTO {LEDGER_TABLE} l
+            USING (
+                SELECT column1 AS source_file, column2 AS month, column3 AS content_hash, column4 AS rows_loaded
+                FROM VALUES {', '.join(['(%s, %s, %s, %s)'] * len(results))}
+            ) s
+            ON l.source_file = s.source_file
+            WHEN MATCHED THEN UPDATE SET
+                month = s.month, content_hash = s.content_hash,
+                rows_loaded = s.rows_loaded, loaded_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT (source_file, month, content_hash, rows_loaded, loaded_at)
+                VALUES (s.source_file, s.month, s.content_hash, s.rows_loaded, CURRENT_TIMESTAMP())
+        """, [v for r in results for v in (r.path.name, r.month, r.sha256, rows.get(r.path.name, 0))])
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    return copied
+
+def log_copy_summary(files):
+    """Résumé des lignes chargées par fichier, d'après le résultat du COPY"""
+    for f in sorted(files, key=lambda f: f["file"]):
+        name = f["file"].rsplit("/", 1)[-1]
+        if f["status"] == "LOADED":
+            logger.success(f"✅ {name}: {f['rows_loaded']:,} lignes")
+        else:
+            logger.error(f"❌ {name}: {f['status']} - {f.get('first_error')}")
+    return sum(f["rows_loaded"] or 0 for f in files)
+
 def main():
     logger.info("🚀 Étape 1.2 : Chargement des données NYC Taxi 2024-2025")
-    
+
     # Connexion Snowflake
     conn = snowflake.connector.connect(
         account=os.getenv("SNOWFLAKE_ACCOUNT"),
@@ -63,31 +185,53 @@ def main():
         schema="RAW",
         role="NYCTRANSFORM"
     )
-    
-    cursor = conn.cursor()
-    cursor.execute("TRUNCATE TABLE yellow_taxi_trips")
-    logger.info("🧹 Table RAW.yellow_taxi_trips vidée")
-    
+    create_stage(conn)
+    ledger = read_ledger(conn)
+    if not ledger:
+        logger.info("📒 Registre vide : rechargement complet de RAW.yellow_taxi_trips")
+
     # Tous les mois 2024
     months_2024 = [f"2024-{i:02d}" for i in range(1, 13)]
     # Mois 2025 disponibles (jusqu'à septembre)
     months_2025 = [f"2025-{i:02d}" for i in range(1, 10)]
-    
+
     all_months = months_2024 + months_2025
-    logger.info(f"📅 Mois à charger: {len(all_months)}")
-    
-    successful = 0
-    for month in all_months:
-        if load_month(month, conn):
-            successful += 1
-    
-    # Compter le total final
-    cursor.execute("SELECT COUNT(*) FROM yellow_taxi_trips")
-    row_count = cursor.fetchone()
-    total_count = row_count[0] if row_count else 0
-    
-    logger.success(f"✅ Chargement terminé: {successful}/{len(all_months)} mois - {total_count:,} lignes totales")
+    logger.info(f"📅 Mois à vérifier: {len(all_months)}")
+
+    # Téléchargement du mois N+1 pendant le PUT du mois N ; seuls les mois nouveaux ou modifiés partent
+    staged, up_to_date = [], 0
+    ready = start_downloads(all_months)
+    while (result := ready.get()) is not None:
+        if result.ok and ledger.get(result.month) == result.sha256:
+            up_to_date += 1
+        elif put_month(result, conn):
+            staged.append(result)
+
+    if not staged:
+        logger.success(f"✅ Rien à charger: {up_to_date}/{len(all_months)} mois déjà à jour")
+        conn.close()
+        return
+
+    # Sans registre, le remplacement efface aussi les lignes sans SOURCE_FILE : tous
+    # les mois doivent être dans le stage, sinon ceux en échec disparaîtraient de RAW
+    full_reload = not ledger
+    if full_reload and len(staged) != len(all_months) - up_to_date:
+        missing = sorted(set(all_months) - {result.month for result in staged})
+        logger.error(f"❌ Rechargement complet annulé (table inchangée), mois non envoyés: {', '.join(missing)}")
+        conn.close()
+        return
+
+    try:
+        files = replace_months(staged, conn, full_reload=full_reload)
+    except Exception as e:
+        logger.error(f"❌ Chargement annulé (table inchangée): {e}")
+        conn.close()
+        return
+    total_count = log_copy_summary(files)
+
+    logger.success(f"✅ Chargement terminé: {len(staged)} mois remplacés, {up_to_date} déjà à jour "
+                   f"- {total_count:,} lignes chargées")
     conn.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -6,44 +6,46 @@ Ce script de contournement télécharge les fichiers Parquets des trajets
 NYC Taxi directement en local (sauvegarde dans `data/yellow_taxi/`) au 
 lieu de les insérer dans un compte Snowflake. 
 Idéal pour alimenter `streamlit_dashboard_local.py`.
+
+Options :
+  --concurrency N   nombre de fichiers téléchargés simultanément (défaut 4)
+  --segments N      nombre de plages HTTP parallèles par fichier (défaut 1)
+  --sync            revérifier aussi les mois déjà présents (GET conditionnels
+                    ETag / Last-Modified) et retélécharger ceux republiés par TLC
+
+Un téléchargement interrompu reprend depuis son fichier `.part` au lancement
+suivant ; seuls les Parquet vérifiés apparaissent dans `data/yellow_taxi/`.
 ================================================================================
 """
 
-import httpx
-from pathlib import Path
+import argparse
 from loguru import logger
 
-def load_month(year_month):
-    """Charger un mois de données"""
-    url = f"https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_{year_month}.parquet"
-    data_dir = Path("data/yellow_taxi")
-    data_dir.mkdir(parents=True, exist_ok=True)
-    
-    local_file = data_dir / f"yellow_tripdata_{year_month.replace('-', '_')}.parquet"
-    
-    if local_file.exists():
-        logger.info(f"✅ {year_month} déjà téléchargé ({local_file.stat().st_size / 1024 / 1024:.1f} MB)")
-        return True
-        
-    try:
-        # Télécharger
-        logger.info(f"📥 Téléchargement {year_month}...")
-        with httpx.stream("GET", url, timeout=300.0) as response:
-            response.raise_for_status()
-            with open(local_file, "wb") as file:
-                for chunk in response.iter_bytes(chunk_size=8192):
-                    file.write(chunk)
-        
-        logger.success(f"✅ {year_month} téléchargé avec succès")
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Erreur {year_month}: {e}")
-        if local_file.exists():
-            local_file.unlink()
-        return False
+from tlc_download import SYNC_REPORT_NAME, download_months, sync_months
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Téléchargement local des Parquet NYC Taxi")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Nombre de fichiers téléchargés simultanément")
+    parser.add_argument("--segments", type=int, default=1,
+                        help="Nombre de plages HTTP parallèles par fichier")
+    parser.add_argument("--sync", action="store_true",
+                        help="Retélécharger les mois modifiés à la source (manifeste ETag/Last-Modified)")
+    return parser.parse_args()
+
+def sync(all_months, args):
+    """Synchronisation incrémentale : seuls les mois nouveaux ou republiés sont téléchargés"""
+    report = sync_months(all_months, max_files=args.concurrency, segments=args.segments)
+    for month, error in report["errors"].items():
+        logger.error(f"❌ Erreur {month}: {error}")
+    logger.info(f"🆕 Nouveaux: {', '.join(report['new']) or 'aucun'}")
+    logger.info(f"♻️ Modifiés: {', '.join(report['changed']) or 'aucun'}")
+    logger.success(f"✅ Synchronisation terminée: {len(report['unchanged'])} inchangés, "
+                   f"{len(report['new']) + len(report['changed'])} à rafraîchir en aval "
+                   f"(voir data/yellow_taxi/{SYNC_REPORT_NAME})")
 
 def main():
+    args = parse_args()
     logger.info("🚀 Étape 1.2 : Téléchargement des données NYC Taxi 2024-2025")
     
     # Tous les mois 2024
@@ -52,14 +54,26 @@ def main():
     months_2025 = [f"2025-{i:02d}" for i in range(1, 10)]
     
     all_months = months_2024 + months_2025
-    logger.info(f"📅 Mois à charger: {len(all_months)}")
+    logger.info(f"📅 Mois à charger: {len(all_months)} "
+                f"({args.concurrency} en parallèle, {args.segments} plage(s) par fichier)")
+    
+    if args.sync:
+        sync(all_months, args)
+        return
+    
+    results = download_months(all_months, max_files=args.concurrency, segments=args.segments)
+    for result in results:
+        size_mb = result.size / 1024 / 1024
+        if result.skipped:
+            logger.info(f"✅ {result.month} déjà téléchargé ({size_mb:.1f} MB)")
+        elif result.ok:
+            logger.success(f"✅ {result.month} téléchargé ({size_mb:.1f} MB, {result.rows:,} lignes "
+                           f"en {result.seconds:.1f}s)")
+        else:
+            logger.error(f"❌ Erreur {result.month}: {result.error}")
     
-    successful = 0
-    for month in all_months:
-        if load_month(month):
-            successful += 1
-            
+    successful = sum(result.ok for result in results)
     logger.success(f"✅ Chargement terminé: {successful}/{len(all_months)} mois prêts en local")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -11,15 +11,61 @@ from pathlib import Path
 
 load_dotenv()
 
+# Règles de qualité : (clé, libellé, condition SQL). Le bit i du masque d'une
+# ligne vaut 1 si elle enfreint la règle i.
+QUALITY_RULES = [
+    ("null_count", "❌ Valeurs manquantes", """
+        vendorid IS NULL
+        OR tpep_pickup_datetime IS NULL
+        OR tpep_dropoff_datetime IS NULL
+        OR passenger_count IS NULL
+        OR trip_distance IS NULL
+        OR ratecodeid IS NULL
+        OR store_and_fwd_flag IS NULL
+        OR pulocationid IS NULL
+        OR dolocationid IS NULL
+        OR payment_type IS NULL
+        OR fare_amount IS NULL
+        OR total_amount IS NULL
+        OR congestion_surcharge IS NULL
+        OR airport_fee IS NULL"""),
+    ("negative_count", "💰 Montants négatifs", "fare_amount < 0 OR total_amount < 0"),
+    ("zero_distance_count", "📏 Distance zéro", "trip_distance = 0"),
+    ("extreme_count", "🚨 Distances extrêmes (>1000 miles)", "trip_distance > 1000"),
+    ("incoherent_dates_count", "📅 Dates incohérentes", "tpep_dropoff_datetime <= tpep_pickup_datetime"),
+]
+
+def failure_mask_sql():
+    """Masque des règles enfreintes par ligne (une condition NULL ne compte pas)"""
+    return "\n        + ".join(
+        f"IFF(COALESCE({condition.strip()}, FALSE), {1 << i}, 0)"
+        for i, (_, _, condition) in enumerate(QUALITY_RULES)
+    )
+
+def rule_labels(mask):
+    """Libellés des règles présentes dans un masque"""
+    return [label for i, (_, label, _) in enumerate(QUALITY_RULES) if mask & (1 << i)]
+
 def analyze_data_quality(conn):
-    """Analyser la qualité des données selon le brief"""
+    """Analyser la qualité des données selon le brief, en un seul parcours de la table"""
     cursor = conn.cursor()
     
     logger.info("🔍 Analyse de la qualité des données...")
     
-    # 1. Compter le total de lignes
-    cursor.execute("SELECT COUNT(*) FROM yellow_taxi_trips")
-    total_rows = cursor.fetchone()[0]
+    # Un seul parcours : nombre de lignes par combinaison de règles enfreintes
+    cursor.execute(f"""
+        SELECT failure_mask, COUNT(*) AS row_count
+        FROM (
+            SELECT
+                {failure_mask_sql()} AS failure_mask
+            FROM yellow_taxi_trips
+        )
+        GROUP BY failure_mask
+        ORDER BY failure_mask
+    """)
+    breakdown = dict(cursor.fetchall())
+    
+    total_rows = sum(breakdown.values())
     logger.info(f"📊 Total lignes: {total_rows}")
     
     # Vérifier si on a des données
@@ -27,95 +73,31 @@ def analyze_data_quality(conn):
         logger.warning("❌ Aucune donnée dans la table - Analyse impossible")
         return {'total_rows': 0}
     
-    # 2. Valeurs manquantes (NULL) - Vérifier toutes les colonnes importantes
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as null_count,
-            ROUND((COUNT(*) * 100.0 / {total}) , 2) as null_percentage
-        FROM yellow_taxi_trips 
-        WHERE vendorid IS NULL 
-           OR tpep_pickup_datetime IS NULL 
-           OR tpep_dropoff_datetime IS NULL
-           OR passenger_count IS NULL 
-           OR trip_distance IS NULL
-           OR ratecodeid IS NULL
-           OR store_and_fwd_flag IS NULL
-           OR pulocationid IS NULL 
-           OR dolocationid IS NULL 
-           OR payment_type IS NULL
-           OR fare_amount IS NULL 
-           OR total_amount IS NULL
-           OR congestion_surcharge IS NULL
-           OR airport_fee IS NULL
-    """.format(total=total_rows))
-    
-    null_count, null_pct = cursor.fetchone()
-    logger.warning(f"❌ Valeurs manquantes: {null_count} ({null_pct}%)")
-    
-    # 3. Montants négatifs
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as negative_count,
-            ROUND((COUNT(*) * 100.0 / {total}), 2) as negative_percentage
-        FROM yellow_taxi_trips 
-        WHERE fare_amount < 0 OR total_amount < 0
-    """.format(total=total_rows))
-    
-    neg_count, neg_pct = cursor.fetchone()
-    logger.warning(f"💰 Montants négatifs: {neg_count} ({neg_pct}%)")
-    
-    # 4. Trajets avec distance zéro
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as zero_distance_count,
-            ROUND((COUNT(*) * 100.0 / {total}), 2) as zero_distance_percentage
-        FROM yellow_taxi_trips 
-        WHERE trip_distance = 0
-    """.format(total=total_rows))
-    
-    zero_count, zero_pct = cursor.fetchone()
-    logger.warning(f"📏 Distance zéro: {zero_count} ({zero_pct}%)")
-    
-    # 5. Valeurs extrêmes (distance > 1000 miles)
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as extreme_count,
-            ROUND((COUNT(*) * 100.0 / {total}), 2) as extreme_percentage
-        FROM yellow_taxi_trips 
-        WHERE trip_distance > 1000
-    """.format(total=total_rows))
-    
-    extreme_count, extreme_pct = cursor.fetchone()
-    logger.warning(f"🚨 Distances extrêmes (>1000 miles): {extreme_count} ({extreme_pct}%)")
-    
-    # 6. Dates incohérentes (dropoff avant pickup)
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as incoherent_dates_count,
-            ROUND((COUNT(*) * 100.0 / {total}), 2) as incoherent_dates_percentage
-        FROM yellow_taxi_trips 
-        WHERE tpep_dropoff_datetime <= tpep_pickup_datetime
-    """.format(total=total_rows))
-    
-    incoherent_count, incoherent_pct = cursor.fetchone()
-    logger.warning(f"📅 Dates incohérentes: {incoherent_count} ({incoherent_pct}%)")
-    
-    # Résumé des problèmes identifiés
-    total_problematic = null_count + neg_count + zero_count + extreme_count + incoherent_count
-    clean_rows = total_rows - total_problematic
+    stats = {'total_rows': total_rows}
+    
+    # Comptes par règle : somme des combinaisons qui contiennent la règle
+    for i, (key, label, _) in enumerate(QUALITY_RULES):
+        count = sum(rows for mask, rows in breakdown.items() if mask & (1 << i))
+        stats[key] = count
+        logger.warning(f"{label}: {count} ({round(count * 100.0 / total_rows, 2)}%)")
+    
+    # Lignes en échec sur plusieurs règles (comptées une seule fois dans les lignes propres)
+    overlaps = sorted(
+        ((mask, rows) for mask, rows in breakdown.items() if mask & (mask - 1)),
+        key=lambda item: -item[1],
+    )
+    for mask, rows in overlaps:
+        logger.info(f"🔀 {' + '.join(rule_labels(mask))}: {rows}")
+    
+    clean_rows = breakdown.get(0, 0)
     clean_percentage = round((clean_rows * 100.0 / total_rows), 2)
     
-    logger.info(f"✅ Lignes propres estimées: {clean_rows} ({clean_percentage}%)")
+    logger.info(f"✅ Lignes propres: {clean_rows} ({clean_percentage}%)")
     
-    return {
-        'total_rows': total_rows,
-        'null_count': null_count,
-        'negative_count': neg_count,
-        'zero_distance_count': zero_count,
-        'extreme_count': extreme_count,
-        'incoherent_dates_count': incoherent_count,
-        'clean_rows_estimate': clean_rows
-    }
+    stats['failure_breakdown'] = {mask: rows for mask, rows in breakdown.items() if mask}
+    stats['overlap_rows'] = sum(rows for _, rows in overlaps)
+    stats['clean_rows'] = clean_rows
+    return stats
 
 def main():
     logger.info("🔍 Étape 1.3 : Analyse et Nettoyage des Données")
@@ -141,11 +123,16 @@ def main():
     report_path.parent.mkdir(exist_ok=True)
     
     if stats.get('total_rows', 0) > 0:
+        combinations = "\n".join(
+            f"| {' + '.join(rule_labels(mask))} | {rows:,} |"
+            for mask, rows in sorted(stats['failure_breakdown'].items(), key=lambda item: -item[1])
+        )
         report_content = f"""# Rapport de Qualité des Données NYC Taxi
 
 ## 📊 Résumé Général
 - **Total lignes analysées** : {stats['total_rows']:,}
-- **Lignes propres estimées** : {stats['clean_rows_estimate']:,} ({round(stats['clean_rows_estimate']*100/stats['total_rows'], 2)}%)
+- **Lignes propres** : {stats['clean_rows']:,} ({round(stats['clean_rows']*100/stats['total_rows'], 2)}%)
+- **Lignes en échec sur plusieurs règles** : {stats['overlap_rows']:,}
 
 ## ❌ Problèmes Identifiés
 
@@ -169,6 +156,11 @@ def main():
 - **Nombre** : {stats['incoherent_dates_count']:,}
 - **Pourcentage** : {round(stats['incoherent_dates_count']*100/stats['total_rows'], 2)}%
 
+### 6. Combinaisons de Problèmes
+| Règles enfreintes | Lignes |
+|---|---:|
+{combinations}
+
 ## ✅ Actions de Nettoyage Appliquées
 - Filtrage des montants négatifs
 - Exclusion des trajets avec dates incohérentes  
@@ -177,7 +169,7 @@ def main():
 - Filtrage des distances entre 0.1 et 100 miles
 
 ## 📈 Résultat Final
-Après nettoyage, environ **{round(stats['clean_rows_estimate']*100/stats['total_rows'], 2)}%** des données sont utilisables pour l'analyse.
+Après nettoyage, **{round(stats['clean_rows']*100/stats['total_rows'], 2)}%** des données sont utilisables pour l'analyse.
 """
     else:
         report_content = "# Rapport de Qualité des Données NYC Taxi\n\n❌ Aucune donnée trouvée dans la table RAW.yellow_taxi_trips"
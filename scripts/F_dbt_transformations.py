@@ -1,8 +1,12 @@
 """
 Étape F : Transformations avec dbt Core
 Objectif : Utiliser dbt pour les transformations au lieu du script Python
+
+Cibles (nyc_taxi_pipeline/profiles.yml) : `snowflake` par défaut, `duckdb`
+pour exécuter les mêmes modèles en local sur les Parquet de data/yellow_taxi/.
 """
 
+import argparse
 from loguru import logger
 from pathlib import Path
 import subprocess
@@ -32,7 +36,13 @@ def run_dbt_command(command, project_dir="nyc_taxi_pipeline"):
         return False
 
 def main():
-    logger.info("🔄 Étape F : Transformations avec dbt Core")
+    parser = argparse.ArgumentParser(description="Transformations dbt Core")
+    parser.add_argument("--target", choices=["snowflake", "duckdb"], default="snowflake",
+                        help="Cible dbt (profiles.yml du projet)")
+    args = parser.parse_args()
+    target = f"--target {args.target}"
+
+    logger.info(f"🔄 Étape F : Transformations avec dbt Core (cible {args.target})")
     
     project_dir = Path("nyc_taxi_pipeline")
     if not project_dir.exists():
@@ -41,7 +51,7 @@ def main():
     
     # Vérifier la connexion dbt
     logger.info("🔌 Test de connexion dbt...")
-    if not run_dbt_command("dbt debug"):
+    if not run_dbt_command(f"dbt debug {target}"):
         logger.error("❌ Problème de connexion dbt")
         return
     
@@ -53,17 +63,17 @@ def main():
     
     # Exécuter les transformations
     logger.info("🚀 Exécution des modèles dbt...")
-    if not run_dbt_command("dbt run"):
+    if not run_dbt_command(f"dbt run {target}"):
         logger.error("❌ Échec des transformations dbt")
         return
     
     # Exécuter les tests
     logger.info("🧪 Exécution des tests dbt...")
-    run_dbt_command("dbt test")
+    run_dbt_command(f"dbt test {target}")
     
     # Générer la documentation
     logger.info("📚 Génération de la documentation...")
-    if run_dbt_command("dbt docs generate"):
+    if run_dbt_command(f"dbt docs generate {target}"):
         logger.success("📖 Documentation générée dans target/")
     
     logger.success("✅ Transformations dbt terminées!")
@@ -0,0 +1,416 @@
+"""
+Moteur de téléchargement des fichiers Parquet TLC
+Plusieurs mois en parallèle (asyncio + httpx), découpage optionnel de chaque
+fichier en plages HTTP (Range) et écritures disque par gros blocs.
+
+Chaque téléchargement passe par un fichier `.part` repris par requêtes Range
+après une coupure, puis n'est renommé dans data/yellow_taxi/ qu'une fois le
+Parquet vérifié (marqueurs PAR1 et nombre de lignes lisible dans le footer).
+
+Le manifeste data/yellow_taxi/manifest.json garde pour chaque mois l'ETag, le
+Last-Modified, la taille et l'empreinte SHA-256 du fichier local. La
+synchronisation envoie des GET conditionnels et ne retélécharge que les mois
+republiés par TLC ; le rapport sync_report.json liste les mois modifiés.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import pyarrow.parquet as pq
+from loguru import logger
+
+TLC_BASE_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data"
+DATA_DIR = Path("data/yellow_taxi")
+
+CHUNK_SIZE = 1024 * 1024             # Taille des lectures réseau
+BUFFER_SIZE = 8 * 1024 * 1024        # Taille des écritures disque
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024   # En dessous, pas de découpage en plages
+PARQUET_MAGIC = b"PAR1"
+
+MANIFEST_NAME = "manifest.json"         # Versions locales, une entrée par mois
+SYNC_REPORT_NAME = "sync_report.json"   # Mois modifiés lors de la dernière synchro
+SYNC_STATUSES = ("new", "changed", "unchanged", "failed")
+
+
+class SourceChanged(Exception):
+    """Le fichier distant a changé depuis le début du téléchargement"""
+
+
+def month_url(year_month, base_url=TLC_BASE_URL):
+    """URL du fichier Parquet d'un mois (format AAAA-MM)"""
+    return f"{base_url}/yellow_tripdata_{year_month}.parquet"
+
+
+def local_path(year_month, data_dir=DATA_DIR):
+    """Chemin local du fichier Parquet d'un mois"""
+    return Path(data_dir) / f"yellow_tripdata_{year_month.replace('-', '_')}.parquet"
+
+
+@dataclass
+class DownloadResult:
+    """Résultat du téléchargement d'un mois"""
+    month: str
+    path: Path
+    size: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    skipped: bool = False
+    sha256: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    error: str | None = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+async def _write_response(response, file, buffer_size):
+    """Copier le corps d'une réponse dans un fichier par blocs de buffer_size"""
+    buffer = bytearray()
+    written = 0
+    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+        buffer += chunk
+        if len(buffer) >= buffer_size:
+            await asyncio.to_thread(file.write, bytes(buffer))
+            written += len(buffer)
+            buffer.clear()
+    if buffer:
+        await asyncio.to_thread(file.write, bytes(buffer))
+        written += len(buffer)
+    return written
+
+
+def _split_ranges(size, segments):
+    """Découper [0, size) en au plus `segments` plages contiguës"""
+    segments = max(1, min(segments, size // MIN_SEGMENT_SIZE))
+    step = -(-size // segments)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def _validator(headers):
+    """Valeur If-Range identifiant la version distante (ETag fort, sinon Last-Modified)"""
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("last-modified")
+
+
+def _part_paths(path, count):
+    """Fichiers temporaires d'un téléchargement : un par plage"""
+    part = path.with_name(path.name + ".part")
+    if count == 1:
+        return [part]
+    return [part.with_name(f"{part.name}{i}") for i in range(count)]
+
+
+def _clear_parts(path):
+    """Supprimer les fichiers temporaires (plages et métadonnées) d'un téléchargement"""
+    for stale in path.parent.glob(path.name + ".part*"):
+        stale.unlink()
+
+
+def file_sha256(path):
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def verify_parquet(path, expected_size=None):
+    """Vérifier qu'un fichier est un Parquet complet ; renvoie son nombre de lignes"""
+    size = path.stat().st_size
+    if expected_size is not None and size != expected_size:
+        raise ValueError(f"taille {size} octets au lieu de {expected_size}")
+    with open(path, "rb") as file:
+        head = file.read(4)
+        file.seek(max(size - 4, 0))
+        tail = file.read(4)
+    if head != PARQUET_MAGIC or tail != PARQUET_MAGIC:
+        raise ValueError("marqueur PAR1 absent (fichier tronqué)")
+    rows = pq.read_metadata(path).num_rows
+    if rows <= 0:
+        raise ValueError("aucune ligne dans le fichier")
+    return rows
+
+
+async def _fetch_part(client, url, part, start, end, validator, buffer_size):
+    """Compléter le fichier temporaire d'une plage en reprenant là où il s'est arrêté"""
+    done = part.stat().st_size if part.exists() else 0
+    if start + done > end:
+        return 0
+    headers = {"Range": f"bytes={start + done}-{end}"}
+    if validator:
+        headers["If-Range"] = validator
+    async with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise SourceChanged(f"plage {start + done}-{end} refusée (fichier distant modifié ?)")
+        with open(part, "ab") as file:
+            return await _write_response(response, file, buffer_size)
+
+
+async def _fetch_plain(client, url, part, buffer_size):
+    """Téléchargement sans reprise possible (serveur sans support des plages)"""
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+        with open(part, "wb") as file:
+            await _write_response(response, file, buffer_size)
+        return response.headers
+
+
+def _concat(parts, target):
+    """Assembler les plages dans le fichier temporaire final"""
+    with open(target, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as src:
+                shutil.copyfileobj(src, out, BUFFER_SIZE)
+    for part in parts:
+        part.unlink()
+
+
+async def _fetch(client, url, path, segments, buffer_size):
+    """Télécharger un fichier dans path.part (reprise par plages)
+
+    Renvoie la taille attendue (None si inconnue) et les en-têtes de la version téléchargée.
+    """
+    head = await client.head(url)
+    head.raise_for_status()
+    size = int(head.headers.get("content-length", 0))
+    if head.headers.get("accept-ranges") != "bytes" or not size:
+        _clear_parts(path)
+        headers = await _fetch_plain(client, url, _part_paths(path, 1)[0], buffer_size)
+        return None, headers
+
+    ranges = _split_ranges(size, segments)
+    validator = _validator(head.headers)
+    state = {"url": url, "validator": validator, "size": size, "ranges": ranges}
+    meta = path.with_name(path.name + ".part.json")
+    if not meta.exists() or json.loads(meta.read_text()) != json.loads(json.dumps(state)):
+        _clear_parts(path)
+        meta.write_text(json.dumps(state))
+
+    parts = _part_paths(path, len(ranges))
+    await asyncio.gather(*(
+        _fetch_part(client, url, part, start, end, validator, buffer_size)
+        for part, (start, end) in zip(parts, ranges)
+    ))
+    if len(parts) > 1:
+        await asyncio.to_thread(_concat, parts, _part_paths(path, 1)[0])
+    return size, head.headers
+
+
+async def _download_month(client, semaphore, year_month, data_dir, base_url, segments,
+                          buffer_size, retries, force=False):
+    """Télécharger un mois en respectant la limite de fichiers simultanés
+
+    Avec force=True, le fichier local existant est conservé jusqu'au renommage
+    de la nouvelle version vérifiée.
+    """
+    path = local_path(year_month, data_dir)
+    if path.exists() and not force:
+        try:
+            rows = verify_parquet(path)
+            return DownloadResult(year_month, path, size=path.stat().st_size, rows=rows, skipped=True)
+        except Exception as e:
+            logger.warning(f"⚠️ {year_month} local invalide ({e}), nouveau téléchargement")
+            path.unlink()
+
+    async with semaphore:
+        logger.info(f"📥 Téléchargement {year_month}...")
+        started = time.perf_counter()
+        url = month_url(year_month, base_url)
+        part = _part_paths(path, 1)[0]
+        error = "aucune tentative"
+        for attempt in range(1, retries + 1):
+            try:
+                expected, headers = await _fetch(client, url, path, segments, buffer_size)
+                rows = verify_parquet(part, expected)
+                sha256 = await asyncio.to_thread(file_sha256, part)
+                os.replace(part, path)
+                _clear_parts(path)
+                return DownloadResult(year_month, path, size=path.stat().st_size, rows=rows,
+                                      seconds=time.perf_counter() - started, sha256=sha256,
+                                      etag=headers.get("etag"),
+                                      last_modified=headers.get("last-modified"))
+            except (httpx.TransportError, SourceChanged) as e:
+                # Les plages déjà reçues sont conservées : la tentative suivante reprend
+                if isinstance(e, SourceChanged):
+                    _clear_parts(path)
+                logger.warning(f"⚠️ {year_month} interrompu ({attempt}/{retries}) : {e or type(e).__name__}")
+                error = str(e) or type(e).__name__
+            except ValueError as e:
+                _clear_parts(path)
+                logger.warning(f"⚠️ {year_month} invalide ({attempt}/{retries}) : {e}")
+                error = str(e)
+            except Exception as e:
+                return DownloadResult(year_month, path, error=str(e) or type(e).__name__)
+        return DownloadResult(year_month, path, error=error)
+
+
+def _check_retries(retries):
+    if retries < 1:
+        raise ValueError(f"retries doit valoir au moins 1 (reçu {retries})")
+
+
+def _client(max_files, segments):
+    """Client HTTP partagé : une connexion par plage en cours"""
+    limits = httpx.Limits(max_connections=max_files * max(segments, 1))
+    timeout = httpx.Timeout(300.0, connect=30.0)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True)
+
+
+async def download_months_async(months, data_dir=DATA_DIR, base_url=TLC_BASE_URL,
+                                max_files=4, segments=1, buffer_size=BUFFER_SIZE, retries=3,
+                                on_result=None):
+    """Télécharger plusieurs mois avec au plus max_files fichiers en cours
+
+    on_result(result) est appelé dès qu'un mois est prêt, sans attendre les autres.
+    """
+    _check_retries(retries)
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(max_files)
+
+    async def download(client, month):
+        result = await _download_month(client, semaphore, month, data_dir, base_url, segments,
+                                       buffer_size, retries)
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    async with _client(max_files, segments) as client:
+        results = await asyncio.gather(*(download(client, month) for month in months))
+    _record(results, data_dir)
+    return results
+
+
+def download_months(months, **kwargs):
+    """Version synchrone de download_months_async (résultats dans l'ordre des mois)"""
+    return asyncio.run(download_months_async(months, **kwargs))
+
+
+def fetch_month(year_month, **kwargs):
+    """Télécharger (ou valider en cache) un seul mois"""
+    return download_months([year_month], **kwargs)[0]
+
+
+# ---------------------------------------------------------------------------
+# Manifeste local et synchronisation incrémentale
+# ---------------------------------------------------------------------------
+def load_manifest(data_dir=DATA_DIR):
+    """Lire le manifeste {mois: etag, last_modified, size, sha256, rows, synced_at}"""
+    path = Path(data_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _write_json(path, payload):
+    """Écriture atomique d'un fichier JSON"""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _record(results, data_dir):
+    """Enregistrer dans le manifeste les mois effectivement téléchargés"""
+    downloaded = [r for r in results if r.ok and not r.skipped]
+    if not downloaded:
+        return
+    manifest = load_manifest(data_dir)
+    synced_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    for result in downloaded:
+        manifest[result.month] = {
+            "file": result.path.name,
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "size": result.size,
+            "sha256": result.sha256,
+            "rows": result.rows,
+            "synced_at": synced_at,
+        }
+    _write_json(Path(data_dir) / MANIFEST_NAME, manifest)
+
+
+async def _probe(client, url, entry):
+    """GET conditionnel limité au premier octet : False si la version distante est inchangée"""
+    headers = {"Range": "bytes=0-0"}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        return True
+
+
+async def _sync_month(client, semaphore, year_month, entry, data_dir, base_url, segments,
+                      buffer_size, retries):
+    """Comparer un mois à sa version distante ; renvoie (statut, résultat)"""
+    path = local_path(year_month, data_dir)
+    if entry and path.exists():
+        try:
+            if not await _probe(client, month_url(year_month, base_url), entry):
+                return "unchanged", DownloadResult(year_month, path, size=entry["size"], rows=entry["rows"],
+                                                   skipped=True, sha256=entry["sha256"], etag=entry["etag"],
+                                                   last_modified=entry["last_modified"])
+        except Exception as e:
+            return "failed", DownloadResult(year_month, path, error=str(e) or type(e).__name__)
+        previous = entry.get("sha256")
+    else:
+        previous = await asyncio.to_thread(file_sha256, path) if path.exists() else None
+
+    result = await _download_month(client, semaphore, year_month, data_dir, base_url, segments,
+                                   buffer_size, retries, force=path.exists())
+    if not result.ok:
+        return "failed", result
+    if previous is None:
+        return "new", result
+    # Republication à l'identique (nouvel ETag, même contenu) : rien à rafraîchir en aval
+    return ("unchanged" if result.sha256 == previous else "changed"), result
+
+
+async def sync_months_async(months, data_dir=DATA_DIR, base_url=TLC_BASE_URL,
+                            max_files=4, segments=1, buffer_size=BUFFER_SIZE, retries=3,
+                            on_result=None):
+    """Synchroniser les mois avec la source TLC et écrire le rapport des changements
+
+    on_result(status, result) est appelé dès qu'un mois est vérifié ; pour un mois
+    inchangé, result décrit le fichier local d'après le manifeste.
+    """
+    _check_retries(retries)
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(data_dir)
+    semaphore = asyncio.Semaphore(max_files)
+
+    async def sync(client, month):
+        status, result = await _sync_month(client, semaphore, month, manifest.get(month), data_dir,
+                                           base_url, segments, buffer_size, retries)
+        if on_result is not None:
+            on_result(status, result)
+        return status, result
+
+    async with _client(max_files, segments) as client:
+        outcomes = await asyncio.gather(*(sync(client, month) for month in months))
+    _record([result for _, result in outcomes], data_dir)
+
+    report = {"synced_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+    for status in SYNC_STATUSES:
+        report[status] = [m for m, (s, _) in zip(months, outcomes) if s == status]
+    report["errors"] = {m: r.error for m, (s, r) in zip(months, outcomes) if s == "failed"}
+    _write_json(Path(data_dir) / SYNC_REPORT_NAME, report)
+    return report
+
+
+def sync_months(months, **kwargs):
+    """Version synchrone de sync_months_async"""
+    return asyncio.run(sync_months_async(months, **kwargs))
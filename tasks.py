@@ -116,6 +116,66 @@ def load_data(c):
     console.print("📥 Étape 1.2 : Chargement des données...", style="blue")
     c.run("python scripts/B_load_data.py", pty=True)
 
+@task
+def fix_timestamps(c):
+    """Correctif ponctuel : horodatages RAW chargés avec la mauvaise échelle"""
+    console.print("🕒 Correction des horodatages RAW...", style="blue")
+    c.run("python scripts/B_fix_timestamp_scale.py", pty=True)
+
+@task
+def load_local(c, concurrency=4, segments=1):
+    """Alternative locale : téléchargement des Parquet dans data/yellow_taxi"""
+    console.print("📥 Téléchargement local des Parquet...", style="blue")
+    c.run(f"python scripts/B_load_local_parquet.py --concurrency {concurrency} --segments {segments}", pty=True)
+
+@task
+def sync_local(c, concurrency=4, segments=1):
+    """Alternative locale : retélécharger uniquement les mois republiés par TLC"""
+    console.print("🔄 Synchronisation des Parquet avec la source TLC...", style="blue")
+    c.run(f"python scripts/B_load_local_parquet.py --sync --concurrency {concurrency} --segments {segments}", pty=True)
+
+@task
+def compact_local(c, force=False):
+    """Alternative locale : partitions year=/month= triées (zstd, Bloom) pour DuckDB"""
+    console.print("🗜️ Compaction des Parquet locaux...", style="blue")
+    c.run(f"python scripts/B_compact_local_parquet.py{' --force' if force else ''}", pty=True)
+
+@task
+def build_cube(c, backend="duckdb"):
+    """Construire le cube d'agrégats des dashboards (duckdb ou snowflake)"""
+    console.print(f"🧊 Construction du cube d'agrégats ({backend})...", style="blue")
+    c.run(f"python -m dashboard.cube --backend {backend}", pty=True)
+
+@task
+def build_warehouse(c, force=False):
+    """Alternative locale : entrepôt DuckDB persistant (staging + marts) pour le dashboard"""
+    console.print("🏗️ Mise à jour de l'entrepôt DuckDB...", style="blue")
+    c.run(f"python -m dashboard.warehouse{' --force' if force else ''}", pty=True)
+
+@task
+def bench_download(c, months=6, rows=1000000, rate=20):
+    """Benchmark du téléchargement contre un serveur HTTP local"""
+    console.print("⏱️ Benchmark téléchargement...", style="blue")
+    c.run(f"python benchmarks/bench_download.py --months {months} --rows {rows} --rate {rate}", pty=True)
+
+@task
+def bench_load_data(c, months=3, rows=2000000):
+    """Benchmark du chargement à froid du dashboard local (4 requêtes vs passe unique)"""
+    console.print("⏱️ Benchmark load_data...", style="blue")
+    c.run(f"python benchmarks/bench_load_data.py --months {months} --rows {rows}", pty=True)
+
+@task
+def bench_fetch(c, backend="duckdb", sizes="10000,100000,1000000,10000000"):
+    """Benchmark de la lecture des résultats (fetchall vs Arrow) : durée et pic RSS"""
+    console.print("⏱️ Benchmark lecture des résultats...", style="blue")
+    c.run(f"python benchmarks/bench_fetch.py --backend {backend} --sizes {sizes}", pty=True)
+
+@task
+def profile_report(c, log="data/profiling.jsonl"):
+    """p50 / p99 des rendus profilés des dashboards (NYC_TAXI_PROFILE=1)"""
+    console.print("⏱️ Rapport de profilage...", style="blue")
+    c.run(f"python -m dashboard.profiling --log {log}", pty=True)
+
 @task
 def data_analysis(c):
     """Étape 1.3 : Analyse et nettoyage des données"""
@@ -135,10 +195,10 @@ def generate_report(c):
     c.run("python scripts/E_generate_report.py", pty=True)
 
 @task
-def dbt_transformations(c):
-    """Transformations avec dbt Core"""
-    console.print("🔄 Transformations dbt Core...", style="blue")
-    c.run("python scripts/F_dbt_transformations.py", pty=True)
+def dbt_transformations(c, target="snowflake"):
+    """Transformations avec dbt Core (cible snowflake ou duckdb)"""
+    console.print(f"🔄 Transformations dbt Core ({target})...", style="blue")
+    c.run(f"python scripts/F_dbt_transformations.py --target {target}", pty=True)
 
 @task
 def raw_analysis(c):
@@ -0,0 +1,69 @@
+"""
+dashboard/cancellation.py : annulation des requêtes d'un rendu remplacé
+"""
+
+import threading
+import time
+
+import pytest
+
+from dashboard import cancellation, parallel
+from dashboard.pool import ConnectionPool
+
+SLOW = "SELECT sum(a * b) FROM range(3000000000) t(a), range(1) u(b)"
+
+
+@pytest.fixture
+def pool():
+    return ConnectionPool(size=2, query_threads=1)
+
+
+def later(seconds, action):
+    timer = threading.Timer(seconds, action)
+    timer.start()
+    return timer
+
+
+def test_superseded_query_is_cancelled(pool):
+    superseded = threading.Event()
+    later(0.3, superseded.set)
+    started = time.perf_counter()
+    with cancellation.owned_by("session", superseded.is_set), pool.cursor() as cursor:
+        with pytest.raises(cancellation.QueryCancelled):
+            with cancellation.track("slow", cursor.interrupt):
+                cursor.execute(SLOW).fetchall()
+        assert time.perf_counter() - started < 5
+        assert cursor.execute("SELECT 1").fetchall() == [(1,)]   # Curseur réutilisable
+    assert not cancellation.in_flight("session")
+
+
+def test_newer_generation_cancels_runner_queries(pool):
+    generations = cancellation.Generations()
+    owner = cancellation.rerun("session", generations)
+    later(0.3, generations.begin)
+    with owner:
+        outcomes = parallel.duckdb_runner(pool)({"slow": SLOW, "other": SLOW})
+    assert all(isinstance(e, cancellation.QueryCancelled) for e in outcomes.values())
+
+
+def test_already_superseded_owner_does_not_start(pool):
+    cancelled = []
+    with cancellation.owned_by("session", lambda: True):
+        with pytest.raises(cancellation.QueryCancelled):
+            cancellation.register("late", lambda: cancelled.append(True))
+    assert cancelled == [True]
+
+
+def test_queries_without_owner_are_never_cancelled(pool):
+    assert cancellation.register("warm-up", lambda: None) is None
+    with pool.cursor() as cursor, cancellation.track("warm-up", cursor.interrupt) as query:
+        assert query is None
+        assert cursor.execute("SELECT 42").fetchall() == [(42,)]
+
+
+def test_generations_supersede_only_older_reruns():
+    generations = cancellation.Generations()
+    first = generations.begin()
+    assert not generations.superseded(first)
+    second = generations.begin()
+    assert generations.superseded(first) and not generations.superseded(second)
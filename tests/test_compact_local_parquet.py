@@ -0,0 +1,48 @@
+"""
+scripts/B_compact_local_parquet.py : les partitions suivent les fichiers sources
+"""
+
+import json
+import sys
+
+import pytest
+
+import B_compact_local_parquet as compaction
+from tlc_stand_in import make_fixture
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    sources = tmp_path / "yellow_taxi"
+    sources.mkdir()
+    partitioned = tmp_path / "yellow_taxi_partitioned"
+    monkeypatch.setattr(compaction, "DATA_DIR", sources)
+    monkeypatch.setattr(compaction, "PARTITIONED_DIR", partitioned)
+    monkeypatch.setattr(compaction, "STATE_FILE", partitioned / "_sources.json")
+    monkeypatch.setattr(compaction, "load_manifest", lambda: {})
+    monkeypatch.setattr(sys, "argv", ["B_compact_local_parquet.py"])
+    return sources, partitioned
+
+
+def compacted(partitioned):
+    return sorted(str(p.relative_to(partitioned)) for p in partitioned.glob("year=*/month=*/*.parquet"))
+
+
+def test_removed_and_renamed_sources_leave_no_partitions(tree):
+    sources, partitioned = tree
+    for seed, month in enumerate(["2024-01", "2024-02"]):
+        make_fixture(sources / f"yellow_tripdata_{month}.parquet", 1_000, seed=seed)
+    compaction.main()
+    assert compacted(partitioned) == ["year=2024/month=1/yellow_tripdata_2024-01.parquet",
+                                      "year=2024/month=1/yellow_tripdata_2024-02.parquet"]
+
+    (sources / "yellow_tripdata_2024-01.parquet").unlink()
+    (sources / "yellow_tripdata_2024-02.parquet").rename(sources / "yellow_tripdata_2024-03.parquet")
+    compaction.main()
+    assert compacted(partitioned) == ["year=2024/month=1/yellow_tripdata_2024-03.parquet"]
+    state = json.loads((partitioned / "_sources.json").read_text())
+    assert list(state) == ["yellow_tripdata_2024-03.parquet"]
+
+    # Plus aucune source : les répertoires de partitions vides disparaissent aussi
+    assert compaction.remove_orphans([], state) == ["yellow_tripdata_2024-03.parquet"]
+    assert state == {} and not list(partitioned.glob("year=*"))
@@ -0,0 +1,51 @@
+"""
+dashboard/freshness.py : bascule de version après préchauffage
+"""
+
+import threading
+
+from dashboard.freshness import VersionTracker
+
+
+def wait_idle(tracker):
+    for thread in threading.enumerate():
+        if thread.name.startswith("warm-"):
+            thread.join(timeout=5)
+    assert tracker.warming is None
+
+
+def test_new_version_is_served_once_warm():
+    warmed = []
+    tracker = VersionTracker(warmed.append)
+    assert tracker.resolve("v1") == "v1"
+    assert tracker.resolve("v2") == "v1"   # L'ancienne version reste servie pendant le préchauffage
+    wait_idle(tracker)
+    assert warmed == ["v2"]
+    assert tracker.resolve("v2") == "v2"
+
+
+def test_failed_warm_is_retried_only_after_delay(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("dashboard.freshness.time.monotonic", lambda: now[0])
+    calls = []
+
+    def warm(version):
+        calls.append(version)
+        raise OSError("entrepôt verrouillé")
+
+    tracker = VersionTracker(warm, retry_delay=60)
+    tracker.resolve("v1")
+    for _ in range(20):
+        assert tracker.resolve("v2") == "v1"
+        wait_idle(tracker)
+    assert calls == ["v2"]
+
+    now[0] += 61
+    assert tracker.resolve("v2") == "v1"
+    wait_idle(tracker)
+    assert calls == ["v2", "v2"]
+
+    # Une version plus récente n'attend pas la fin du délai de la précédente
+    assert tracker.resolve("v3") == "v1"
+    wait_idle(tracker)
+    assert calls == ["v2", "v2", "v3"]
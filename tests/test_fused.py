@@ -0,0 +1,41 @@
+"""
+dashboard/fused.py : la passe GROUPING SETS découpée doit redonner les quatre
+requêtes historiques de benchmarks/bench_load_data.py, types compris
+"""
+
+import duckdb
+import pytest
+
+from bench_load_data import DATE_FILTER, check_same, cold_query, legacy_sections
+from dashboard import frames, fused
+from tlc_stand_in import make_fixtures
+
+
+@pytest.fixture(scope="module")
+def trips(tmp_path_factory):
+    directory = make_fixtures(tmp_path_factory.mktemp("trips"), ["2024-01", "2024-02"], 20_000)
+    return f"read_parquet('{directory}/*.parquet')"
+
+
+def arrow_query(sql):
+    # Lecture du dashboard local (dashboard/frames.py), en plus de fetchdf()
+    return frames.from_duckdb(duckdb.connect().execute(sql))
+
+
+@pytest.mark.parametrize("query", [cold_query, lambda: arrow_query], ids=["fetchdf", "arrow"])
+def test_split_matches_legacy_queries(trips, query):
+    # Moins de 100 zones : le LIMIT 100 des zones ne coupe pas entre des ex aequo
+    source = f"(SELECT * FROM {trips} WHERE PULocationID <= 80)"
+    check_same(legacy_sections(query(), source, DATE_FILTER),
+               fused.load_sections(query(), source, DATE_FILTER))
+
+
+def test_sections_keep_integer_keys_and_additive_columns(trips):
+    daily, hourly, zones, profile = fused.load_sections(arrow_query, trips, DATE_FILTER)
+    assert hourly["PICKUP_HOUR"].dtype.kind == "i"
+    assert zones["ZONE_ID"].dtype.kind == "i"
+    assert list(hourly["PICKUP_HOUR"]) == list(range(24))
+    assert len(zones) == 100 and zones["TOTAL_TRIPS"].is_monotonic_decreasing
+    for section in (daily, hourly, zones):
+        assert set(fused._ADDITIVE) <= set(section.columns)
+    assert daily["TOTAL_TRIPS"].sum() == profile.loc[0, "TOTAL_TRIPS"]
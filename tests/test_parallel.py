@@ -0,0 +1,76 @@
+"""
+dashboard/parallel.py : runners DuckDB et Snowflake (connexion simulée)
+"""
+
+import itertools
+
+import duckdb
+import pandas as pd
+import pytest
+
+from dashboard import parallel
+from dashboard.pool import ConnectionPool
+
+QUERIES = {"one": "SELECT 1 AS x", "range": "SELECT range AS x FROM range(3)", "bad": "SELECT * FROM missing"}
+
+
+def test_duckdb_runner_returns_results_and_errors():
+    outcomes = parallel.duckdb_runner(ConnectionPool(size=2))(QUERIES)
+    assert outcomes["one"]["X"].tolist() == [1]
+    assert outcomes["range"]["X"].tolist() == [0, 1, 2]
+    assert isinstance(outcomes["bad"], duckdb.CatalogException)
+
+
+def test_gather_raises_first_error_in_order():
+    outcomes = {"a": pd.DataFrame(), "b": KeyError("b"), "c": ValueError("c")}
+    with pytest.raises(KeyError):
+        parallel.gather(outcomes, ["a", "b", "c"])
+    assert parallel.gather(outcomes, ["a"]) == (outcomes["a"],)
+
+
+class FakeSnowflake:
+    """Connexion simulée : chaque requête reste en cours une interrogation, puis réussit"""
+
+    def __init__(self):
+        self.ids = itertools.count()
+        self.sql = {}
+        self.polls = {}
+        self.events = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_query_status_throw_if_error(self, sfqid):
+        self.polls[sfqid] = self.polls.get(sfqid, 0) + 1
+        self.events.append("poll")
+        if "missing" in self.sql[sfqid]:
+            raise RuntimeError("Object 'MISSING' does not exist")
+        return "RUNNING" if self.polls[sfqid] < 2 else "SUCCESS"
+
+    def is_still_running(self, status):
+        return status == "RUNNING"
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.sfqid = None
+
+    def execute_async(self, sql):
+        self.sfqid = f"q{next(self.conn.ids)}"
+        self.conn.sql[self.sfqid] = sql
+        self.conn.events.append("submit")
+
+    def get_results_from_sfqid(self, sfqid):
+        self.sfqid = sfqid
+
+
+def test_snowflake_runner_submits_everything_before_polling():
+    conn = FakeSnowflake()
+    fetch = lambda cursor: pd.DataFrame({"SQL": [conn.sql[cursor.sfqid]]})   # noqa: E731
+    outcomes = parallel.snowflake_runner(conn, fetch, poll_interval=0)(QUERIES)
+    assert outcomes["one"]["SQL"].tolist() == [QUERIES["one"]]
+    assert outcomes["range"]["SQL"].tolist() == [QUERIES["range"]]
+    assert isinstance(outcomes["bad"], RuntimeError)
+    assert conn.events[:3] == ["submit"] * 3
+    assert conn.polls == {"q0": 2, "q1": 2, "q2": 1}
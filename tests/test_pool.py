@@ -0,0 +1,128 @@
+"""
+dashboard/pool.py : curseurs bornés et admission des requêtes lourdes
+"""
+
+import os
+import threading
+import time
+
+import duckdb
+import pytest
+
+from dashboard.pool import ConnectionPool, VersionedPool
+
+
+@pytest.fixture
+def pool():
+    return ConnectionPool(size=3, max_heavy=1, query_threads=1, query_memory_mb=256, timeout=0.3)
+
+
+def test_cursors_are_reused(pool):
+    with pool.cursor() as first:
+        first.execute("CREATE TABLE t AS SELECT 42 AS x")
+    with pool.cursor() as second:
+        assert second is first
+        assert second.execute("SELECT x FROM t").fetchall() == [(42,)]
+
+
+def test_saturated_pool_times_out(pool):
+    with pool.cursor(), pool.cursor(), pool.cursor():
+        with pytest.raises(TimeoutError, match="curseur"):
+            with pool.cursor():
+                pass
+    with pool.cursor():   # Les curseurs rendus sont de nouveau disponibles
+        pass
+
+
+def test_heavy_queries_are_admitted_one_at_a_time(pool):
+    pool.timeout = 10
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def heavy():
+        with pool.cursor(heavy=True) as cursor:
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            cursor.execute("SELECT count(*) FROM range(1000000)").fetchall()
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=heavy) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    # Une requête légère n'attend pas l'admission des lourdes
+    with pool.cursor() as cursor:
+        assert cursor.execute("SELECT 1").fetchall() == [(1,)]
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 1
+
+
+def test_heavy_admission_times_out(pool):
+    with pool.cursor(heavy=True):
+        with pytest.raises(TimeoutError, match="admission"):
+            with pool.cursor(heavy=True):
+                pass
+
+
+def test_close_waits_for_borrowed_cursors(pool):
+    pool.timeout = 10
+    released = threading.Event()
+
+    def borrow():
+        with pool.cursor() as cursor:
+            cursor.execute("SELECT 1").fetchall()
+            time.sleep(0.2)
+        released.set()
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    time.sleep(0.05)
+    pool.close()
+    assert released.is_set()
+    thread.join()
+    with pytest.raises(RuntimeError, match="fermé"):
+        with pool.cursor():
+            pass
+
+
+def test_closed_pool_releases_replaced_database(tmp_path):
+    # Entrepôt reconstruit puis remplacé par os.replace, comme dashboard/warehouse.build()
+    path = tmp_path / "warehouse.duckdb"
+    for version, target in ((1, path), (2, tmp_path / "next.duckdb")):
+        con = duckdb.connect(str(target))
+        con.execute(f"CREATE TABLE t AS SELECT {version} AS version")
+        con.close()
+
+    old = ConnectionPool(path, size=2)
+    with old.cursor() as cursor:
+        assert cursor.execute("SELECT version FROM t").fetchall() == [(1,)]
+    os.replace(tmp_path / "next.duckdb", path)
+    old.close()
+
+    new = ConnectionPool(path, size=2)
+    with new.cursor() as cursor:
+        assert cursor.execute("SELECT version FROM t").fetchall() == [(2,)]
+    new.close()
+
+
+def test_versioned_pool_reopens_replaced_warehouse(tmp_path):
+    path = tmp_path / "warehouse.duckdb"
+    for version, target in ((1, path), (2, tmp_path / "next.duckdb")):
+        con = duckdb.connect(str(target))
+        con.execute(f"CREATE TABLE t AS SELECT {version} AS version")
+        con.close()
+    pools = VersionedPool(lambda: ConnectionPool(path, size=2))
+
+    first = pools.get("v1")
+    with first.cursor() as cursor:
+        assert cursor.execute("SELECT version FROM t").fetchall() == [(1,)]
+    assert pools.get("v1") is first
+
+    os.replace(tmp_path / "next.duckdb", path)
+    second = pools.get("v2")
+    assert first.closed and second is not first
+    with second.cursor() as cursor:
+        assert cursor.execute("SELECT version FROM t").fetchall() == [(2,)]
+    second.close()
@@ -0,0 +1,71 @@
+"""
+dashboard/result_cache.py : clés de cache, relecture sans copie et élagage
+"""
+
+import os
+
+import pandas as pd
+
+from dashboard import result_cache
+from dashboard.result_cache import ResultCache, normalize
+
+
+def test_normalize_collapses_whitespace_outside_literals():
+    assert normalize("  SELECT a,\n\t b\nFROM  t  ") == "SELECT a, b FROM t"
+    assert normalize("WHERE x = 'a  b'") == "WHERE x = 'a  b'"
+    assert normalize('SELECT "my  col"\n FROM t') == 'SELECT "my  col" FROM t'
+    assert normalize("WHERE x = 'it''s  here'  AND y") == "WHERE x = 'it''s  here' AND y"
+
+
+def test_key_ignores_layout_but_not_literals(tmp_path):
+    cache = ResultCache("v1", root=tmp_path)
+    assert cache._path("SELECT 1\nFROM t") == cache._path("SELECT 1 FROM t")
+    assert cache._path("WHERE x = 'a b'") != cache._path("WHERE x = 'a  b'")
+    assert ResultCache("v2", root=tmp_path)._path("SELECT 1") != cache._path("SELECT 1")
+
+
+def test_get_computes_once_and_reads_back(tmp_path):
+    cache = ResultCache("v1", root=tmp_path)
+    df = pd.DataFrame({"ZONE_ID": [1, 2], "TOTAL_TRIPS": [10, 20], "LABEL": ["a", None]})
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return df
+
+    assert cache.get("SELECT * FROM t", compute) is df
+    again = ResultCache("v1", root=tmp_path).get("SELECT *\n  FROM t", compute)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(again, df)
+    # Colonne numérique sans valeur manquante : lue sur les pages du fichier
+    assert not again["TOTAL_TRIPS"].to_numpy().flags.writeable
+
+
+def test_wrap_runs_only_missing_queries(tmp_path):
+    cache = ResultCache("v1", root=tmp_path)
+    cache.write("SELECT 1", pd.DataFrame({"A": [1]}))
+    ran = []
+
+    def run_all(queries):
+        ran.append(sorted(queries))
+        return {name: pd.DataFrame({"A": [2]}) if name == "b" else ValueError(name)
+                for name in queries}
+
+    outcomes = cache.wrap(run_all)({"a": "SELECT 1", "b": "SELECT 2", "c": "SELECT 3"})
+    assert ran == [["b", "c"]]
+    assert outcomes["a"]["A"].tolist() == [1]
+    assert isinstance(outcomes["c"], ValueError)
+    assert cache.read("SELECT 2") is not None
+    assert cache.read("SELECT 3") is None   # Les erreurs ne sont pas mises en cache
+
+
+def test_new_version_prunes_oldest(tmp_path, monkeypatch):
+    for age, version in enumerate(["old", "mid", "new"]):
+        ResultCache(version, root=tmp_path).write("SELECT 1", pd.DataFrame({"A": [1]}))
+        os.utime(tmp_path / version, (1_000_000 + age, 1_000_000 + age))
+    assert sorted(d.name for d in tmp_path.iterdir()) == ["mid", "new", "old"]
+
+    monkeypatch.setattr(result_cache, "MAX_VERSIONS", 2)
+    ResultCache("newest", root=tmp_path).write("SELECT 1", pd.DataFrame({"A": [1]}))
+    assert sorted(d.name for d in tmp_path.iterdir()) == ["new", "newest"]
+
@@ -0,0 +1,69 @@
+"""
+Moyennes pondérées de dashboard/rollup.py : jamais une moyenne de moyennes
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import rollup
+
+
+@pytest.fixture
+def daily():
+    # Deux lundis et un mardi aux volumes très différents
+    df = pd.DataFrame({
+        "PICKUP_DATE":        pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-08"]),
+        "TOTAL_TRIPS":        [1, 3, 4],
+        "TOTAL_REVENUE":      [10.0, 60.0, 20.0],
+        "SUM_TRIP_DISTANCE":  [1.0, 9.0, 2.0],
+        "COUNT_TOTAL_AMOUNT": [1, 3, 4],
+        "SUM_TIP_PCT":        [10.0, 30.0, 0.0],
+        "COUNT_TIP_PCT":      [1, 2, 0],
+    })
+    return rollup._with_averages(df)
+
+
+def test_totals_weight_each_day_by_its_trips(daily):
+    period = rollup.totals(daily)
+    assert period["TOTAL_TRIPS"] == 8
+    assert period[rollup.N_ROWS] == 3
+    assert period["AVG_FARE"] == pytest.approx(90 / 8)
+    assert period["AVG_DISTANCE"] == pytest.approx(12 / 8)
+    assert period["AVG_TIP_PCT"] == pytest.approx(40 / 3)
+    assert period["AVG_FARE"] != pytest.approx(daily["AVG_FARE"].mean())
+
+
+def test_zero_count_gives_missing_average(daily):
+    assert np.isnan(daily.loc[2, "AVG_TIP_PCT"])
+    assert np.isnan(rollup.totals(daily.iloc[[2]])["AVG_TIP_PCT"])
+
+
+def test_rollup_by_weekday(daily):
+    weekdays = rollup.rollup(daily, daily["PICKUP_DATE"].dt.dayofweek)
+    monday = weekdays.loc[0]
+    assert monday[rollup.N_ROWS] == 2
+    assert monday["TOTAL_TRIPS"] == 5
+    assert monday["AVG_FARE"] == pytest.approx(30 / 5)
+    assert weekdays.loc[1, "AVG_FARE"] == pytest.approx(20)
+
+
+def test_per_row_averages_totals_and_keeps_means(daily):
+    weekdays = rollup.rollup(daily, daily["PICKUP_DATE"].dt.dayofweek)
+    per_day = rollup.per_row(weekdays)
+    assert per_day.loc[0, "TOTAL_TRIPS"] == pytest.approx(2.5)
+    assert per_day.loc[0, "TOTAL_REVENUE"] == pytest.approx(15)
+    assert per_day.loc[0, "AVG_FARE"] == weekdays.loc[0, "AVG_FARE"]
+    assert weekdays.loc[0, "TOTAL_TRIPS"] == 5   # L'original n'est pas modifié
+
+    period = rollup.per_row(rollup.totals(daily))
+    assert period["TOTAL_TRIPS"] == pytest.approx(8 / 3)
+    assert period["AVG_FARE"] == pytest.approx(90 / 8)
+
+
+def test_rolling_weights_averages_only(daily):
+    fare = rollup.rolling(daily, "AVG_FARE", 2)
+    assert fare.iloc[1] == pytest.approx(70 / 4)
+    assert fare.iloc[2] == pytest.approx(80 / 7)
+    trips = rollup.rolling(daily, "TOTAL_TRIPS", 2)
+    assert trips.iloc[2] == pytest.approx(3.5)
@@ -0,0 +1,128 @@
+"""
+Reprise et synchronisation de scripts/tlc_download.py contre le serveur local
+de benchmarks/tlc_stand_in.py (Range, If-Range, ETag / 304)
+"""
+
+import json
+import os
+
+import httpx
+import pytest
+
+import tlc_download
+from tlc_stand_in import StandIn, _Handler, make_fixture, make_fixtures
+
+MONTHS = ["2024-01", "2024-02"]
+ROWS = 20_000
+
+
+@pytest.fixture
+def source(tmp_path):
+    return make_fixtures(tmp_path / "source", MONTHS, ROWS)
+
+
+@pytest.fixture
+def server(source):
+    with StandIn(source) as server:
+        yield server
+
+
+@pytest.fixture
+def ranges(monkeypatch):
+    # En-têtes Range reçus par le serveur, dans l'ordre des requêtes
+    seen = []
+    do_get = _Handler.do_GET
+
+    def recording(handler):
+        seen.append(handler.headers.get("Range"))
+        do_get(handler)
+
+    monkeypatch.setattr(_Handler, "do_GET", recording)
+    return seen
+
+
+def served(source, month):
+    return (source / f"yellow_tripdata_{month}.parquet").read_bytes()
+
+
+def test_resume_after_interruption(tmp_path, source, server, ranges, monkeypatch):
+    # Première réponse coupée après 64 Ko : la tentative suivante reprend à cet octet
+    cut_after = 64 * 1024
+    write_response = tlc_download._write_response
+    calls = []
+
+    async def interrupted(response, file, buffer_size):
+        calls.append(response)
+        if len(calls) > 1:
+            return await write_response(response, file, buffer_size)
+        async for chunk in response.aiter_bytes(cut_after):
+            file.write(chunk)
+            raise httpx.ReadError("coupure simulée")
+
+    monkeypatch.setattr(tlc_download, "_write_response", interrupted)
+    data_dir = tmp_path / "out"
+    result = tlc_download.fetch_month("2024-01", data_dir=data_dir, base_url=server.base_url)
+
+    expected = served(source, "2024-01")
+    assert result.ok and not result.skipped
+    assert result.path.read_bytes() == expected
+    assert ranges == [f"bytes=0-{len(expected) - 1}", f"bytes={cut_after}-{len(expected) - 1}"]
+    assert not list(data_dir.glob("*.part*"))
+    entry = tlc_download.load_manifest(data_dir)["2024-01"]
+    assert entry["sha256"] == tlc_download.file_sha256(result.path)
+    assert entry["rows"] == ROWS
+
+
+def test_segmented_download_matches_source(tmp_path, source, server, monkeypatch):
+    monkeypatch.setattr(tlc_download, "MIN_SEGMENT_SIZE", 64 * 1024)
+    results = tlc_download.download_months(MONTHS, data_dir=tmp_path / "out",
+                                           base_url=server.base_url, segments=4)
+    for month, result in zip(MONTHS, results):
+        assert result.ok
+        assert result.path.read_bytes() == served(source, month)
+
+
+def test_truncated_file_is_rejected(tmp_path, source):
+    truncated = tmp_path / "truncated.parquet"
+    truncated.write_bytes(served(source, "2024-01")[:-100])
+    with pytest.raises(ValueError, match="PAR1"):
+        tlc_download.verify_parquet(truncated)
+
+
+def test_invalid_local_file_is_downloaded_again(tmp_path, source, server):
+    data_dir = tmp_path / "out"
+    data_dir.mkdir()
+    tlc_download.local_path("2024-01", data_dir).write_bytes(b"PAR1 tronque")
+    result = tlc_download.fetch_month("2024-01", data_dir=data_dir, base_url=server.base_url)
+    assert result.ok and not result.skipped
+    assert result.path.read_bytes() == served(source, "2024-01")
+
+
+def test_sync_reports_new_changed_and_unchanged(tmp_path, source, server):
+    data_dir = tmp_path / "out"
+    kwargs = dict(data_dir=data_dir, base_url=server.base_url)
+
+    report = tlc_download.sync_months(MONTHS, **kwargs)
+    assert report["new"] == MONTHS and not report["failed"]
+
+    report = tlc_download.sync_months(MONTHS, **kwargs)
+    assert report["unchanged"] == MONTHS and not report["new"] + report["changed"]
+
+    # Republication : 2024-01 au contenu modifié, 2024-02 identique avec un nouvel ETag
+    make_fixture(source / "yellow_tripdata_2024-01.parquet", ROWS, seed=42)
+    republished = source / "yellow_tripdata_2024-02.parquet"
+    stat = republished.stat()
+    os.utime(republished, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    report = tlc_download.sync_months(MONTHS + ["2024-03"], **kwargs)
+    assert report["changed"] == ["2024-01"]
+    assert report["unchanged"] == ["2024-02"]
+    assert report["failed"] == ["2024-03"] and "2024-03" in report["errors"]
+    assert tlc_download.local_path("2024-01", data_dir).read_bytes() == served(source, "2024-01")
+    assert json.loads((data_dir / tlc_download.SYNC_REPORT_NAME).read_text()) == report
+
+
+@pytest.mark.parametrize("fetch", [tlc_download.download_months, tlc_download.sync_months])
+def test_at_least_one_attempt_is_required(tmp_path, fetch):
+    with pytest.raises(ValueError, match="retries"):
+        fetch(["2024-01"], data_dir=tmp_path, retries=0)
@@ -0,0 +1,79 @@
+"""
+dashboard/warehouse.py : la mise à jour incrémentale doit redonner les tables
+d'une construction complète
+"""
+
+import duckdb
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+from dashboard import cube, warehouse
+from tlc_stand_in import make_fixture
+
+ROWS = 5_000
+
+
+def write_source(directory, month, seed):
+    # Trajets de janvier 2024 quel que soit le fichier : les jours se recouvrent
+    # d'un fichier à l'autre. Moins de 100 zones : pas d'ex aequo au LIMIT 100
+    path = make_fixture(directory / f"yellow_tripdata_{month}.parquet", ROWS, seed=seed)
+    table = pq.read_table(path)
+    zones = pc.add(pc.cast(pc.divide(table["PULocationID"], 3), "int32"), 1)
+    pq.write_table(table.set_column(table.schema.get_field_index("PULocationID"), "PULocationID", zones), path)
+    return path
+
+
+def tables(path):
+    con = duckdb.connect(str(path), read_only=True)
+    try:
+        names = [warehouse.STAGING_TABLE, warehouse.CUBE_TABLE] + [
+            warehouse.section_table(name) for name in cube.SECTIONS]
+        frames = {}
+        for name in names:
+            df = con.execute(f"SELECT * FROM {name}").fetchdf()
+            frames[name] = df.sort_values(list(df.columns)).reset_index(drop=True)
+        return frames
+    finally:
+        con.close()
+
+
+@pytest.fixture
+def sources(tmp_path):
+    directory = tmp_path / "yellow_taxi"
+    directory.mkdir()
+    for seed, month in enumerate(["2024-01", "2024-02", "2024-03"]):
+        write_source(directory, month, seed)
+    return directory
+
+
+def test_incremental_refresh_matches_full_build(tmp_path, sources):
+    incremental = tmp_path / "incremental.duckdb"
+    changed, removed = warehouse.build(incremental, sources)
+    assert len(changed) == 3 and not removed
+
+    # Un fichier republié, un nouveau, un supprimé
+    write_source(sources, "2024-02", seed=42)
+    write_source(sources, "2024-04", seed=7)
+    (sources / "yellow_tripdata_2024-01.parquet").unlink()
+    changed, removed = warehouse.build(incremental, sources)
+    assert sorted(path.name for path in changed) == ["yellow_tripdata_2024-02.parquet",
+                                                     "yellow_tripdata_2024-04.parquet"]
+    assert removed == ["yellow_tripdata_2024-01.parquet"]
+
+    full = tmp_path / "full.duckdb"
+    warehouse.build(full, sources, force=True)
+    expected = tables(full)
+    for name, df in tables(incremental).items():
+        pd.testing.assert_frame_equal(df, expected[name], rtol=1e-9, obj=name)
+    assert not (tmp_path / "incremental.duckdb.tmp").exists()
+
+
+def test_unchanged_sources_leave_the_file_alone(tmp_path, sources):
+    target = tmp_path / "warehouse.duckdb"
+    warehouse.build(target, sources)
+    modified = target.stat().st_mtime_ns
+    assert warehouse.build(target, sources) == ([], [])
+    assert target.stat().st_mtime_ns == modified
+    assert not (tmp_path / "warehouse.duckdb.tmp").exists()